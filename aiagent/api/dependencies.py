@@ -5,9 +5,10 @@ FastAPI Dependency Injection을 위한 함수들 정의
 
 from typing import Generator
 from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from aiagent.database import get_db, check_db_connection
-from aiagent.services.admin_service import AdminService
+from aiagent.database import get_db, get_async_db, check_db_connection
+from aiagent.services.admin_service import AdminService, AsyncAdminService
 from aiagent.services.ml_data_service import MLDataService
 from aiagent.utils.logger import get_logger
 
@@ -27,6 +28,20 @@ def get_admin_service(db: Session = Depends(get_db)) -> AdminService:
             detail="서비스 초기화에 실패했습니다"
         )
 
+def get_async_admin_service(db: AsyncSession = Depends(get_async_db)) -> AsyncAdminService:
+    """
+    Async Admin Service 의존성
+    비동기 세션을 주입받아 AsyncAdminService 인스턴스를 생성 (async def 라우트용)
+    """
+    try:
+        return AsyncAdminService(db)
+    except Exception as e:
+        logger.error(f"Async Admin Service 생성 실패: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="서비스 초기화에 실패했습니다"
+        )
+
 def get_ml_data_service(db: Session = Depends(get_db)) -> MLDataService:
     """
     ML Data Service 의존성
@@ -66,4 +81,4 @@ def verify_api_key(api_key: str = None) -> bool:
     현재는 기본적으로 True 반환
     """
     # TODO: 실제 API 키 검증 로직 구현
-    return True 
\ No newline at end of file
+    return True 
\ No newline at end of file
@@ -5,10 +5,11 @@
 
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from aiagent.api.dependencies import get_admin_service
+from aiagent.api.dependencies import get_async_admin_service
 from aiagent.api.v1.admin.schemas import (
     ParsingErrorListResponse,
     ParsingErrorDetailResponse,
+    ParsingErrorSearchResponse,
     UpdateParsingRuleRequest,
     UpdateParsingRuleResponse,
     TestParsingRuleRequest,
@@ -21,7 +22,7 @@ from aiagent.api.v1.admin.schemas import (
     BulkUpdateStatusResponse,
     ErrorResponse
 )
-from aiagent.services.admin_service import AdminService
+from aiagent.services.admin_service import AsyncAdminService
 from aiagent.exceptions import NotFoundError, ValidationError, BusinessLogicError, ParseRuleTestError
 from aiagent.utils.logger import get_logger
 
@@ -33,9 +34,11 @@ router = APIRouter(prefix="/parsing-errors", tags=["파싱 에러 관리"])
 async def get_parsing_errors(
     client_id: Optional[str] = Query(None, description="클라이언트 ID 필터"),
     status: Optional[str] = Query(None, description="상태 필터 (ERROR, FIXED, TESTING, COMPLETED)"),
-    page: int = Query(1, ge=1, description="페이지 번호"),
+    page: int = Query(1, ge=1, description="페이지 번호 (OFFSET 방식, 깊은 페이지는 cursor 권장)"),
     limit: int = Query(20, ge=1, le=100, description="페이지당 항목 수"),
-    admin_service: AdminService = Depends(get_admin_service)
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (지정 시 page 무시)"),
+    include_total: bool = Query(True, description="총 개수 포함 여부 (상한까지만 계산)"),
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     파싱 에러 목록 조회
@@ -44,16 +47,20 @@ async def get_parsing_errors(
     - **status**: 특정 상태의 에러만 조회 (선택사항)
     - **page**: 페이지 번호 (기본값: 1)
     - **limit**: 페이지당 항목 수 (기본값: 20, 최대: 100)
+    - **cursor**: 다음 페이지 커서 (응답의 next_cursor, 페이지 깊이와 관계없이 일정한 조회 비용)
+    - **include_total**: false면 총 개수를 계산하지 않음
     """
     try:
-        result = admin_service.get_parsing_errors(
+        result = await admin_service.get_parsing_errors(
             client_id=client_id,
             status=status,
             page=page,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            include_total=include_total
         )
         
-        logger.info(f"파싱 에러 목록 조회 API 호출: client_id={client_id}, status={status}, page={page}")
+        logger.info(f"파싱 에러 목록 조회 API 호출: client_id={client_id}, status={status}, page={page}, cursor={cursor}")
         return result
         
     except ValidationError as e:
@@ -63,10 +70,47 @@ async def get_parsing_errors(
         logger.error(f"파싱 에러 목록 조회 비즈니스 로직 오류: {e.message}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e.message)
 
+@router.get("/search", response_model=ParsingErrorSearchResponse)
+async def search_parsing_errors(
+    q: str = Query(..., min_length=1, max_length=200, description="검색어 (에러 메시지 / 영수증 내용, 3글자 이상 권장)"),
+    client_id: Optional[str] = Query(None, description="클라이언트 ID 필터"),
+    status_filter: Optional[str] = Query(None, alias="status", description="상태 필터 (ERROR, FIXED, TESTING, COMPLETED)"),
+    page: int = Query(1, ge=1, description="페이지 번호"),
+    limit: int = Query(20, ge=1, le=100, description="페이지당 항목 수"),
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
+):
+    """
+    파싱 에러 검색
+    
+    - **q**: 에러 메시지 또는 영수증 내용에 포함된 문자열 (대소문자 무시)
+    - **client_id**: 특정 클라이언트의 에러만 검색 (선택사항)
+    - **status**: 특정 상태의 에러만 검색 (선택사항)
+    
+    결과는 유사도 순이며, highlights에 필드별 일치 위치 스니펫이 포함됩니다.
+    """
+    try:
+        result = await admin_service.search_parsing_errors(
+            search_term=q,
+            client_id=client_id,
+            status=status_filter,
+            page=page,
+            limit=limit
+        )
+        
+        logger.info(f"파싱 에러 검색 API 호출: q={q}, count={result['count']}")
+        return ParsingErrorSearchResponse(**result)
+        
+    except ValidationError as e:
+        logger.warning(f"파싱 에러 검색 검증 실패: {e.message}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
+    except BusinessLogicError as e:
+        logger.error(f"파싱 에러 검색 비즈니스 로직 오류: {e.message}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e.message)
+
 @router.get("/{error_id}", response_model=ParsingErrorDetailResponse)
 async def get_parsing_error_detail(
     error_id: int,
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     특정 파싱 에러 상세 조회
@@ -74,7 +118,7 @@ async def get_parsing_error_detail(
     - **error_id**: 조회할 에러의 ID
     """
     try:
-        result = admin_service.get_parsing_error_detail(error_id)
+        result = await admin_service.get_parsing_error_detail(error_id)
         
         logger.info(f"파싱 에러 상세 조회 API 호출: error_id={error_id}")
         return result
@@ -90,7 +134,7 @@ async def get_parsing_error_detail(
 async def update_parsing_rule(
     error_id: int,
     request: UpdateParsingRuleRequest,
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     파싱룰 수정
@@ -99,7 +143,7 @@ async def update_parsing_rule(
     - **xml_content**: 새로운 파싱룰 XML 내용
     """
     try:
-        result = admin_service.update_parsing_rule(error_id, request.xml_content)
+        result = await admin_service.update_parsing_rule(error_id, request.xml_content)
         
         logger.info(f"파싱룰 수정 API 호출: error_id={error_id}")
         return UpdateParsingRuleResponse(**result)
@@ -118,7 +162,7 @@ async def update_parsing_rule(
 async def test_parsing_rule(
     error_id: int,
     request: TestParsingRuleRequest,
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     파싱룰 테스트
@@ -127,7 +171,7 @@ async def test_parsing_rule(
     - **xml_content**: 테스트할 파싱룰 XML 내용
     """
     try:
-        result = admin_service.test_parsing_rule(error_id, request.xml_content)
+        result = await admin_service.test_parsing_rule(error_id, request.xml_content)
         
         logger.info(f"파싱룰 테스트 API 호출: error_id={error_id}, success={result.get('is_valid')}")
         return TestParsingRuleResponse(**result)
@@ -149,7 +193,7 @@ async def test_parsing_rule(
 async def submit_parsing_rule(
     error_id: int,
     request: SubmitParsingRuleRequest,
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     파싱룰 전송 (최종 제출)
@@ -160,7 +204,7 @@ async def submit_parsing_rule(
     테스트가 완료된 파싱룰만 전송할 수 있습니다.
     """
     try:
-        result = admin_service.submit_parsing_rule(error_id, request.xml_content)
+        result = await admin_service.submit_parsing_rule(error_id, request.xml_content)
         
         logger.info(f"파싱룰 전송 API 호출: error_id={error_id}, rule_id={result.get('rule_id')}")
         return SubmitParsingRuleResponse(**result)
@@ -178,7 +222,7 @@ async def submit_parsing_rule(
 @router.get("/statistics/overview", response_model=ErrorStatisticsResponse)
 async def get_error_statistics(
     client_id: Optional[str] = Query(None, description="클라이언트 ID 필터"),
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     에러 통계 조회
@@ -186,7 +230,7 @@ async def get_error_statistics(
     - **client_id**: 특정 클라이언트의 통계만 조회 (선택사항)
     """
     try:
-        result = admin_service.get_error_statistics(client_id)
+        result = await admin_service.get_error_statistics(client_id)
         
         logger.info(f"에러 통계 조회 API 호출: client_id={client_id}")
         return ErrorStatisticsResponse(**result)
@@ -199,7 +243,7 @@ async def get_error_statistics(
 async def get_recent_errors(
     hours: int = Query(24, ge=1, le=168, description="조회할 시간 범위 (시간 단위)"),
     limit: int = Query(10, ge=1, le=50, description="최대 조회 개수"),
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     최근 에러 조회
@@ -208,7 +252,7 @@ async def get_recent_errors(
     - **limit**: 최대 조회 개수 (기본값: 10개, 최대: 50개)
     """
     try:
-        result = admin_service.get_recent_errors(hours=hours, limit=limit)
+        result = await admin_service.get_recent_errors(hours=hours, limit=limit)
         
         response = RecentErrorsResponse(
             data=result,
@@ -226,7 +270,7 @@ async def get_recent_errors(
 @router.patch("/bulk-update-status", response_model=BulkUpdateStatusResponse)
 async def bulk_update_error_status(
     request: BulkUpdateStatusRequest,
-    admin_service: AdminService = Depends(get_admin_service)
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
 ):
     """
     에러 상태 일괄 업데이트
@@ -235,7 +279,7 @@ async def bulk_update_error_status(
     - **new_status**: 새로운 상태 (ERROR, FIXED, TESTING, COMPLETED)
     """
     try:
-        result = admin_service.bulk_update_error_status(request.error_ids, request.new_status)
+        result = await admin_service.bulk_update_error_status(request.error_ids, request.new_status)
         
         logger.info(f"에러 상태 일괄 업데이트 API 호출: count={result.get('updated_count')}, status={request.new_status}")
         return BulkUpdateStatusResponse(**result)
@@ -245,4 +289,4 @@ async def bulk_update_error_status(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
     except BusinessLogicError as e:
         logger.error(f"에러 상태 일괄 업데이트 비즈니스 로직 오류: {e.message}")
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e.message) 
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e.message) 
\ No newline at end of file
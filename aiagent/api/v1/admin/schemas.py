@@ -35,9 +35,25 @@ class ParsingErrorSchema(BaseModel):
     updated_at: str
 
 class ParsingErrorListResponse(BaseModel):
-    """파싱 에러 목록 응답 스키마"""
+    """파싱 에러 목록 응답 스키마 (다음 페이지는 next_cursor를 cursor로 전달)"""
     data: List[ParsingErrorSchema]
-    total: int
+    total: Optional[int] = None  # include_total=false면 None, 상한 초과 시 상한값 (total_capped=true)
+    total_capped: bool = False
+    page: Optional[int] = None  # 커서로 조회한 페이지는 None
+    limit: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class ParsingErrorSearchResult(ParsingErrorSchema):
+    """파싱 에러 검색 결과 스키마"""
+    rank: float
+    highlights: Dict[str, str] = Field(default_factory=dict, description="필드별 일치 위치 스니펫 (HTML 이스케이프, <b>로 강조)")
+
+class ParsingErrorSearchResponse(BaseModel):
+    """파싱 에러 검색 응답 스키마"""
+    data: List[ParsingErrorSearchResult]
+    search_term: str
+    count: int
     page: int
     limit: int
 
@@ -109,6 +125,20 @@ class ErrorStatisticsResponse(BaseModel):
     COMPLETED: int
     TOTAL: int
 
+class ReceiptStatisticsSummary(BaseModel):
+    """영수증 처리 통계 (기간 / 클라이언트 / 일자 단위 공통)"""
+    total_count: int
+    success_count: int
+    error_count: int
+    success_rate: float
+    avg_processing_time: float
+
+class ReceiptStatisticsResponse(ReceiptStatisticsSummary):
+    """영수증 처리 통계 응답 스키마"""
+    period_days: int
+    client_stats: Dict[str, ReceiptStatisticsSummary]
+    daily_stats: Dict[str, ReceiptStatisticsSummary]
+
 class RecentErrorsResponse(BaseModel):
     """최근 에러 응답 스키마"""
     data: List[ParsingErrorSchema]
@@ -146,11 +176,14 @@ class MLTrainingDataSchema(BaseModel):
     created_at: str
 
 class MLTrainingDataListResponse(BaseModel):
-    """ML 훈련 데이터 목록 응답 스키마"""
+    """ML 훈련 데이터 목록 응답 스키마 (다음 페이지는 next_cursor를 cursor로 전달)"""
     data: List[MLTrainingDataSchema]
-    total: int
-    page: int
+    total: Optional[int] = None
+    total_capped: bool = False
+    page: Optional[int] = None
     limit: int
+    next_cursor: Optional[str] = None
+    has_more: bool = False
 
 class MLDataStatisticsResponse(BaseModel):
     """ML 데이터 통계 응답 스키마"""
@@ -203,9 +236,11 @@ class MLDataSearchResponse(BaseModel):
 # === 공통 쿼리 파라미터 스키마 ===
 
 class PaginationParams(BaseModel):
-    """페이징 파라미터"""
-    page: int = Field(default=1, ge=1, description="페이지 번호")
+    """페이징 파라미터 (cursor가 있으면 page는 무시)"""
+    page: int = Field(default=1, ge=1, description="페이지 번호 (OFFSET 방식, 깊은 페이지는 cursor 권장)")
     limit: int = Field(default=20, ge=1, le=100, description="페이지당 항목 수")
+    cursor: Optional[str] = Field(None, description="이전 응답의 next_cursor")
+    include_total: bool = Field(default=True, description="총 개수 포함 여부 (상한까지만 계산)")
 
 class ErrorFilterParams(PaginationParams):
     """에러 필터 파라미터"""
@@ -236,4 +271,4 @@ class HealthCheckResponse(BaseModel):
     services: Dict[str, str] = {
         "admin_service": "active",
         "ml_data_service": "active"
-    } 
\ No newline at end of file
+    } 
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+통계 API 엔드포인트
+관리자 대시보드용 영수증 처리 통계 (요약 테이블 조회)
+"""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from aiagent.api.dependencies import get_async_admin_service
+from aiagent.api.v1.admin.schemas import ReceiptStatisticsResponse
+from aiagent.services.admin_service import AsyncAdminService
+from aiagent.exceptions import BusinessLogicError
+from aiagent.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/statistics", tags=["통계"])
+
+@router.get("/receipts", response_model=ReceiptStatisticsResponse)
+async def get_receipt_statistics(
+    client_id: Optional[str] = Query(None, description="클라이언트 ID 필터"),
+    days: int = Query(7, ge=1, le=90, description="조회할 기간 (일 단위, 오늘 포함)"),
+    admin_service: AsyncAdminService = Depends(get_async_admin_service)
+):
+    """
+    영수증 처리 통계 조회
+    
+    - **client_id**: 특정 클라이언트의 통계만 조회 (선택사항)
+    - **days**: 최근 며칠의 통계를 조회할지 (기본값: 7일, 최대: 90일)
+    """
+    try:
+        result = await admin_service.get_receipt_statistics(client_id, days)
+        
+        logger.info(f"영수증 처리 통계 조회 API 호출: client_id={client_id}, days={days}")
+        return ReceiptStatisticsResponse(**result)
+        
+    except BusinessLogicError as e:
+        logger.error(f"영수증 처리 통계 조회 비즈니스 로직 오류: {e.message}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=e.message)
@@ -1,15 +1,21 @@
 import zmq
 import os
-import json
 import time
 import signal
 import sys
 import threading
 import traceback
+import queue
+from collections import deque
 from contextlib import contextmanager
-from .protocol import MessageFormat, MessageType, ErrorCode
+from .protocol import (MessageFormat, MessageType, ErrorCode, AIRequest, AIResponse,
+                       AIBatchRequest, AIBatchResponse, Capability)
+from .scheduler import RequestScheduler, RequestClass, parse_weights
+from .result_cache import TransactionResultCache, CacheState
 from ..services.processor import bill_processor, ProcessingError, BillProcessor
-from ..utils.logger import get_logger
+from ..services.record_writer import record_writer
+from ..utils.logger import get_logger, truncate_payload
+from ..utils.metrics import registry
 
 logger = get_logger('aiagent.core.broker')
 
@@ -17,12 +23,74 @@ logger = get_logger('aiagent.core.broker')
 BROKER_HOST = os.getenv("BROKER_HOST", "localhost")
 BROKER_PORT = os.getenv("BROKER_PORT", "5555")
 CLIENT_ID = os.getenv("CLIENT_ID", "AIAGNT")
+# 서비스 그룹 ID - 여러 인스턴스를 띄울 때 각자 다른 CLIENT_ID(예: AIAGNA)와 같은 그룹(AIAGNT) 지정
+SERVICE_GROUP = os.getenv("SERVICE_GROUP", "")
 RECONNECT_TIMEOUT = 5  # 재연결 대기 시간 (초)
+POLL_TIMEOUT = 100  # 수신 루프 poll 타임아웃 (밀리초) - 종료 플래그 / 하트비트 확인 주기
+OUTBOX_WAKEUP_ADDR = "inproc://aiagent-outbox-wakeup"
 REGISTRATION_TIMEOUT = 3  # 등록 응답 대기 시간 (초)
+# 브로커 하트비트 주기 (초) - 브로커에 BROKER_CLIENT_TTL을 설정했다면 그보다 짧아야 유휴 상태에서 등록이 유지됨 (0: 사용 안 함)
+HEARTBEAT_INTERVAL = float(os.getenv("HEARTBEAT_INTERVAL", "30"))
+
+# 스케줄러 설정
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))  # AI 요청 처리 워커 스레드 수
+GENERATE_WEIGHT = int(os.getenv("SCHEDULER_GENERATE_WEIGHT", "2"))  # 신규 매장 온보딩 우선
+MERGE_WEIGHT = int(os.getenv("SCHEDULER_MERGE_WEIGHT", "1"))
+# 클라이언트별 속도 / 대기열 제한은 선택 사항 (기본 0: 제한 없음, 기존 동작과 동일)
+CLIENT_RATE = float(os.getenv("CLIENT_RATE_LIMIT", "0"))  # 클라이언트별 초당 처리 요청 수 (0 이하: 제한 없음)
+CLIENT_BURST = float(os.getenv("CLIENT_RATE_BURST", "5"))  # CLIENT_RATE_LIMIT 사용 시 순간 허용량
+CLIENT_MAX_QUEUE = int(os.getenv("CLIENT_MAX_QUEUE", "0"))  # 클라이언트별 최대 대기 요청 수 (0: 무제한)
+CLIENT_WEIGHTS = parse_weights(os.getenv("CLIENT_WEIGHTS", ""))  # 예: "ABCDEF:2,GHIJKL:3"
+
+# 멱등성 결과 캐시 설정
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))  # 초
+
+# 기능 협상 설정 (쉼표 구분, 비어있으면 설치본이 지원하는 기능 전체)
+AGENT_CAPABILITIES = Capability.parse(os.getenv("AGENT_CAPABILITIES", "")) or Capability.supported()
 
 # 종료 플래그
 running = True
 
+# AI 요청 스케줄러 (클라이언트별 공정 큐 + 속도 제한)
+scheduler = RequestScheduler(
+    class_weights={RequestClass.GENERATE: GENERATE_WEIGHT, RequestClass.MERGE: MERGE_WEIGHT},
+    client_rate=CLIENT_RATE,
+    client_burst=CLIENT_BURST,
+    max_client_queue=CLIENT_MAX_QUEUE,
+    client_weights=CLIENT_WEIGHTS
+)
+
+# transaction_id 기준 완료 결과 / 진행 중 요청 캐시
+result_cache = TransactionResultCache(max_size=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+# 워커 스레드가 만든 응답 프레임 (ZMQ 소켓은 수신 루프 스레드에서만 사용)
+outbox = queue.Queue()
+# 응답을 넣은 워커가 수신 루프를 깨우는 inproc PAIR 소켓 (송신 측, 워커 간 공유하므로 락으로 보호)
+_wakeup_sender = None
+_wakeup_lock = threading.Lock()
+
+# 브로커와 협상된 이 에이전트의 기능 / 피어별 협상된 기능 (client_id -> frozenset)
+negotiated_capabilities = frozenset()
+peer_capabilities = {}
+
+# 등록 응답을 기다리는 동안 받은 다른 메시지 (수신 루프 시작 시 순서대로 처리)
+pending_messages = deque()
+# 수신 루프 중 재등록 요청을 보낸 시각 (REGISTRATION_TIMEOUT 안에는 다시 보내지 않음)
+_reregister_sent_at = None
+
+# === Prometheus 메트릭 (/metrics) ===
+MESSAGES_RECEIVED = registry.counter("aiagent_messages_received_total", "브로커에서 수신한 메시지 수", ("command",))
+AI_RESPONSES = registry.counter("aiagent_ai_responses_total", "AI 요청 응답 수", ("command",))
+# 알 수 없는 명령은 OTHER로 묶어 라벨 수가 늘어나지 않도록 함
+_message_counters = {
+    cmd: MESSAGES_RECEIVED.labels(cmd.decode())
+    for cmd in (MessageType.PING, MessageType.PONG, MessageType.AI_GENERATE, MessageType.AI_MERGE,
+                MessageType.AI_GENERATE_BATCH, MessageType.AI_MERGE_BATCH, MessageType.CAPS, MessageType.OK,
+                MessageType.ERROR)
+}
+_other_messages = MESSAGES_RECEIVED.labels("OTHER")
+
 def signal_handler(signum, frame):
     """시그널 핸들러로 프로그램 종료 처리"""
     global running
@@ -34,29 +102,62 @@ signal.signal(signal.SIGINT, signal_handler)
 
 @contextmanager
 def zmq_connection():
-    """ZMQ 연결 컨텍스트 매니저"""
+    """ZMQ 연결 컨텍스트 매니저: (브로커 DEALER 소켓, 응답 대기열 wake-up 수신 소켓)"""
+    global _wakeup_sender
     ctx = zmq.Context()
     sock = None
+    wakeup = None
     try:
         sock = ctx.socket(zmq.DEALER)
         sock.setsockopt(zmq.IDENTITY, CLIENT_ID.encode())
         sock.setsockopt(zmq.RECONNECT_IVL, 1000)  # 1초 후 재연결 시도
         sock.setsockopt(zmq.RECONNECT_IVL_MAX, 5000)  # 최대 5초 간격으로 재연결
         sock.setsockopt(zmq.LINGER, 0)  # 종료 시 메시지 즉시 폐기
-        yield sock
+
+        # inproc은 bind가 connect보다 먼저여야 함
+        wakeup = ctx.socket(zmq.PAIR)
+        wakeup.setsockopt(zmq.LINGER, 0)
+        wakeup.bind(OUTBOX_WAKEUP_ADDR)
+        sender = ctx.socket(zmq.PAIR)
+        sender.setsockopt(zmq.LINGER, 0)
+        sender.setsockopt(zmq.SNDHWM, 1)  # 깨우기 신호는 하나만 대기하면 충분
+        sender.connect(OUTBOX_WAKEUP_ADDR)
+        with _wakeup_lock:
+            _wakeup_sender = sender
+        yield sock, wakeup
     finally:
+        with _wakeup_lock:
+            if _wakeup_sender is not None:
+                _wakeup_sender.close()
+                _wakeup_sender = None
+        if wakeup:
+            wakeup.close()
         if sock:
             sock.close()
         ctx.term()
 
+def _apply_registration(parts):
+    """등록 응답 [OK, negotiated] 적용"""
+    global negotiated_capabilities, _reregister_sent_at
+    negotiated_capabilities = Capability.parse(parts[1]) if len(parts) > 1 else frozenset()
+    _reregister_sent_at = None
+    # 재연결 시 피어 정보는 브로커에서 다시 조회
+    peer_capabilities.clear()
+    logger.info(f"브로커 등록 성공 - Client ID: {CLIENT_ID}, 기능: {sorted(negotiated_capabilities)}")
+
 def register_with_broker(sock):
-    """브로커 등록 및 응답 대기"""
+    """
+    브로커 등록 및 응답 대기 (연결 직후)
+
+    응답을 기다리는 동안 받은 다른 메시지(보관되었다 전달된 AI 요청 등)는 버리지 않고
+    pending_messages에 넣어 수신 루프에서 처리합니다.
+    """
     attempt = 1
     while running:  # running 플래그를 사용하여 프로그램 종료 시 중단
         try:
             logger.info(f"브로커 등록 시도 (시도 #{attempt}) - Client ID: {CLIENT_ID}")
             # 프로토콜 정의를 사용한 등록 메시지 생성
-            sock.send_multipart([b'', b"REGISTER", CLIENT_ID.encode(), b"", b""])
+            sock.send_multipart(MessageFormat.create_register(CLIENT_ID, AGENT_CAPABILITIES, SERVICE_GROUP or None))
             logger.info("브로커에 등록 요청 전송 완료")
 
             # 등록 응답 대기
@@ -64,14 +165,13 @@ def register_with_broker(sock):
             while time.time() - start < REGISTRATION_TIMEOUT:
                 if sock.poll(1000, zmq.POLLIN):
                     parts = sock.recv_multipart()
-                    logger.info(f"브로커로부터 응답 수신: {[p.decode() if isinstance(p, bytes) else p for p in parts]}")
                     if parts[0] == b'':
                         parts = parts[1:]
                     if parts[0] == MessageType.OK:
-                        logger.info(f"브로커 등록 성공 - Client ID: {CLIENT_ID}")
+                        _apply_registration(parts)
                         return True
-                    else:
-                        logger.warning(f"예상치 못한 응답 - Response: {parts}")
+                    logger.info("등록 응답 대기 중 수신한 메시지 보관: %s", truncate_payload(repr(parts)))
+                    pending_messages.append(parts)
             logger.error(f"브로커 등록 타임아웃 - Client ID: {CLIENT_ID}")
             
         except Exception as e:
@@ -85,6 +185,21 @@ def register_with_broker(sock):
     
     return False
 
+def request_registration(sock):
+    """
+    수신 루프 중 재등록 요청 (브로커 재시작 / 등록 만료)
+
+    응답을 기다리지 않고 REGISTER만 보내며, OK 응답은 수신 루프가 처리하므로
+    재등록 중에도 AI 요청 수신과 응답 전송이 멈추지 않습니다.
+    """
+    global _reregister_sent_at
+    now = time.monotonic()
+    if _reregister_sent_at is not None and now - _reregister_sent_at < REGISTRATION_TIMEOUT:
+        return  # 이미 보낸 요청의 응답 대기 중
+    _reregister_sent_at = now
+    sock.send_multipart(MessageFormat.create_register(CLIENT_ID, AGENT_CAPABILITIES, SERVICE_GROUP or None))
+    logger.warning("브로커에 등록 정보가 없어 재등록을 요청했습니다")
+
 def handle_heartbeat(sock, parts):
     """HEARTBEAT 메시지 처리"""
     try:
@@ -96,147 +211,286 @@ def handle_heartbeat(sock, parts):
     except Exception as e:
         logger.error(f"Heartbeat 처리 중 오류: {e}")
 
+def handle_caps(parts):
+    """CAPS 메시지 처리: [CAPS, peer_id, negotiated]"""
+    if len(parts) < 3:
+        logger.warning(f"CAPS 메시지 형식 오류: {parts}")
+        return
+    peer_id = parts[1].decode(errors='replace')
+    peer_capabilities[peer_id] = Capability.parse(parts[2])
+    logger.info(f"피어 기능 갱신: {peer_id} → {sorted(peer_capabilities[peer_id])}")
+
+def _ensure_peer_capabilities(sock, client_id: str):
+    """처음 보는 피어의 협상된 기능을 브로커에 조회 (응답은 CAPS 메시지로 수신)"""
+    if client_id in peer_capabilities:
+        return
+    peer_capabilities[client_id] = frozenset()  # 응답 전까지 v1.0 기능만 가정
+    sock.send_multipart(MessageFormat.create_get_caps(client_id))
+
+def get_peer_capabilities(client_id: str) -> frozenset:
+    """피어와 협상된 기능 목록 (알 수 없는 피어는 빈 목록)"""
+    return peer_capabilities.get(client_id, frozenset())
+
+def _submit_ai_request(sock, parts, request_class: str, process, batch: bool = False):
+    """AI 요청을 스케줄러 큐에 등록 (실제 처리는 워커 스레드에서 수행)"""
+    command = parts[0].decode()
+    if len(parts) < 3:
+        logger.warning("%s 메시지 형식 오류: %s", command, truncate_payload(repr(parts)))
+        return
+
+    # 요청 JSON은 여기서 한 번만 디코딩하고 이후에는 AIRequest를 그대로 전달
+    try:
+        request = AIBatchRequest.from_frames(parts) if batch else AIRequest.from_frames(parts)
+    except ValueError as e:
+        client_id = parts[1].decode(errors='replace')
+        logger.warning(f"{command} 요청 데이터 오류: {client_id} - {e}")
+        response = AIResponse(MessageType.AI_ERROR, client_id, "UNKNOWN", {
+            "status": "error",
+            "error": f"요청 데이터 형식이 올바르지 않습니다: {e}"
+        })
+        sock.send_multipart(response.to_frames())
+        return
+
+    if not bill_processor:
+        logger.error("영수증 처리기가 초기화되지 않았습니다")
+        return
+
+    client_id = request.client_id
+    transaction_id = request.transaction_id
+    _ensure_peer_capabilities(sock, client_id)
+
+    # 재전송된 transaction_id는 LLM을 다시 호출하지 않음
+    state, cached_response = result_cache.acquire(client_id, transaction_id)
+    if state == CacheState.HIT:
+        sock.send_multipart(cached_response.to_frames())
+        logger.info(f"{command} 캐시된 결과로 응답: {client_id}, transaction_id: {transaction_id}")
+        return
+    if state == CacheState.ATTACHED:
+        logger.info(f"{command} 처리 중인 요청에 합류: {client_id}, transaction_id: {transaction_id}")
+        return
+
+    # 배치 요청은 영수증 수만큼 클라이언트 처리량을 소모
+    cost = float(len(request.items)) if batch else 1.0
+    accepted = scheduler.submit(request_class, client_id, lambda: process(request), cost=cost)
+    if not accepted:
+        response_type = AIBatchResponse if batch else AIResponse
+        response = response_type.error(request, "요청이 너무 많습니다. 잠시 후 다시 시도해주세요")
+        for _ in range(1 + len(result_cache.complete(client_id, transaction_id, response, cacheable=False))):
+            sock.send_multipart(response.to_frames())
+        logger.warning(f"{command} 대기열 초과로 거절: {client_id}, transaction_id: {transaction_id}")
+
+def _reply(response):
+    """
+    처리 결과 응답 (워커 스레드)
+
+    성공 응답은 캐시에 저장하고, 같은 transaction_id로 합류한 요청에도 같은 응답을 보냅니다.
+    """
+    waiters = result_cache.complete(response.client_id, response.transaction_id, response,
+                                    cacheable=response.is_success)
+    frames = response.to_frames()
+    AI_RESPONSES.labels(response.command.decode()).inc(1 + len(waiters))
+    for _ in range(1 + len(waiters)):
+        outbox.put(frames)
+    _wake_message_loop()
+
+def _wake_message_loop():
+    """응답 대기열에 넣은 뒤 수신 루프를 깨움 (poll 타임아웃까지 기다리지 않고 바로 전송)"""
+    with _wakeup_lock:
+        if _wakeup_sender is None:
+            return  # 재연결 중: 다음 연결의 수신 루프가 시작하면서 대기열을 비움
+        try:
+            _wakeup_sender.send(b'', zmq.NOBLOCK)
+        except zmq.Again:
+            pass  # 이미 깨우기 신호가 대기 중
+
 def handle_ai_generate(sock, parts):
     """AI_GENERATE 메시지 처리"""
-    try:
-        if len(parts) < 3:
-            logger.warning(f"AI_GENERATE 메시지 형식 오류: {parts}")
-            return
+    _submit_ai_request(sock, parts, RequestClass.GENERATE, process_ai_generate)
 
-        client_id = parts[1].decode()
+def handle_ai_merge(sock, parts):
+    """AI_MERGE 메시지 처리"""
+    _submit_ai_request(sock, parts, RequestClass.MERGE, process_ai_merge)
+
+def handle_ai_batch(sock, parts):
+    """AI_GENERATE_BATCH / AI_MERGE_BATCH 메시지 처리"""
+    request_class = RequestClass.MERGE if parts[0] == MessageType.AI_MERGE_BATCH else RequestClass.GENERATE
+    _submit_ai_request(sock, parts, request_class, process_ai_batch, batch=True)
+
+def process_ai_generate(request: AIRequest):
+    """AI_GENERATE 요청 처리 (워커 스레드)"""
+    client_id = request.client_id
+    transaction_id = request.transaction_id
+    try:
+        # 처리 및 검증 수행
+        result = bill_processor.process_ai_generate(request)
         
-        # transaction_id 추출을 위해 JSON 파싱
-        transaction_id = "UNKNOWN"
-        try:
-            data = json.loads(parts[2].decode('utf-8'))
-            transaction_id = data.get("transaction_id", "UNKNOWN")
-        except:
-            pass
+        # 검증이 성공한 경우에만 AI_OK 응답 전송
+        if result.get("status") == "ok":
+            # protocol.py 문서에 맞는 응답 형식으로 변환
+            response = AIResponse.success(request, {
+                "xml_rule": result["rule_xml"],
+                "version": result["version"]
+            })
+            logger.info(f"AI_GENERATE 응답 전송 완료: {client_id}, transaction_id: {transaction_id}")
+        else:
+            # 검증 실패 시 에러 응답 전송
+            response = AIResponse.error(request, result.get("error", "알 수 없는 오류가 발생했습니다"))
+            logger.error(f"AI_GENERATE 검증 실패: {client_id}, transaction_id: {transaction_id}")
         
-        if not bill_processor:
-            logger.error("영수증 처리기가 초기화되지 않았습니다")
-            return
-            
-        try:
-            # 처리 및 검증 수행
-            result = bill_processor.process_ai_generate(client_id=client_id, raw_data=parts[2])
-            
-            # 검증이 성공한 경우에만 AI_OK 응답 전송
-            if result.get("status") == "ok":
-                # protocol.py 문서에 맞는 응답 형식으로 변환
-                response_data = {
-                    "status": "success",
-                    "data": {
-                        "xml_rule": result["rule_xml"],
-                        "version": result["version"]
-                    },
-                    "version": "1.0"
-                }
-                sock.send_multipart([b'', MessageType.AI_OK, client_id.encode(), transaction_id.encode(), json.dumps(response_data).encode()])
-                logger.info(f"AI_GENERATE 응답 전송 완료: {client_id}, transaction_id: {transaction_id}")
-            else:
-                # 검증 실패 시 에러 응답 전송
-                error_result = {
-                    "status": "error",
-                    "error": result.get("error", "알 수 없는 오류가 발생했습니다")
-                }
-                sock.send_multipart([b'', MessageType.AI_ERROR, client_id.encode(), transaction_id.encode(), json.dumps(error_result).encode()])
-                logger.error(f"AI_GENERATE 검증 실패: {client_id}, transaction_id: {transaction_id}")
-            
-        except ProcessingError as e:
-            error_result = {
-                "status": "error",
-                "error": str(e)
-            }
-            sock.send_multipart([b'', MessageType.AI_ERROR, client_id.encode(), transaction_id.encode(), json.dumps(error_result).encode()])
-            logger.error(f"AI_GENERATE 처리 오류: {client_id}, transaction_id: {transaction_id} - {str(e)}")
-            
+    except ProcessingError as e:
+        response = AIResponse.error(request, str(e))
+        logger.error(f"AI_GENERATE 처리 오류: {client_id}, transaction_id: {transaction_id} - {str(e)}")
     except Exception as e:
         logger.error(f"AI_GENERATE 처리 중 예외 발생: {e}")
-        try:
-            error_result = {
-                "status": "error",
-                "error": f"내부 서버 오류: {str(e)}"
-            }
-            sock.send_multipart([b'', MessageType.AI_ERROR, client_id.encode(), transaction_id.encode(), json.dumps(error_result).encode()])
-        except:
-            logger.error("오류 응답 전송 실패")
+        response = AIResponse.error(request, f"내부 서버 오류: {str(e)}")
+    _reply(response)
 
-def handle_ai_merge(sock, parts):
-    """AI_MERGE 메시지 처리"""
+def process_ai_merge(request: AIRequest):
+    """AI_MERGE 요청 처리 (워커 스레드)"""
+    client_id = request.client_id
+    transaction_id = request.transaction_id
     try:
-        if len(parts) < 3:
-            logger.warning(f"AI_MERGE 메시지 형식 오류: {parts}")
-            return
-
-        client_id = parts[1].decode()
+        result = bill_processor.process_ai_merge(request)
         
-        # transaction_id 추출을 위해 JSON 파싱
-        transaction_id = "UNKNOWN"
-        try:
-            data = json.loads(parts[2].decode('utf-8'))
-            transaction_id = data.get("transaction_id", "UNKNOWN")
-        except:
-            pass
-        
-        if not bill_processor:
-            logger.error("영수증 처리기가 초기화되지 않았습니다")
-            return
-            
-        try:
-            result = bill_processor.process_ai_merge(client_id=client_id, raw_data=parts[2])
-            
-            if result.get("status") == "ok":
-                # protocol.py 문서에 맞는 응답 형식으로 변환
-                response_data = {
-                    "status": "success",
-                    "data": {
-                        "merged_xml": result["merged_rule_xml"],
-                        "changes": result["changes"],
-                        "new_version": result["version"]
-                    },
-                    "version": "1.0"
-                }
-                sock.send_multipart([b'', MessageType.AI_OK, client_id.encode(), transaction_id.encode(), json.dumps(response_data).encode()])
-                logger.info(f"AI_MERGE 응답 전송 완료: {client_id}, transaction_id: {transaction_id}")
-            else:
-                error_result = {
-                    "status": "error",
-                    "error": result.get("error", "알 수 없는 오류가 발생했습니다")
-                }
-                sock.send_multipart([b'', MessageType.AI_ERROR, client_id.encode(), transaction_id.encode(), json.dumps(error_result).encode()])
-                logger.error(f"AI_MERGE 검증 실패: {client_id}, transaction_id: {transaction_id}")
-        except ProcessingError as e:
-            result = {
-                "status": "error",
-                "error": str(e)
-            }
-            sock.send_multipart([b'', MessageType.AI_ERROR, client_id.encode(), transaction_id.encode(), json.dumps(result).encode()])
-            
+        if result.get("status") == "ok":
+            # protocol.py 문서에 맞는 응답 형식으로 변환
+            response = AIResponse.success(request, {
+                "merged_xml": result["merged_rule_xml"],
+                "changes": result["changes"],
+                "new_version": result["version"]
+            })
+            logger.info(f"AI_MERGE 응답 전송 완료: {client_id}, transaction_id: {transaction_id}")
+        else:
+            response = AIResponse.error(request, result.get("error", "알 수 없는 오류가 발생했습니다"))
+            logger.error(f"AI_MERGE 검증 실패: {client_id}, transaction_id: {transaction_id}")
+    except ProcessingError as e:
+        response = AIResponse.error(request, str(e))
     except Exception as e:
         logger.error(f"AI_MERGE 처리 중 예외 발생: {e}")
+        response = AIResponse.error(request, f"내부 서버 오류: {str(e)}")
+    _reply(response)
 
-def message_loop(sock):
-    """메시지 수신 루프"""
+def _batch_item_result(mode: str, item: dict) -> dict:
+    """프로세서의 영수증별 결과를 protocol.py 문서의 배치 결과 형식으로 변환"""
+    if item["status"] != "ok":
+        return {"transaction_id": item["transaction_id"], "status": "error",
+                "layout": item.get("layout"), "error": item.get("error", "알 수 없는 오류가 발생했습니다")}
+    if mode == "MERGE":
+        data = {"new_version": item.get("version")}
+    else:
+        data = {"xml_rule": item["rule_xml"], "version": item["version"]}
+    return {"transaction_id": item["transaction_id"], "status": "success", "layout": item.get("layout"), "data": data}
+
+def process_ai_batch(request: AIBatchRequest):
+    """AI 배치 요청 처리 (워커 스레드)"""
+    client_id = request.client_id
+    transaction_id = request.transaction_id
+    command = request.command.decode()
+    try:
+        result = bill_processor.process_ai_batch(request)
+        if result.get("status") == "ok":
+            results = [_batch_item_result(request.mode, item) for item in result["results"]]
+            data = {}
+            if request.mode == "MERGE":
+                data = {
+                    "merged_xml": result["merged_rule_xml"],
+                    "changes": result["changes"],
+                    "new_version": result["version"]
+                }
+            response = AIBatchResponse.success(request, results, result["layouts"], data)
+            logger.info(f"{command} 응답 전송 완료: {client_id}, transaction_id: {transaction_id}, "
+                        f"성공 {response.summary['succeeded']}/{response.summary['total']}, "
+                        f"레이아웃 {result['layouts']}개")
+        else:
+            response = AIBatchResponse.error(request, result.get("error", "알 수 없는 오류가 발생했습니다"))
+            logger.error(f"{command} 처리 실패: {client_id}, transaction_id: {transaction_id}")
+    except Exception as e:
+        logger.error(f"{command} 처리 중 예외 발생: {e}")
+        response = AIBatchResponse.error(request, f"내부 서버 오류: {str(e)}")
+    _reply(response)
+
+def worker_loop(worker_no: int):
+    """스케줄러에서 작업을 꺼내 처리하는 워커 스레드"""
+    logger.info(f"AI 워커 #{worker_no} 시작")
+    while running:
+        job = scheduler.get(timeout=1.0)
+        if job is None:
+            continue
+        try:
+            job.run()
+        except Exception as e:
+            logger.error(f"AI 워커 #{worker_no} 작업 처리 중 예외 발생: {e}", exc_info=True)
+        finally:
+            scheduler.task_done(job)
+    logger.info(f"AI 워커 #{worker_no} 종료")
+
+def flush_outbox(sock, wakeup=None):
+    """워커 스레드가 만든 응답을 브로커로 전송"""
+    if wakeup is not None:
+        # 쌓인 깨우기 신호를 먼저 비워야 이후에 들어온 응답의 신호를 놓치지 않음
+        while True:
+            try:
+                wakeup.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+    while True:
+        try:
+            frames = outbox.get_nowait()
+        except queue.Empty:
+            return
+        sock.send_multipart(frames)
+
+def dispatch_message(sock, parts):
+    """브로커에서 받은 메시지 처리 (앞의 빈 프레임 제거 후)"""
+    cmd = parts[0]
+    _message_counters.get(cmd, _other_messages).inc()
+    if cmd == MessageType.PING:
+        handle_heartbeat(sock, parts)
+    elif cmd == MessageType.AI_GENERATE:
+        handle_ai_generate(sock, parts)
+    elif cmd == MessageType.AI_MERGE:
+        handle_ai_merge(sock, parts)
+    elif cmd in (MessageType.AI_GENERATE_BATCH, MessageType.AI_MERGE_BATCH):
+        handle_ai_batch(sock, parts)
+    elif cmd == MessageType.CAPS:
+        handle_caps(parts)
+    elif cmd == MessageType.PONG:
+        logger.debug("브로커 하트비트 응답 수신")
+    elif cmd == MessageType.OK:
+        _apply_registration(parts)
+    elif cmd == MessageType.ERROR and len(parts) > 1 and parts[1] == b"Registration required":
+        # 브로커 재시작 또는 만료로 등록이 사라진 경우 다시 등록 (수신 루프는 계속 진행)
+        request_registration(sock)
+    else:
+        logger.info("기타 메시지 수신: %s", truncate_payload(repr(parts)))
+
+def message_loop(sock, wakeup):
+    """메시지 수신 루프 (브로커 소켓과 응답 대기열 wake-up 소켓을 함께 poll)"""
     logger.info("메시지 수신 루프 시작")
+    poller = zmq.Poller()
+    poller.register(sock, zmq.POLLIN)
+    poller.register(wakeup, zmq.POLLIN)
+    next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+    flush_outbox(sock, wakeup)  # 재연결 전에 쌓인 응답
     while running:
         try:
-            if sock.poll(1000, zmq.POLLIN) == 0:
-                continue  # 타임아웃
+            if HEARTBEAT_INTERVAL > 0 and time.monotonic() >= next_heartbeat:
+                # 유휴 상태에서도 브로커가 등록을 만료시키지 않도록 주기적으로 PING
+                sock.send_multipart(MessageFormat.create_heartbeat(CLIENT_ID))
+                next_heartbeat = time.monotonic() + HEARTBEAT_INTERVAL
+            if pending_messages:
+                dispatch_message(sock, pending_messages.popleft())
+                continue
+            events = dict(poller.poll(POLL_TIMEOUT))
+            if wakeup in events:
+                flush_outbox(sock, wakeup)
+            if sock not in events:
+                continue  # 타임아웃 또는 응답 전송만 수행
 
             parts = sock.recv_multipart()
             if parts[0] == b'':
                 parts = parts[1:]
-            
-            cmd = parts[0]
-            if cmd == MessageType.PING:
-                handle_heartbeat(sock, parts)
-            elif cmd == MessageType.AI_GENERATE:
-                handle_ai_generate(sock, parts)
-            elif cmd == MessageType.AI_MERGE:
-                handle_ai_merge(sock, parts)
-            else:
-                logger.info(f"기타 메시지 수신: {parts}")
+            dispatch_message(sock, parts)
 
         except zmq.ZMQError as e:
             if e.errno == zmq.ETERM:
@@ -248,12 +502,54 @@ def message_loop(sock):
 
     logger.info("메시지 수신 루프 종료")
 
+def start_workers():
+    """AI 요청 처리 워커 스레드 시작"""
+    workers = []
+    for worker_no in range(1, max(MAX_WORKERS, 1) + 1):
+        worker = threading.Thread(target=worker_loop, args=(worker_no,), daemon=True)
+        worker.start()
+        workers.append(worker)
+    logger.info(f"AI 워커 {len(workers)}개 시작 (GENERATE:MERGE 가중치 = {GENERATE_WEIGHT}:{MERGE_WEIGHT})")
+    return workers
+
+def get_scheduler_stats():
+    """스케줄러 큐 깊이 / 대기 시간 메트릭 조회"""
+    return {**scheduler.get_stats(), "result_cache": result_cache.get_stats()}
+
+def collect_metrics():
+    """스케줄러 / 결과 캐시 / 응답 대기열 현황을 수집 시점에 Prometheus 메트릭으로 변환"""
+    stats = scheduler.get_stats()
+    classes = stats["classes"]
+    cache = result_cache.get_stats()
+    return [
+        ("aiagent_scheduler_queue_depth", "gauge", "스케줄러 클래스별 대기 요청 수",
+         [("", {"class": name}, c["queue_depth"]) for name, c in classes.items()]),
+        ("aiagent_scheduler_in_progress", "gauge", "워커가 처리 중인 요청 수",
+         [("", {}, stats["in_progress"])]),
+        ("aiagent_scheduler_dispatched_total", "counter", "스케줄러 클래스별 처리 시작 요청 수",
+         [("", {"class": name}, c["dispatched"]) for name, c in classes.items()]),
+        ("aiagent_scheduler_rejected_total", "counter", "클라이언트 대기열 초과로 거절된 요청 수",
+         [("", {"class": name}, c["rejected"]) for name, c in classes.items()]),
+        ("aiagent_scheduler_wait_seconds_max", "gauge", "스케줄러 클래스별 최대 대기 시간",
+         [("", {"class": name}, c["max_wait_seconds"]) for name, c in classes.items()]),
+        ("aiagent_result_cache_lookups_total", "counter", "transaction_id 결과 캐시 조회 수",
+         [("", {"result": "hit"}, cache["hits"]), ("", {"result": "miss"}, cache["misses"]),
+          ("", {"result": "attached"}, cache["attached"])]),
+        ("aiagent_result_cache_size", "gauge", "결과 캐시에 저장된 응답 수",
+         [("", {}, cache["size"])]),
+        ("aiagent_response_queue_depth", "gauge", "브로커로 전송 대기 중인 응답 수",
+         [("", {}, outbox.qsize())]),
+    ]
+
+registry.register_collector(collect_metrics)
+
 def main():
     """메인 실행 함수"""
+    start_workers()
     consecutive_failures = 0
     while running:
         try:
-            with zmq_connection() as sock:
+            with zmq_connection() as (sock, wakeup):
                 logger.info(f"브로커({BROKER_HOST}:{BROKER_PORT})에 연결 시도")
                 sock.connect(f"tcp://{BROKER_HOST}:{BROKER_PORT}")
                 
@@ -262,7 +558,7 @@ def main():
                     continue
 
                 consecutive_failures = 0  # 성공하면 실패 카운트 초기화
-                message_loop(sock)
+                message_loop(sock, wakeup)
                 
         except Exception as e:
             logger.error(f"예상치 못한 오류 발생: {e}", exc_info=True)
@@ -270,6 +566,8 @@ def main():
             wait_time = min(RECONNECT_TIMEOUT * consecutive_failures, 60)
             logger.info(f"{wait_time}초 후 재시도합니다...")
             time.sleep(wait_time)
+    scheduler.close()
+    record_writer.close()
 
 if __name__ == "__main__":
     main()
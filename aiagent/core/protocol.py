@@ -10,12 +10,21 @@ ZeroMQ 메시지 프로토콜 정의 v1.0
 - HEARTBEAT: 3초
 - AI_GENERATE: 30초
 - AI_MERGE: 30초
+- AI_GENERATE_BATCH / AI_MERGE_BATCH: 300초
 
 명령어 목록:
 1. REGISTER
-   - 설명: 클라이언트 등록
-   - 요청: [b'', b"REGISTER", client_id, b"", b""]
-   - 응답: [b'', b"OK"]
+   - 설명: 클라이언트 등록 및 기능(capability) 협상
+   - 요청: [b'', b"REGISTER", client_id, ip, port, capabilities, service_group]
+     capabilities: 지원 기능 목록 (쉼표 구분, 예: b"binary,zstd"), 생략 가능
+     service_group: 서비스 그룹 ID (예: b"AIAGNT"), 생략 가능
+       여러 AI 에이전트 인스턴스가 각자의 client_id(예: AIAGNA, AIAGNB)로 같은 그룹에 등록하면,
+       POS가 그룹 ID로 보낸 AI 요청은 처리 중인 요청이 가장 적은 인스턴스로 전달되고
+       (응답 전에 같은 transaction_id로 재전송한 요청은 처음 받은 인스턴스로 전달),
+       인스턴스의 응답은 그룹 ID에서 온 것으로 POS에 전달됩니다.
+   - 응답: [b'', b"OK", negotiated]
+     negotiated: 브로커와 AI 에이전트가 모두 지원하는 기능 목록
+     (capabilities 프레임을 보내지 않은 기존 클라이언트에는 [b'', b"OK"]만 응답)
    - 에러: [b'', b"AI_ERROR", client_id, json_error_data]
 
 2. HEARTBEAT
@@ -23,6 +32,10 @@ ZeroMQ 메시지 프로토콜 정의 v1.0
    - 요청: [b'', b"PING", client_id]
    - 응답: [b'', b"PONG", client_id]
    - 에러: [b'', b"AI_ERROR", client_id, json_error_data]
+   - BROKER_CLIENT_TTL을 설정한 브로커(기본 0: 사용 안 함)는 마지막 수신 시각(PING 포함 모든 메시지)으로
+     생존 여부를 판단하여, BROKER_CLIENT_TTL 동안 아무 메시지도 보내지 않은 클라이언트를 등록 해제합니다. 이후 요청에는
+     [b'', b"ERROR", b"Registration required"]가 응답되므로 다시 REGISTER 해야 하며,
+     해제된 클라이언트로 보낸 메시지는 [b'', b"ERROR", b"Unknown destination"]이 됩니다.
 
 3. AI_GENERATE
    - 설명: XML 파싱 룰 생성
@@ -73,6 +86,52 @@ ZeroMQ 메시지 프로토콜 정의 v1.0
      }
    - 에러 응답: [b'', b"AI_ERROR", client_id, transaction_id, json_error_data]
 
+5. 프로토콜 v1.1 - 바이너리 영수증 프레임
+   - 설명: receipt_data를 hex 문자열 대신 별도의 바이너리 ZMQ 프레임으로 전송
+           (hex 인코딩으로 두 배가 되던 전송량과 unhexlify 비용 제거)
+   - 요청: [b'', b"AI_GENERATE" | b"AI_MERGE", client_id, json_meta, receipt_bytes]
+   - json_meta 형식: v1.0 json_data에서 receipt_data를 제외하고 아래 필드 추가
+     {
+         "receipt_encoding": "binary" | "zstd",  # zstd: receipt_bytes가 zstd 압축됨
+         "version": "1.1"
+     }
+   - 응답 형식은 v1.0과 동일
+   - receipt_encoding이 없는 요청은 v1.0 (hex JSON)으로 처리
+
+6. AI_GENERATE_BATCH / AI_MERGE_BATCH ("batch" 기능 협상 필요)
+   - 설명: 한 클라이언트의 여러 영수증을 한 번에 처리 (레이아웃별로 LLM 1회 호출)
+   - 요청: [b'', b"AI_GENERATE_BATCH" | b"AI_MERGE_BATCH", client_id, json_meta, receipt_1, ..., receipt_n]
+   - json_meta 형식:
+     {
+         "type": "xml",
+         "mode": "GENERATE" | "MERGE",
+         "client_id": "클라이언트 ID",
+         "transaction_id": "배치 거래 ID",
+         "receipts": [{"transaction_id": "영수증별 거래 ID"}, ...],  # 영수증 프레임 순서와 동일
+         "receipt_encoding": "binary" | "zstd",   # 생략 시 receipts 항목에 receipt_data(hex) 포함
+         "current_xml": "기존 XML (MERGE만)",
+         "current_version": "현재 버전 (MERGE만)",
+         "version": "1.1"
+     }
+   - 성공 응답: [b'', b"AI_BATCH_OK", client_id, transaction_id, json_summary, json_result_1, ..., json_result_n]
+     json_summary = {"status": "success", "total": n, "succeeded": k, "failed": n - k,
+                     "layouts": 레이아웃 수, "data": {...}, "version": "1.1"}
+       (MERGE의 data: {"merged_xml", "changes", "new_version"} - 모든 레이아웃을 반영한 최종 규칙)
+     json_result_i = {"transaction_id": "...", "status": "success" | "error", "layout": "지문",
+                      "data": {...} | "error": "에러 메시지"}
+       (GENERATE의 data: {"xml_rule", "version"}, MERGE의 data: {"new_version"})
+   - 배치 전체 실패: [b'', b"AI_ERROR", client_id, transaction_id, json_error_data]
+
+7. GET_CAPS
+   - 설명: 다른 피어의 협상된 기능 목록 조회
+   - 요청: [b'', b"GET_CAPS", target_id]
+   - 응답: [b'', b"CAPS", target_id, negotiated]
+
+기능(capability) 목록:
+- binary: v1.1 바이너리 영수증 프레임
+- zstd: v1.1 zstd 압축 영수증 프레임
+- batch: AI_GENERATE_BATCH / AI_MERGE_BATCH 명령
+
 공통 에러 응답 형식:
 json_error_data = {
     "status": "error",
@@ -82,11 +141,49 @@ json_error_data = {
 }
 """
 
-from dataclasses import dataclass
-from typing import Dict, Any, List, Optional
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Any, FrozenSet, Iterable, List, Optional, Tuple, Union
 import json
 from datetime import datetime
 
+# zstd 압축 지원 (선택 의존성)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 압축 해제 후 허용하는 최대 영수증 크기 (압축 폭탄 방지)
+MAX_RECEIPT_BYTES = 10 * 1024 * 1024
+
+# 배치 요청 한 건에 담을 수 있는 최대 영수증 수
+MAX_BATCH_RECEIPTS = 100
+
+# JSON 코덱: orjson > msgspec > 표준 json 순서로 사용 가능한 것을 선택
+try:
+    import orjson
+
+    JSON_CODEC = "orjson"
+    json_loads = orjson.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        """객체를 JSON 바이트로 인코딩"""
+        return orjson.dumps(obj)
+except ImportError:
+    try:
+        import msgspec
+
+        JSON_CODEC = "msgspec"
+        json_loads = msgspec.json.decode
+        json_dumps = msgspec.json.encode
+    except ImportError:
+        JSON_CODEC = "json"
+        json_loads = json.loads
+
+        def json_dumps(obj: Any) -> bytes:
+            """객체를 JSON 바이트로 인코딩"""
+            return json.dumps(obj).encode()
+
 @dataclass
 class MessageFormat:
     """메시지 형식 정의"""
@@ -95,9 +192,20 @@ class MessageFormat:
     version: str = "1.0"
     
     @classmethod
-    def create_register(cls, client_id: str) -> List[bytes]:
-        """등록 메시지 생성"""
-        return [b'', b"REGISTER", client_id.encode(), b"", b""]
+    def create_register(cls, client_id: str, capabilities: Optional[Iterable[str]] = None,
+                        service_group: Optional[str] = None) -> List[bytes]:
+        """등록 메시지 생성 (capabilities 지정 시 기능 협상 요청, service_group 지정 시 그룹 가입)"""
+        if capabilities is None and not service_group:
+            return [b'', b"REGISTER", client_id.encode(), b"", b""]
+        frames = [b'', b"REGISTER", client_id.encode(), b"", b"", Capability.encode(capabilities or ())]
+        if service_group:
+            frames.append(service_group.encode())
+        return frames
+
+    @classmethod
+    def create_get_caps(cls, target_id: str) -> List[bytes]:
+        """피어 기능 조회 메시지 생성"""
+        return [b'', b"GET_CAPS", target_id.encode()]
     
     @classmethod
     def create_heartbeat(cls, client_id: str) -> List[bytes]:
@@ -105,16 +213,62 @@ class MessageFormat:
         return [b'', b"PING", client_id.encode()]
 
     @classmethod
-    def create_ai_generate(cls, client_id: str, data: Dict[str, Any]) -> List[bytes]:
-        """AI 생성 메시지 생성"""
+    def create_ai_generate(cls, client_id: str, data: Dict[str, Any],
+                           receipt: Optional[bytes] = None, compress: bool = False) -> List[bytes]:
+        """AI 생성 메시지 생성 (receipt 지정 시 v1.1 바이너리 프레임 사용)"""
+        if receipt is not None:
+            return cls._create_binary_request(b"AI_GENERATE", client_id, data, receipt, compress)
         data["version"] = cls.version
-        return [b'', b"AI_GENERATE", client_id.encode(), json.dumps(data).encode()]
+        return [b'', b"AI_GENERATE", client_id.encode(), json_dumps(data)]
 
     @classmethod
-    def create_ai_merge(cls, client_id: str, data: Dict[str, Any]) -> List[bytes]:
-        """AI 병합 메시지 생성"""
+    def create_ai_merge(cls, client_id: str, data: Dict[str, Any],
+                        receipt: Optional[bytes] = None, compress: bool = False) -> List[bytes]:
+        """AI 병합 메시지 생성 (receipt 지정 시 v1.1 바이너리 프레임 사용)"""
+        if receipt is not None:
+            return cls._create_binary_request(b"AI_MERGE", client_id, data, receipt, compress)
         data["version"] = cls.version
-        return [b'', b"AI_MERGE", client_id.encode(), json.dumps(data).encode()]
+        return [b'', b"AI_MERGE", client_id.encode(), json_dumps(data)]
+
+    @classmethod
+    def create_ai_batch(cls, client_id: str, data: Dict[str, Any],
+                        receipts: List[Tuple[str, bytes]], compress: bool = False) -> List[bytes]:
+        """
+        AI 배치 메시지 생성
+
+        Args:
+            data: 배치 메타데이터 (mode가 MERGE이면 AI_MERGE_BATCH)
+            receipts: (영수증별 transaction_id, 영수증 원본 바이트) 목록
+        """
+        command = b"AI_MERGE_BATCH" if data.get("mode") == "MERGE" else b"AI_GENERATE_BATCH"
+        meta = dict(data)
+        meta["receipts"] = [{"transaction_id": transaction_id} for transaction_id, _ in receipts]
+        frames = [receipt for _, receipt in receipts]
+        if compress:
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            compressor = zstandard.ZstdCompressor()
+            frames = [compressor.compress(frame) for frame in frames]
+            meta["receipt_encoding"] = ReceiptEncoding.ZSTD
+        else:
+            meta["receipt_encoding"] = ReceiptEncoding.BINARY
+        meta["version"] = PROTOCOL_VERSION_BINARY
+        return [b'', command, client_id.encode(), json_dumps(meta), *frames]
+
+    @staticmethod
+    def _create_binary_request(command: bytes, client_id: str, data: Dict[str, Any],
+                               receipt: bytes, compress: bool) -> List[bytes]:
+        """v1.1 요청 생성: JSON 메타데이터 프레임 + 영수증 바이너리 프레임"""
+        meta = {key: value for key, value in data.items() if key != "receipt_data"}
+        if compress:
+            if zstandard is None:
+                raise ValueError("zstd compression requires the zstandard package")
+            receipt = zstandard.ZstdCompressor().compress(receipt)
+            meta["receipt_encoding"] = ReceiptEncoding.ZSTD
+        else:
+            meta["receipt_encoding"] = ReceiptEncoding.BINARY
+        meta["version"] = PROTOCOL_VERSION_BINARY
+        return [b'', command, client_id.encode(), json_dumps(meta), receipt]
 
     @staticmethod
     def create_success_response(client_id: str, data: Dict[str, Any]) -> List[bytes]:
@@ -125,7 +279,7 @@ class MessageFormat:
             "version": "1.0",
             "timestamp": datetime.utcnow().isoformat()
         }
-        return [b'', b"AI_OK", client_id.encode(), json.dumps(response_data).encode()]
+        return [b'', b"AI_OK", client_id.encode(), json_dumps(response_data)]
 
     @staticmethod
     def create_error_response(client_id: str, error_code: str, error_message: str) -> List[bytes]:
@@ -137,22 +291,24 @@ class MessageFormat:
             "version": "1.0",
             "timestamp": datetime.utcnow().isoformat()
         }
-        return [b'', b"AI_ERROR", client_id.encode(), json.dumps(error_data).encode()]
+        return [b'', b"AI_ERROR", client_id.encode(), json_dumps(error_data)]
 
     @staticmethod
     def validate_receipt_data(receipt_data: Any) -> bool:
-        """영수증 데이터 검증 - 문자열 형태만 허용
+        """영수증 데이터 검증 - hex 문자열(v1.0) 또는 바이너리 프레임(v1.1)만 허용
         
         Args:
-            receipt_data: 영수증 데이터 (hex 문자열)
+            receipt_data: 영수증 데이터 (hex 문자열 또는 bytes)
             
         Returns:
             bool: 검증 결과
             
         검증 항목:
-        - receipt_data가 문자열인지 (직접 hex 데이터)
-        - 빈 문자열이 아닌지
+        - receipt_data가 문자열(직접 hex 데이터) 또는 bytes인지
+        - 비어있지 않은지
         """
+        if isinstance(receipt_data, bytes):
+            return len(receipt_data) > 0
         return isinstance(receipt_data, str) and len(receipt_data.strip()) > 0
 
     @staticmethod
@@ -173,20 +329,36 @@ class MessageFormat:
                 and MessageFormat.validate_receipt_data(data["receipt_data"]))
 
     @staticmethod
-    def extract_receipt_raw_data(data: Dict[str, Any]) -> str:
-        """영수증 raw_data 추출 - 문자열 형태만 지원
+    def validate_ai_batch_data(data: Dict[str, Any]) -> bool:
+        """AI 배치 메타데이터 검증 (영수증 항목은 AIBatchRequest.from_frames에서 검증)"""
+        required_fields = ["type", "mode", "client_id", "transaction_id", "receipts", "version"]
+        if not all(field in data for field in required_fields):
+            return False
+        if data["mode"] == "MERGE":
+            return "current_xml" in data and "current_version" in data
+        return data["mode"] == "GENERATE"
+
+    @staticmethod
+    def extract_receipt_raw_data(data: Dict[str, Any]) -> Union[str, bytes]:
+        """영수증 raw_data 추출 - hex 문자열(v1.0) 또는 바이너리(v1.1) 지원
         
         Args:
             data: 전체 요청 데이터
             
         Returns:
-            str: 영수증 raw_data (hex 문자열)
+            str | bytes: 영수증 raw_data (hex 문자열 또는 원본 바이트)
             
         Raises:
             ValueError: receipt_data가 올바른 형식이 아닌 경우
         """
         receipt_data = data.get("receipt_data")
         
+        # v1.1 바이너리 프레임 (AIRequest.from_frames에서 설정)
+        if isinstance(receipt_data, bytes):
+            if not receipt_data:
+                raise ValueError("receipt_data cannot be empty")
+            return receipt_data
+        
         # 문자열 형태만 지원
         if isinstance(receipt_data, str):
             if not receipt_data.strip():
@@ -196,6 +368,253 @@ class MessageFormat:
         # 문자열이 아닌 경우 에러
         raise ValueError("receipt_data must be a hex string")
 
+@dataclass
+class AIRequest:
+    """
+    AI_GENERATE / AI_MERGE 요청 envelope
+
+    수신 프레임의 JSON은 from_frames()에서 한 번만 디코딩하고,
+    이후 스케줄러 → 프로세서 → DB 저장까지 이 객체를 그대로 전달합니다.
+    """
+    command: bytes
+    client_id: str
+    payload: bytes
+    data: Dict[str, Any]
+
+    @classmethod
+    def from_frames(cls, parts: List[bytes]) -> "AIRequest":
+        """
+        [command, client_id, json_data] 프레임에서 요청 생성
+
+        Raises:
+            ValueError: 프레임 수가 부족하거나 JSON 형식이 올바르지 않은 경우
+        """
+        if len(parts) < 3:
+            raise ValueError("frame count must be at least 3")
+        payload = parts[2]
+        try:
+            data = json_loads(payload)
+        except Exception as e:
+            raise ValueError(f"invalid JSON payload: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("JSON payload must be an object")
+
+        # v1.1: 영수증 원본 바이트가 별도 프레임으로 전달됨
+        encoding = data.get("receipt_encoding")
+        if encoding is not None:
+            if len(parts) < 4:
+                raise ValueError("receipt frame is missing")
+            data["receipt_data"] = cls._decode_receipt_frame(parts[3], encoding)
+
+        return cls(command=parts[0], client_id=parts[1].decode(), payload=payload, data=data)
+
+    @staticmethod
+    def _decode_receipt_frame(frame: bytes, encoding: str) -> bytes:
+        """v1.1 영수증 프레임 디코딩 (zstd 압축 해제 포함)"""
+        if encoding == ReceiptEncoding.BINARY:
+            return bytes(frame)
+        if encoding == ReceiptEncoding.ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd receipt frames are not supported (zstandard not installed)")
+            try:
+                return zstandard.ZstdDecompressor().decompress(frame, max_output_size=MAX_RECEIPT_BYTES)
+            except zstandard.ZstdError as e:
+                raise ValueError(f"invalid zstd receipt frame: {e}")
+        raise ValueError(f"unknown receipt_encoding: {encoding}")
+
+    @property
+    def is_binary(self) -> bool:
+        """v1.1 바이너리 프레임 요청 여부"""
+        return isinstance(self.data.get("receipt_data"), bytes)
+
+    @property
+    def transaction_id(self) -> str:
+        transaction_id = self.data.get("transaction_id")
+        return str(transaction_id) if transaction_id else "UNKNOWN"
+
+    @property
+    def mode(self) -> Optional[str]:
+        return self.data.get("mode")
+
+    @cached_property
+    def raw_text(self) -> str:
+        """DB 저장용 원본 요청 문자열 (최초 접근 시 한 번만 디코딩)"""
+        if self.is_binary:
+            # 관리자 페이지 호환을 위해 v1.0과 같은 hex JSON 형태로 저장
+            return json_dumps({**self.data, "receipt_data": self.data["receipt_data"].hex()}).decode('utf-8')
+        return self.payload.decode('utf-8', errors='ignore')
+
+
+@dataclass
+class AIResponse:
+    """
+    AI_OK / AI_ERROR 응답 envelope
+
+    프레임: [b'', command, client_id, transaction_id, json_body]
+    json_body는 최초 to_frames() 호출 시 한 번만 인코딩됩니다.
+    """
+    command: bytes
+    client_id: str
+    transaction_id: str
+    body: Dict[str, Any]
+    _encoded_body: Optional[bytes] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def success(cls, request: AIRequest, data: Dict[str, Any]) -> "AIResponse":
+        """성공 응답 생성"""
+        body = {
+            "status": "success",
+            "data": data,
+            "version": "1.0"
+        }
+        return cls(MessageType.AI_OK, request.client_id, request.transaction_id, body)
+
+    @classmethod
+    def error(cls, request: AIRequest, error: str) -> "AIResponse":
+        """에러 응답 생성"""
+        body = {
+            "status": "error",
+            "error": error
+        }
+        return cls(MessageType.AI_ERROR, request.client_id, request.transaction_id, body)
+
+    @property
+    def is_success(self) -> bool:
+        return self.command == MessageType.AI_OK
+
+    def to_frames(self) -> List[bytes]:
+        if self._encoded_body is None:
+            self._encoded_body = json_dumps(self.body)
+        return [b'', self.command, self.client_id.encode(), self.transaction_id.encode(), self._encoded_body]
+
+
+@dataclass
+class AIBatchRequest:
+    """
+    AI_GENERATE_BATCH / AI_MERGE_BATCH 요청 envelope
+
+    items는 영수증별 {"transaction_id", "receipt_data"} 목록이며,
+    receipt_data는 hex 문자열(JSON 내장) 또는 bytes(바이너리 프레임)입니다.
+    """
+    command: bytes
+    client_id: str
+    data: Dict[str, Any]
+    items: List[Dict[str, Any]]
+
+    @classmethod
+    def from_frames(cls, parts: List[bytes]) -> "AIBatchRequest":
+        """
+        [command, client_id, json_meta, receipt_1, ...] 프레임에서 요청 생성
+
+        Raises:
+            ValueError: 프레임 / JSON / 영수증 항목 형식이 올바르지 않은 경우
+        """
+        if len(parts) < 3:
+            raise ValueError("frame count must be at least 3")
+        try:
+            data = json_loads(parts[2])
+        except Exception as e:
+            raise ValueError(f"invalid JSON payload: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("JSON payload must be an object")
+
+        receipts = data.pop("receipts", None)
+        if not isinstance(receipts, list) or not receipts:
+            raise ValueError("receipts must be a non-empty list")
+        if len(receipts) > MAX_BATCH_RECEIPTS:
+            raise ValueError(f"too many receipts in batch: {len(receipts)} > {MAX_BATCH_RECEIPTS}")
+
+        encoding = data.get("receipt_encoding")
+        frames = parts[3:]
+        if encoding is not None and len(frames) != len(receipts):
+            raise ValueError(f"receipt frame count mismatch: {len(frames)} != {len(receipts)}")
+
+        items = []
+        for index, receipt in enumerate(receipts):
+            if not isinstance(receipt, dict) or not receipt.get("transaction_id"):
+                raise ValueError(f"receipts[{index}] must have a transaction_id")
+            if encoding is not None:
+                receipt_data = AIRequest._decode_receipt_frame(frames[index], encoding)
+            else:
+                receipt_data = receipt.get("receipt_data")
+            if not MessageFormat.validate_receipt_data(receipt_data):
+                raise ValueError(f"receipts[{index}] has no receipt_data")
+            items.append({"transaction_id": str(receipt["transaction_id"]), "receipt_data": receipt_data})
+
+        # 검증용으로 receipts 키는 남겨두되 영수증 본문은 items로만 전달
+        data["receipts"] = len(items)
+        return cls(command=parts[0], client_id=parts[1].decode(), data=data, items=items)
+
+    @property
+    def transaction_id(self) -> str:
+        transaction_id = self.data.get("transaction_id")
+        return str(transaction_id) if transaction_id else "UNKNOWN"
+
+    @property
+    def mode(self) -> Optional[str]:
+        return self.data.get("mode")
+
+    def item_raw_text(self, item: Dict[str, Any]) -> str:
+        """DB 저장용 영수증별 요청 문자열 (단건 요청과 같은 hex JSON 형태)"""
+        receipt_data = item["receipt_data"]
+        if isinstance(receipt_data, bytes):
+            receipt_data = receipt_data.hex()
+        record = {key: value for key, value in self.data.items()
+                  if key not in ("receipts", "receipt_encoding", "current_xml")}
+        record.update(transaction_id=item["transaction_id"],
+                      batch_transaction_id=self.transaction_id,
+                      receipt_data=receipt_data)
+        return json_dumps(record).decode('utf-8')
+
+
+@dataclass
+class AIBatchResponse:
+    """
+    AI_BATCH_OK / AI_ERROR 응답 envelope
+
+    프레임: [b'', AI_BATCH_OK, client_id, transaction_id, json_summary, json_result_1, ...]
+    AIResponse와 같은 인터페이스(is_success, to_frames)를 제공하여 결과 캐시에 그대로 저장됩니다.
+    """
+    command: bytes
+    client_id: str
+    transaction_id: str
+    summary: Dict[str, Any]
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    _frames: Optional[List[bytes]] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def success(cls, request: AIBatchRequest, results: List[Dict[str, Any]],
+                layouts: int, data: Optional[Dict[str, Any]] = None) -> "AIBatchResponse":
+        """영수증별 결과를 담은 배치 응답 생성"""
+        succeeded = sum(1 for result in results if result.get("status") == "success")
+        summary = {
+            "status": "success",
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "layouts": layouts,
+            "data": data or {},
+            "version": PROTOCOL_VERSION_BINARY
+        }
+        return cls(MessageType.AI_BATCH_OK, request.client_id, request.transaction_id, summary, results)
+
+    @classmethod
+    def error(cls, request: AIBatchRequest, error: str) -> "AIBatchResponse":
+        """배치 전체 실패 응답 생성"""
+        return cls(MessageType.AI_ERROR, request.client_id, request.transaction_id,
+                   {"status": "error", "error": error})
+
+    @property
+    def is_success(self) -> bool:
+        return self.command == MessageType.AI_BATCH_OK
+
+    def to_frames(self) -> List[bytes]:
+        if self._frames is None:
+            self._frames = [b'', self.command, self.client_id.encode(), self.transaction_id.encode(),
+                            json_dumps(self.summary), *(json_dumps(result) for result in self.results)]
+        return self._frames
+
+
 # 메시지 타입 상수
 class MessageType:
     """메시지 타입 정의"""
@@ -207,6 +626,55 @@ class MessageType:
     AI_MERGE = b"AI_MERGE"
     AI_OK = b"AI_OK"
     AI_ERROR = b"AI_ERROR"
+    AI_GENERATE_BATCH = b"AI_GENERATE_BATCH"
+    AI_MERGE_BATCH = b"AI_MERGE_BATCH"
+    AI_BATCH_OK = b"AI_BATCH_OK"
+    GET_CAPS = b"GET_CAPS"
+    CAPS = b"CAPS"
+    ERROR = b"ERROR"  # 브로커 에러 응답 (예: Registration required, Unknown destination)
+
+# v1.1 바이너리 프레임 프로토콜 버전
+PROTOCOL_VERSION_BINARY = "1.1"
+
+class ReceiptEncoding:
+    """v1.1 영수증 프레임 인코딩"""
+    BINARY = "binary"
+    ZSTD = "zstd"
+
+class Capability:
+    """REGISTER에서 협상하는 기능 목록"""
+    BINARY = "binary"  # v1.1 바이너리 영수증 프레임
+    ZSTD = "zstd"      # v1.1 zstd 압축 영수증 프레임
+    BATCH = "batch"    # AI_GENERATE_BATCH / AI_MERGE_BATCH
+
+    @staticmethod
+    def supported() -> FrozenSet[str]:
+        """이 설치본에서 처리 가능한 기능"""
+        caps = {Capability.BINARY, Capability.BATCH}
+        if zstandard is not None:
+            caps.add(Capability.ZSTD)
+        return frozenset(caps)
+
+    @staticmethod
+    def parse(frame: Union[bytes, str, None]) -> FrozenSet[str]:
+        """b"binary,zstd" 형식의 기능 목록 파싱 (빈 항목 무시)"""
+        if not frame:
+            return frozenset()
+        if isinstance(frame, bytes):
+            frame = frame.decode(errors='ignore')
+        return frozenset(item.strip().lower() for item in frame.split(",") if item.strip())
+
+    @staticmethod
+    def encode(capabilities: Iterable[str]) -> bytes:
+        return ",".join(sorted(capabilities)).encode()
+
+    @staticmethod
+    def negotiate(offered: Iterable[str], *accepted: Iterable[str]) -> FrozenSet[str]:
+        """요청된 기능 중 모든 쪽이 허용하는 기능만 남김"""
+        result = frozenset(offered)
+        for caps in accepted:
+            result &= frozenset(caps)
+        return result
 
 # 타임아웃 설정 (초)
 class Timeout:
@@ -215,6 +683,7 @@ class Timeout:
     HEARTBEAT = 3
     AI_GENERATE = 30
     AI_MERGE = 30
+    AI_BATCH = 300
 
 # 에러 코드
 class ErrorCode:
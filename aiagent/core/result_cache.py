@@ -0,0 +1,105 @@
+"""
+transaction_id 기반 멱등성 결과 캐시
+
+POS 클라이언트는 타임아웃 후 같은 transaction_id로 요청을 재전송합니다.
+- 이미 완료된 요청: 메모리 LRU에서 바로 응답 (DB 조회는 processor에서 담당)
+- 아직 처리 중인 요청: 진행 중인 계산에 합류하여 같은 결과를 받음
+이렇게 하면 재시도 요청이 LLM을 다시 호출하지 않습니다.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class CacheState:
+    """acquire() 결과 상태"""
+    HIT = "HIT"            # 완료된 결과가 캐시에 있음
+    ATTACHED = "ATTACHED"  # 진행 중인 계산에 합류함
+    OWNER = "OWNER"        # 호출자가 직접 계산해야 함
+
+
+class TransactionResultCache:
+    """완료 결과 LRU + 진행 중(in-flight) 요청 테이블"""
+
+    def __init__(self, max_size: int = 1000, ttl: float = 3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._results: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], List[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.attached = 0
+
+    @staticmethod
+    def is_cacheable(transaction_id: Optional[str]) -> bool:
+        return bool(transaction_id) and transaction_id != "UNKNOWN"
+
+    def acquire(self, client_id: str, transaction_id: str) -> Tuple[str, Optional[Any]]:
+        """
+        요청 처리 전 캐시 확인
+
+        Returns:
+            (CacheState.HIT, 결과) / (CacheState.ATTACHED, None) / (CacheState.OWNER, None)
+        """
+        if not self.is_cacheable(transaction_id):
+            return CacheState.OWNER, None
+
+        key = (client_id, transaction_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None:
+                stored_at, result = entry
+                if self.ttl <= 0 or now - stored_at < self.ttl:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return CacheState.HIT, result
+                del self._results[key]
+
+            waiters = self._in_flight.get(key)
+            if waiters is not None:
+                waiters.append(client_id)
+                self.attached += 1
+                return CacheState.ATTACHED, None
+
+            self._in_flight[key] = []
+            self.misses += 1
+            return CacheState.OWNER, None
+
+    def complete(self, client_id: str, transaction_id: str, result: Any, cacheable: bool = True) -> List[str]:
+        """
+        계산 완료 처리
+
+        Args:
+            result: 응답 (성공 결과만 cacheable=True로 저장, 실패는 재시도 허용)
+
+        Returns:
+            진행 중 계산에 합류했던 요청자 목록 (같은 응답을 받아야 함)
+        """
+        if not self.is_cacheable(transaction_id):
+            return []
+
+        key = (client_id, transaction_id)
+        with self._lock:
+            waiters = self._in_flight.pop(key, [])
+            if cacheable and self.max_size > 0:
+                self._results[key] = (time.monotonic(), result)
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_size:
+                    self._results.popitem(last=False)
+            return waiters
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._results),
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "attached": self.attached,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,306 @@
+"""
+AI 요청 스케줄러
+
+여러 매장(client_id)의 AI_GENERATE / AI_MERGE 요청을 도착 순서가 아닌
+공정성 기준으로 처리하기 위한 스케줄러입니다.
+
+- 요청 클래스(GENERATE/MERGE) 간: 가중치 기반 stride 스케줄링
+  (신규 매장 온보딩인 GENERATE에 더 높은 가중치를 줄 수 있음)
+- 클래스 내부 클라이언트 간: 가중치 기반 라운드 로빈 (weighted fair queue)
+- 클라이언트별 토큰 버킷으로 처리 속도 제한
+- 클래스별 큐 깊이 / 대기 시간 메트릭 제공
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Optional
+
+
+class RequestClass:
+    """스케줄링 요청 클래스"""
+    GENERATE = "GENERATE"
+    MERGE = "MERGE"
+
+
+class TokenBucket:
+    """클라이언트별 처리 속도 제한용 토큰 버킷"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = max(burst, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate <= 0:
+            return
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def try_consume(self, now: float, cost: float = 1.0) -> bool:
+        """토큰이 충분하면 차감하고 True 반환 (rate <= 0 이면 제한 없음)"""
+        if self.rate <= 0:
+            return True
+        self._refill(now)
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def seconds_until(self, now: float, cost: float = 1.0) -> float:
+        """cost 만큼의 토큰이 모일 때까지 남은 시간 (초)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        missing = min(cost, self.capacity) - self.tokens
+        return max(missing / self.rate, 0.0)
+
+
+@dataclass
+class ScheduledJob:
+    """스케줄러에 등록된 작업"""
+    request_class: str
+    client_id: str
+    run: Callable[[], Any]
+    cost: float = 1.0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _ClassMetrics:
+    """요청 클래스별 메트릭"""
+
+    def __init__(self):
+        self.enqueued = 0
+        self.dispatched = 0
+        self.rejected = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.last_wait_time = 0.0
+
+    def record_wait(self, wait: float):
+        self.dispatched += 1
+        self.wait_time_total += wait
+        self.last_wait_time = wait
+        if wait > self.wait_time_max:
+            self.wait_time_max = wait
+
+
+class _ClassQueue:
+    """요청 클래스 하나의 클라이언트별 큐 묶음 (weighted round robin)"""
+
+    def __init__(self, name: str, weight: int):
+        self.name = name
+        self.weight = max(weight, 1)
+        self.pass_value = 0.0
+        self.queues: Dict[str, Deque[ScheduledJob]] = {}
+        self.active: Deque[str] = deque()  # 대기 작업이 있는 클라이언트 순서
+        self.credits: Dict[str, int] = {}
+        self.depth = 0
+        self.metrics = _ClassMetrics()
+
+    def push(self, job: ScheduledJob, client_weight: int):
+        queue = self.queues.get(job.client_id)
+        if queue is None:
+            queue = self.queues[job.client_id] = deque()
+        if not queue:
+            self.active.append(job.client_id)
+            self.credits[job.client_id] = client_weight
+        queue.append(job)
+        self.depth += 1
+        self.metrics.enqueued += 1
+
+    def client_depth(self, client_id: str) -> int:
+        queue = self.queues.get(client_id)
+        return len(queue) if queue else 0
+
+
+class RequestScheduler:
+    """
+    클라이언트별 가중치 공정 큐 + 토큰 버킷 + 클래스 우선순위 스케줄러
+
+    submit()은 수신 스레드에서, get()은 워커 스레드에서 호출됩니다.
+    """
+
+    def __init__(self,
+                 class_weights: Optional[Dict[str, int]] = None,
+                 client_rate: float = 0.0,
+                 client_burst: float = 1.0,
+                 max_client_queue: int = 0,
+                 client_weights: Optional[Dict[str, int]] = None):
+        class_weights = class_weights or {RequestClass.GENERATE: 1, RequestClass.MERGE: 1}
+        self._classes: Dict[str, _ClassQueue] = {
+            name: _ClassQueue(name, weight) for name, weight in class_weights.items()
+        }
+        self._client_rate = client_rate
+        self._client_burst = client_burst
+        self._max_client_queue = max_client_queue
+        self._client_weights = client_weights or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._in_progress = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # === 등록 / 조회 ===
+
+    def submit(self, request_class: str, client_id: str, run: Callable[[], Any], cost: float = 1.0) -> bool:
+        """
+        작업 등록
+
+        Returns:
+            bool: 등록 성공 여부 (클라이언트 큐가 가득 찬 경우 False)
+        """
+        class_queue = self._classes[request_class]
+        with self._cond:
+            if self._max_client_queue > 0 and self._client_queue_depth(client_id) >= self._max_client_queue:
+                class_queue.metrics.rejected += 1
+                return False
+
+            if not class_queue.depth:
+                # 유휴 상태였던 클래스가 밀린 몫을 한꺼번에 가져가지 않도록 pass 값 보정
+                busy = [c.pass_value for c in self._classes.values() if c.depth]
+                if busy:
+                    class_queue.pass_value = max(class_queue.pass_value, min(busy))
+
+            job = ScheduledJob(request_class=request_class, client_id=client_id, run=run, cost=cost)
+            class_queue.push(job, self._client_weights.get(client_id, 1))
+            self._cond.notify()
+            return True
+
+    def get(self, timeout: Optional[float] = None) -> Optional[ScheduledJob]:
+        """
+        다음 처리할 작업을 꺼냅니다. 처리 가능한 작업이 없으면 대기합니다.
+
+        Returns:
+            ScheduledJob 또는 타임아웃/종료 시 None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                job, retry_after = self._select(now)
+                if job is not None:
+                    wait = now - job.enqueued_at
+                    self._classes[job.request_class].metrics.record_wait(wait)
+                    self._in_progress += 1
+                    return job
+
+                wait_for = retry_after
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                self._cond.wait(wait_for)
+            return None
+
+    def task_done(self, job: ScheduledJob):
+        """작업 처리 완료 알림"""
+        with self._cond:
+            self._in_progress = max(self._in_progress - 1, 0)
+
+    def close(self):
+        """대기 중인 워커를 모두 깨우고 스케줄러 종료"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    # === 메트릭 ===
+
+    def get_stats(self) -> Dict[str, Any]:
+        """클래스별 큐 깊이 및 대기 시간 메트릭"""
+        with self._cond:
+            classes = {}
+            for name, class_queue in self._classes.items():
+                m = class_queue.metrics
+                classes[name] = {
+                    "weight": class_queue.weight,
+                    "queue_depth": class_queue.depth,
+                    "waiting_clients": len(class_queue.active),
+                    "enqueued": m.enqueued,
+                    "dispatched": m.dispatched,
+                    "rejected": m.rejected,
+                    "avg_wait_seconds": round(m.wait_time_total / m.dispatched, 4) if m.dispatched else 0.0,
+                    "max_wait_seconds": round(m.wait_time_max, 4),
+                    "last_wait_seconds": round(m.last_wait_time, 4),
+                }
+            return {
+                "in_progress": self._in_progress,
+                "queue_depth": sum(c.depth for c in self._classes.values()),
+                "classes": classes,
+            }
+
+    # === 내부 구현 ===
+
+    def _client_queue_depth(self, client_id: str) -> int:
+        return sum(c.client_depth(client_id) for c in self._classes.values())
+
+    def _bucket(self, client_id: str) -> TokenBucket:
+        bucket = self._buckets.get(client_id)
+        if bucket is None:
+            bucket = self._buckets[client_id] = TokenBucket(self._client_rate, self._client_burst)
+        return bucket
+
+    def _select(self, now: float):
+        """
+        처리할 작업 선택
+
+        pass 값이 가장 작은 클래스부터 시도하고, 클래스 안에서는 활성 클라이언트를
+        라운드 로빈으로 돌며 토큰이 있는 첫 클라이언트의 작업을 꺼냅니다.
+
+        Returns:
+            (job, retry_after): 작업이 없으면 job=None, retry_after는 토큰 보충까지 남은 시간
+        """
+        retry_after = None
+        candidates = sorted((c for c in self._classes.values() if c.depth), key=lambda c: c.pass_value)
+        for class_queue in candidates:
+            for _ in range(len(class_queue.active)):
+                client_id = class_queue.active[0]
+                queue = class_queue.queues[client_id]
+                job = queue[0]
+                bucket = self._bucket(client_id)
+                if not bucket.try_consume(now, job.cost):
+                    # 속도 제한에 걸린 클라이언트는 뒤로 보내고 다음 클라이언트 시도
+                    class_queue.active.rotate(-1)
+                    wait = bucket.seconds_until(now, job.cost)
+                    retry_after = wait if retry_after is None else min(retry_after, wait)
+                    continue
+
+                queue.popleft()
+                class_queue.depth -= 1
+                class_queue.pass_value += 1.0 / class_queue.weight
+
+                credits = class_queue.credits.get(client_id, 1) - 1
+                if not queue:
+                    class_queue.active.popleft()
+                    class_queue.credits.pop(client_id, None)
+                    del class_queue.queues[client_id]
+                elif credits <= 0:
+                    class_queue.active.rotate(-1)
+                    class_queue.credits[client_id] = self._client_weights.get(client_id, 1)
+                else:
+                    class_queue.credits[client_id] = credits
+                return job, None
+        return None, retry_after
+
+
+def parse_weights(spec: str) -> Dict[str, int]:
+    """
+    "ABCDEF:2,GHIJKL:3" 형식의 가중치 설정 문자열 파싱
+
+    잘못된 항목은 무시합니다.
+    """
+    weights = {}
+    for item in (spec or "").split(","):
+        name, sep, value = item.strip().partition(":")
+        if not sep:
+            continue
+        try:
+            weights[name.strip()] = max(int(value), 1)
+        except ValueError:
+            continue
+    return weights
@@ -5,6 +5,7 @@ PostgreSQL 전용 (SQLite 제거됨)
 
 import os
 from sqlalchemy import create_engine, MetaData, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from aiagent.utils.logger import get_logger
@@ -27,6 +28,20 @@ engine = create_engine(
     echo=False  # 프로덕션에서는 False
 )
 
+# 비동기 엔진 (관리자 API용, asyncpg 드라이버)
+# 이벤트 루프에서 쿼리를 기다리는 동안 다른 요청 / 헬스체크를 처리할 수 있음
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL",
+                               DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+ASYNC_POOL_SIZE = int(os.getenv("ASYNC_DB_POOL_SIZE", "10"))
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=ASYNC_POOL_SIZE,
+    max_overflow=0,
+    pool_pre_ping=True,
+    echo=False
+)
+
 # 연결 정보 로깅 (보안을 위해 비밀번호 숨김)
 db_info = DATABASE_URL.split('@')[1] if '@' in DATABASE_URL else 'localhost'
 logger.info(f"PostgreSQL 데이터베이스에 연결: {db_info}")
@@ -34,6 +49,9 @@ logger.info(f"PostgreSQL 데이터베이스에 연결: {db_info}")
 # 세션 메이커
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 비동기 세션 메이커 (commit 후 속성 만료 시 지연 로딩이 일어나지 않도록 expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Base 클래스 (모든 모델의 부모 클래스)
 Base = declarative_base()
 
@@ -51,6 +69,14 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    """
+    비동기 데이터베이스 세션을 제공하는 의존성 함수
+    관리자 API(async def 라우트)에서 사용
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def create_tables():
     """
     모든 테이블 생성
@@ -85,4 +111,22 @@ def check_db_connection():
         return True
     except Exception as e:
         logger.error(f"PostgreSQL 연결 실패: {e}")
-        return False 
\ No newline at end of file
+        return False
+
+async def check_async_db_connection():
+    """
+    PostgreSQL 연결 상태 확인 (비동기, 이벤트 루프를 막지 않음)
+    """
+    try:
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        logger.error(f"PostgreSQL 연결 실패: {e}")
+        return False
+
+async def dispose_async_engine():
+    """
+    비동기 엔진 연결 풀 정리 (애플리케이션 종료 시)
+    """
+    await async_engine.dispose()
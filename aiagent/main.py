@@ -7,7 +7,7 @@ import uvicorn
 from fastapi import FastAPI, HTTPException, Request, status, Depends
 import threading
 from dotenv import load_dotenv
-from aiagent.core.broker import main as broker_main
+from aiagent.core.broker import main as broker_main, get_scheduler_stats
 import logging
 import logging.handlers
 import os
@@ -15,20 +15,23 @@ import sys
 import codecs
 from datetime import datetime
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from pydantic import ValidationError as PydanticValidationError
 
 # 기존 imports
-from aiagent.utils.logger import setup_logger, get_logger
+from aiagent.utils.logger import setup_logger, get_logger, add_handler
+from aiagent.utils.metrics import registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 # .env 파일 로드 (가장 먼저 실행되어야 함)
 load_dotenv()
 
 # PostgreSQL 통합 (SQLite 제거)
-from aiagent.database import create_tables, check_db_connection
+from aiagent.database import create_tables, check_db_connection, check_async_db_connection, dispose_async_engine
+from aiagent.services.record_writer import record_writer
 
 # 관리자 API imports
 from aiagent.api.v1.admin.parsing_errors import router as parsing_errors_router
+from aiagent.api.v1.admin.statistics import router as statistics_router
 from aiagent.api.dependencies import verify_database_connection
 from aiagent.exceptions import BaseAppException, NotFoundError, ValidationError, BusinessLogicError
 from aiagent.api.v1.admin.schemas import ErrorResponse, HealthCheckResponse
@@ -46,7 +49,6 @@ if sys.stdout.encoding != 'utf-8':
 setup_logger()
 
 # 파일 핸들러 추가 (콘솔 핸들러는 setup_logger에서 설정됨)
-root_logger = logging.getLogger()
 file_handler = logging.handlers.TimedRotatingFileHandler(
     filename=os.path.join(log_dir, 'aiagent.log'),
     when='midnight',
@@ -55,15 +57,14 @@ file_handler = logging.handlers.TimedRotatingFileHandler(
     encoding='utf-8',
     errors='strict'
 )
-file_handler.setLevel(logging.DEBUG)
-
 # 파일 핸들러 포맷 설정
 log_formatter = logging.Formatter(
     fmt='%(asctime)s [%(levelname)s] [%(name)s:%(lineno)d] %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 file_handler.setFormatter(log_formatter)
-root_logger.addHandler(file_handler)
+# 디스크 쓰기는 요청 처리 스레드가 아닌 로그 출력 스레드에서 수행 (레벨은 LOG_LEVEL을 따름)
+add_handler(file_handler)
 
 # 메인 로거 가져오기
 logger = get_logger('aiagent.main')
@@ -145,7 +146,7 @@ async def root():
 async def health_check():
     """시스템 헬스체크"""
     try:
-        db_status = "connected" if check_db_connection() else "disconnected"
+        db_status = "connected" if await check_async_db_connection() else "disconnected"
     except:
         db_status = "unknown"
     
@@ -154,6 +155,16 @@ async def health_check():
         database=db_status
     )
 
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """AI 요청 스케줄러 클래스별 큐 깊이 / 대기 시간 조회"""
+    return get_scheduler_stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 메트릭 (메시지 수, 큐 깊이, LLM 지연 시간/토큰, DB 저장 시간, 캐시 적중률)"""
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # === API 라우터 등록 ===
 
 # 관리자 API v1
@@ -163,6 +174,12 @@ app.include_router(
     tags=["관리자 API"]
 )
 
+app.include_router(
+    statistics_router,
+    prefix="/api/v1/admin",
+    tags=["관리자 API"]
+)
+
 # === 애플리케이션 이벤트 ===
 
 @app.on_event("startup")
@@ -191,6 +208,9 @@ async def startup_event():
 async def shutdown_event():
     """애플리케이션 종료 시 실행"""
     logger.info("AI Agent 애플리케이션 종료")
+    # 대기 중인 처리 결과를 DB에 저장
+    record_writer.close()
+    await dispose_async_engine()
 
 # === 미들웨어 ===
 
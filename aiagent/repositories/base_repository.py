@@ -1,12 +1,18 @@
 """
 베이스 Repository 클래스
 모든 Repository의 공통 인터페이스 정의 (SOLID: Interface Segregation Principle)
+
+- BaseRepository: 동기 Session (스크립트 / 배치 작업용)
+- AsyncBaseRepository: AsyncSession (관리자 API용, 쿼리 대기 중 이벤트 루프를 막지 않음)
 """
 
 from abc import ABC, abstractmethod
 from typing import List, Optional, Dict, Any, TypeVar, Generic
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from aiagent.database import Base
+from aiagent.repositories.pagination import PAGINATION_COUNT_LIMIT, build_page, capped_count_select, keyset_select
 
 # 제네릭 타입 정의
 T = TypeVar('T', bound=Base)
@@ -31,8 +37,24 @@ class BaseRepository(ABC, Generic[T]):
         return self.db.query(self.model_class).filter(self.model_class.id == entity_id).first()
     
     def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
-        """모든 엔티티 조회 (페이징)"""
-        return self.db.query(self.model_class).offset(skip).limit(limit).all()
+        """모든 엔티티 조회 (페이징, 최신순 - 정렬 없는 OFFSET은 페이지 간 중복 / 누락이 생길 수 있음)"""
+        return (self.db.query(self.model_class)
+                .order_by(desc(self.model_class.created_at), desc(self.model_class.id))
+                .offset(skip)
+                .limit(limit)
+                .all())
+    
+    def get_page(self, cursor: str = None, limit: int = 100, with_total: bool = False,
+                 conditions: tuple = ()) -> Dict[str, Any]:
+        """
+        created_at, id 역순 keyset 페이지 조회 (페이지 깊이와 관계없이 limit + 1행만 읽음)
+        
+        Returns:
+            data, limit, next_cursor, has_more, total(with_total일 때만, 상한 PAGINATION_COUNT_LIMIT), total_capped
+        """
+        rows = self.db.execute(keyset_select(self.model_class, conditions, cursor, limit)).scalars().all()
+        total = self.db.scalar(capped_count_select(self.model_class, conditions)) if with_total else None
+        return build_page(rows, limit, total, PAGINATION_COUNT_LIMIT)
     
     def update(self, entity_id: int, **kwargs) -> Optional[T]:
         """엔티티 업데이트"""
@@ -65,4 +87,74 @@ class BaseRepository(ABC, Generic[T]):
     @abstractmethod
     def get_by_client_id(self, client_id: str, skip: int = 0, limit: int = 100) -> List[T]:
         """클라이언트 ID로 엔티티 조회 (각 Repository에서 구현)"""
-        pass 
\ No newline at end of file
+        pass
+
+
+class AsyncBaseRepository(ABC, Generic[T]):
+    """비동기 추상 베이스 Repository 클래스 (BaseRepository와 같은 인터페이스, 모든 메서드가 코루틴)"""
+    
+    def __init__(self, db: AsyncSession, model_class: type):
+        self.db = db
+        self.model_class = model_class
+    
+    async def create(self, **kwargs) -> T:
+        """새 엔티티 생성"""
+        instance = self.model_class(**kwargs)
+        self.db.add(instance)
+        await self.db.commit()
+        await self.db.refresh(instance)
+        return instance
+    
+    async def get_by_id(self, entity_id: int) -> Optional[T]:
+        """ID로 엔티티 조회"""
+        return await self.db.get(self.model_class, entity_id)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[T]:
+        """모든 엔티티 조회 (페이징, 최신순)"""
+        result = await self.db.execute(select(self.model_class)
+                                       .order_by(desc(self.model_class.created_at), desc(self.model_class.id))
+                                       .offset(skip)
+                                       .limit(limit))
+        return list(result.scalars().all())
+    
+    async def get_page(self, cursor: str = None, limit: int = 100, with_total: bool = False,
+                       conditions: tuple = ()) -> Dict[str, Any]:
+        """created_at, id 역순 keyset 페이지 조회 (BaseRepository.get_page 참고)"""
+        result = await self.db.execute(keyset_select(self.model_class, conditions, cursor, limit))
+        rows = result.scalars().all()
+        total = await self.db.scalar(capped_count_select(self.model_class, conditions)) if with_total else None
+        return build_page(rows, limit, total, PAGINATION_COUNT_LIMIT)
+    
+    async def update(self, entity_id: int, **kwargs) -> Optional[T]:
+        """엔티티 업데이트"""
+        entity = await self.get_by_id(entity_id)
+        if entity:
+            for key, value in kwargs.items():
+                if hasattr(entity, key):
+                    setattr(entity, key, value)
+            await self.db.commit()
+            await self.db.refresh(entity)
+        return entity
+    
+    async def delete(self, entity_id: int) -> bool:
+        """엔티티 삭제"""
+        entity = await self.get_by_id(entity_id)
+        if entity:
+            await self.db.delete(entity)
+            await self.db.commit()
+            return True
+        return False
+    
+    async def count(self) -> int:
+        """총 엔티티 개수"""
+        return await self.db.scalar(select(func.count()).select_from(self.model_class))
+    
+    async def exists(self, entity_id: int) -> bool:
+        """엔티티 존재 여부 확인"""
+        stmt = select(self.model_class.id).where(self.model_class.id == entity_id).limit(1)
+        return (await self.db.scalar(stmt)) is not None
+    
+    @abstractmethod
+    async def get_by_client_id(self, client_id: str, skip: int = 0, limit: int = 100) -> List[T]:
+        """클라이언트 ID로 엔티티 조회 (각 Repository에서 구현)"""
+        pass
@@ -5,10 +5,56 @@ ML 훈련 데이터 Repository
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_, func
-from aiagent.repositories.base_repository import BaseRepository
+from sqlalchemy import Text, cast, desc, and_, func, select
+from aiagent.repositories.base_repository import BaseRepository, AsyncBaseRepository
 from aiagent.models.ml_training_data import MLTrainingData
+from aiagent.repositories.text_search import build_search_results, contains_condition, search_select
+
+STATISTICS_DAILY_DAYS = 7
+
+# 텍스트 검색 대상 (migrations/004_text_search_indexes.sql의 trigram 인덱스와 같은 식)
+_SEARCH_FIELDS = {
+    "xml_result": MLTrainingData.xml_result,
+    "receipt_data": cast(MLTrainingData.receipt_data, Text),
+}
+
+def _statistics_selects(client_id: str = None, days: int = None):
+    """
+    get_statistics 집계 쿼리 (클라이언트별, 최근 STATISTICS_DAILY_DAYS일 일자별)
+    
+    client_counts는 기존과 같이 기간 조건 없이 전체 건수를 세고, total_count는 기간 조건을
+    COUNT ... FILTER로 같은 GROUP BY에서 함께 계산합니다.
+    """
+    now = datetime.now()
+    conditions = [MLTrainingData.client_id == client_id] if client_id else []
+    in_period = MLTrainingData.created_at >= now - timedelta(days=days) if days else None
+    
+    period_count = func.count().filter(in_period) if in_period is not None else func.count()
+    client_stmt = (select(MLTrainingData.client_id, func.count().label("total"), period_count.label("in_period"))
+                   .where(*conditions)
+                   .group_by(MLTrainingData.client_id))
+    
+    today = now.date()
+    dates = [today - timedelta(days=i) for i in range(STATISTICS_DAILY_DAYS)]
+    day = func.date(MLTrainingData.created_at)
+    daily_conditions = conditions + ([in_period] if in_period is not None else [])
+    daily_stmt = (select(day.label("day"), func.count().label("count"))
+                  .where(*daily_conditions,
+                         MLTrainingData.created_at >= datetime.combine(dates[-1], datetime.min.time()))
+                  .group_by(day))
+    return client_stmt, daily_stmt, dates
+
+def _statistics(client_rows, daily_rows, dates, client_id: str = None) -> Dict[str, Any]:
+    """집계 행 → get_statistics 응답 형식 (건수가 없는 날은 0, 클라이언트 지정 시 client_counts는 비움)"""
+    client_counts = {} if client_id else {row.client_id: row.total for row in client_rows}
+    counts_by_day = {str(row.day): row.count for row in daily_rows}
+    return {
+        "total_count": sum(row.in_period for row in client_rows),
+        "client_counts": client_counts,
+        "daily_counts": {date.isoformat(): counts_by_day.get(date.isoformat(), 0) for date in dates}
+    }
 
 class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
     """ML 훈련 데이터 Repository 클래스"""
@@ -20,11 +66,17 @@ class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
         """클라이언트 ID로 ML 훈련 데이터 조회"""
         return (self.db.query(MLTrainingData)
                 .filter(MLTrainingData.client_id == client_id)
-                .order_by(desc(MLTrainingData.created_at))
+                .order_by(desc(MLTrainingData.created_at), desc(MLTrainingData.id))
                 .offset(skip)
                 .limit(limit)
                 .all())
     
+    def get_page_by_client_id(self, client_id: str = None, cursor: str = None, limit: int = 100,
+                              with_total: bool = False) -> Dict[str, Any]:
+        """클라이언트별(생략 시 전체) ML 훈련 데이터 keyset 페이지 조회"""
+        conditions = (MLTrainingData.client_id == client_id,) if client_id else ()
+        return self.get_page(cursor=cursor, limit=limit, with_total=with_total, conditions=conditions)
+    
     def get_by_parsing_error_id(self, parsing_error_id: int) -> List[MLTrainingData]:
         """파싱 에러 ID로 연관된 훈련 데이터 조회"""
         return (self.db.query(MLTrainingData)
@@ -32,6 +84,10 @@ class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
                 .order_by(desc(MLTrainingData.created_at))
                 .all())
     
+    def count_by_client_id(self, client_id: str) -> int:
+        """클라이언트별 훈련 데이터 개수"""
+        return self.db.query(MLTrainingData).filter(MLTrainingData.client_id == client_id).count()
+    
     def create_from_error(self, client_id: str, receipt_data: dict, xml_result: str, 
                          parsing_error_id: int) -> MLTrainingData:
         """파싱 에러에서 ML 훈련 데이터 생성"""
@@ -59,39 +115,9 @@ class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
         return query.order_by(desc(MLTrainingData.created_at)).all()
     
     def get_statistics(self, client_id: str = None, days: int = None) -> Dict[str, Any]:
-        """훈련 데이터 통계 조회"""
-        query = self.db.query(MLTrainingData)
-        
-        if client_id:
-            query = query.filter(MLTrainingData.client_id == client_id)
-        
-        if days:
-            since = datetime.now() - timedelta(days=days)
-            query = query.filter(MLTrainingData.created_at >= since)
-        
-        # 기본 통계
-        total_count = query.count()
-        
-        # 클라이언트별 카운트
-        client_counts = {}
-        if not client_id:  # 전체 조회인 경우
-            client_results = (self.db.query(MLTrainingData.client_id, func.count(MLTrainingData.id))
-                             .group_by(MLTrainingData.client_id)
-                             .all())
-            client_counts = {client: count for client, count in client_results}
-        
-        # 날짜별 카운트 (최근 7일)
-        daily_counts = {}
-        for i in range(7):
-            date = (datetime.now() - timedelta(days=i)).date()
-            daily_count = (query.filter(func.date(MLTrainingData.created_at) == date).count())
-            daily_counts[date.isoformat()] = daily_count
-        
-        return {
-            "total_count": total_count,
-            "client_counts": client_counts,
-            "daily_counts": daily_counts
-        }
+        """훈련 데이터 통계 조회 (클라이언트별 GROUP BY, 일자별 GROUP BY 두 번의 쿼리로 계산)"""
+        client_stmt, daily_stmt, dates = _statistics_selects(client_id, days)
+        return _statistics(self.db.execute(client_stmt).all(), self.db.execute(daily_stmt).all(), dates, client_id)
     
     def export_training_data(self, client_id: str = None, limit: int = 1000) -> List[Dict[str, Any]]:
         """훈련 데이터 내보내기 (ML 학습용)"""
@@ -141,20 +167,31 @@ class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
     
     def search_by_content(self, search_term: str, client_id: str = None, 
                          skip: int = 0, limit: int = 100) -> List[MLTrainingData]:
-        """XML 결과 내용으로 검색"""
+        """XML 결과 내용으로 검색 (대소문자 무시, xml_result trigram 인덱스 사용)"""
         query = self.db.query(MLTrainingData)
         
         if client_id:
             query = query.filter(MLTrainingData.client_id == client_id)
         
-        # PostgreSQL의 경우 텍스트 검색 사용
-        query = query.filter(MLTrainingData.xml_result.contains(search_term))
+        query = query.filter(contains_condition(MLTrainingData.xml_result, search_term))
         
-        return (query.order_by(desc(MLTrainingData.created_at))
+        return (query.order_by(desc(MLTrainingData.created_at), desc(MLTrainingData.id))
                 .offset(skip)
                 .limit(limit)
                 .all())
     
+    def search_ranked(self, search_term: str, client_id: str = None,
+                      skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        XML 결과 / 영수증 내용 부분 문자열 검색 (trigram 인덱스, 유사도 순)
+        
+        Returns:
+            [{"item": MLTrainingData, "rank": float, "highlights": {"xml_result" | "receipt_data": 스니펫}}]
+        """
+        conditions = [MLTrainingData.client_id == client_id] if client_id else []
+        stmt = search_select(MLTrainingData, _SEARCH_FIELDS, search_term, conditions, skip, limit)
+        return build_search_results(self.db.execute(stmt).all(), list(_SEARCH_FIELDS), search_term)
+    
     def get_data_by_amount_range(self, min_amount: float = None, max_amount: float = None,
                                 client_id: str = None) -> List[MLTrainingData]:
         """금액 범위로 훈련 데이터 조회"""
@@ -171,4 +208,81 @@ class MLTrainingDataRepository(BaseRepository[MLTrainingData]):
                 
             filtered_data.append(data)
         
-        return filtered_data 
\ No newline at end of file
+        return filtered_data
+
+
+class AsyncMLTrainingDataRepository(AsyncBaseRepository[MLTrainingData]):
+    """ML 훈련 데이터 Repository 클래스 (비동기, 관리자 API용)"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, MLTrainingData)
+    
+    async def _all(self, stmt) -> List[MLTrainingData]:
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def get_by_client_id(self, client_id: str, skip: int = 0, limit: int = 100) -> List[MLTrainingData]:
+        """클라이언트 ID로 ML 훈련 데이터 조회"""
+        return await self._all(select(MLTrainingData)
+                               .where(MLTrainingData.client_id == client_id)
+                               .order_by(desc(MLTrainingData.created_at), desc(MLTrainingData.id))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def get_page_by_client_id(self, client_id: str = None, cursor: str = None, limit: int = 100,
+                                    with_total: bool = False) -> Dict[str, Any]:
+        """클라이언트별(생략 시 전체) ML 훈련 데이터 keyset 페이지 조회"""
+        conditions = (MLTrainingData.client_id == client_id,) if client_id else ()
+        return await self.get_page(cursor=cursor, limit=limit, with_total=with_total, conditions=conditions)
+    
+    async def get_by_parsing_error_id(self, parsing_error_id: int) -> List[MLTrainingData]:
+        """파싱 에러 ID로 연관된 훈련 데이터 조회"""
+        return await self._all(select(MLTrainingData)
+                               .where(MLTrainingData.parsing_error_id == parsing_error_id)
+                               .order_by(desc(MLTrainingData.created_at)))
+    
+    async def create_from_error(self, client_id: str, receipt_data: dict, xml_result: str,
+                                parsing_error_id: int) -> MLTrainingData:
+        """파싱 에러에서 ML 훈련 데이터 생성"""
+        training_data = MLTrainingData.create(
+            client_id=client_id,
+            receipt_data=receipt_data,
+            xml_result=xml_result,
+            parsing_error_id=parsing_error_id
+        )
+        
+        self.db.add(training_data)
+        await self.db.commit()
+        await self.db.refresh(training_data)
+        
+        return training_data
+    
+    async def count_by_client_id(self, client_id: str) -> int:
+        """클라이언트별 훈련 데이터 개수"""
+        return await self.db.scalar(select(func.count()).select_from(MLTrainingData)
+                                    .where(MLTrainingData.client_id == client_id))
+    
+    async def get_statistics(self, client_id: str = None, days: int = None) -> Dict[str, Any]:
+        """훈련 데이터 통계 조회 (클라이언트별, 일자별 GROUP BY 두 번의 쿼리로 계산)"""
+        client_stmt, daily_stmt, dates = _statistics_selects(client_id, days)
+        client_rows = (await self.db.execute(client_stmt)).all()
+        daily_rows = (await self.db.execute(daily_stmt)).all()
+        return _statistics(client_rows, daily_rows, dates, client_id)
+    
+    async def search_by_content(self, search_term: str, client_id: str = None,
+                                skip: int = 0, limit: int = 100) -> List[MLTrainingData]:
+        """XML 결과 내용으로 검색 (대소문자 무시, xml_result trigram 인덱스 사용)"""
+        stmt = select(MLTrainingData).where(contains_condition(MLTrainingData.xml_result, search_term))
+        if client_id:
+            stmt = stmt.where(MLTrainingData.client_id == client_id)
+        
+        return await self._all(stmt.order_by(desc(MLTrainingData.created_at), desc(MLTrainingData.id))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def search_ranked(self, search_term: str, client_id: str = None,
+                            skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """XML 결과 / 영수증 내용 부분 문자열 검색 (trigram 인덱스, 유사도 순)"""
+        conditions = [MLTrainingData.client_id == client_id] if client_id else []
+        stmt = search_select(MLTrainingData, _SEARCH_FIELDS, search_term, conditions, skip, limit)
+        return build_search_results((await self.db.execute(stmt)).all(), list(_SEARCH_FIELDS), search_term)
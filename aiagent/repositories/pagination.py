@@ -0,0 +1,84 @@
+"""
+Keyset(커서) 페이지네이션 공통 함수
+created_at, id 역순 목록을 OFFSET 없이 조회합니다 (동기 / 비동기 Repository 공통)
+
+- 다음 페이지는 이전 페이지 마지막 행의 (created_at, id)보다 작은 행부터 읽으므로,
+  (created_at DESC, id DESC) 인덱스로 몇 번째 페이지든 limit + 1행만 읽습니다.
+- 커서는 마지막 행의 (created_at, id)를 담은 불투명 토큰(base64url)입니다.
+- 총 개수는 선택 사항이며, 최대 PAGINATION_COUNT_LIMIT행까지만 세어 비용을 제한합니다
+  (초과하면 total_capped=True, total=상한값).
+
+created_at이 NULL인 행은 커서 비교에서 제외되므로 created_at은 DEFAULT로 항상 채워져 있어야 합니다.
+"""
+
+import base64
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from sqlalchemy import desc, func, select, tuple_
+
+from aiagent.exceptions import ValidationError
+
+PAGINATION_COUNT_LIMIT = int(os.getenv("PAGINATION_COUNT_LIMIT", "10000"))
+
+
+def encode_cursor(created_at: datetime, entity_id: int) -> str:
+    """(created_at, id) → 커서 토큰"""
+    raw = json.dumps([created_at.isoformat(), entity_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """커서 토큰 → (created_at, id), 잘못된 토큰은 ValidationError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, entity_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(entity_id)
+    except (ValueError, TypeError) as e:
+        raise ValidationError(f"유효하지 않은 커서입니다: {cursor}") from e
+
+
+def keyset_select(model, conditions: Sequence = (), cursor: Optional[str] = None, limit: int = 100):
+    """커서 이후 limit + 1행 조회문 (한 행을 더 읽어 다음 페이지 존재 여부 확인)"""
+    stmt = select(model).where(*conditions)
+    if cursor:
+        created_at, entity_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(model.created_at, model.id) < tuple_(created_at, entity_id))
+    return stmt.order_by(desc(model.created_at), desc(model.id)).limit(limit + 1)
+
+
+def capped_count_select(model, conditions: Sequence = (), cap: int = PAGINATION_COUNT_LIMIT):
+    """최대 cap + 1행까지만 세는 COUNT 문"""
+    matched = select(model.id).where(*conditions).limit(cap + 1).subquery()
+    return select(func.count()).select_from(matched)
+
+
+def build_page(rows: Sequence[Any], limit: int, total: Optional[int] = None,
+               cap: int = PAGINATION_COUNT_LIMIT) -> Dict[str, Any]:
+    """keyset_select 결과(limit + 1행)를 페이지 응답 dict로 변환"""
+    has_more = len(rows) > limit
+    rows = list(rows[:limit])
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id) if has_more and rows else None
+    return {
+        "data": rows,
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "total": min(total, cap) if total is not None else None,
+        "total_capped": total is not None and total > cap,
+    }
+
+
+def with_offset_cursor(result: Dict[str, Any], skip: int) -> Dict[str, Any]:
+    """
+    기존 OFFSET 조회 결과(data, total, page, limit)에 keyset 페이지 필드 추가
+
+    data가 created_at, id 역순으로 정렬되어 있어야 하며, next_cursor로 다음 페이지부터는 keyset 방식으로 이어서 조회할 수 있습니다.
+    """
+    rows = result["data"]
+    result["has_more"] = skip + len(rows) < result["total"]
+    result["next_cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id) if result["has_more"] and rows else None
+    result["total_capped"] = False
+    return result
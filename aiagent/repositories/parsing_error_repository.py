@@ -4,10 +4,37 @@
 """
 
 from typing import List, Optional, Dict, Any
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from aiagent.repositories.base_repository import BaseRepository
+from sqlalchemy import Text, cast, desc, and_, func, select, update
+from aiagent.repositories.base_repository import BaseRepository, AsyncBaseRepository
 from aiagent.models.parsing_error import ParsingError
+from aiagent.repositories.text_search import build_search_results, search_select
+
+ERROR_STATUSES = ("ERROR", "FIXED", "TESTING", "COMPLETED")
+
+def _search_conditions(client_id: str = None, status: str = None) -> tuple:
+    conditions = []
+    if client_id:
+        conditions.append(ParsingError.client_id == client_id)
+    if status:
+        conditions.append(ParsingError.status == status)
+    return tuple(conditions)
+
+def _statistics_select(client_id: str = None):
+    """상태별 개수(COUNT ... FILTER)와 전체 개수를 한 행으로 반환하는 집계 쿼리"""
+    stmt = select(*(func.count().filter(ParsingError.status == status).label(status) for status in ERROR_STATUSES),
+                  func.count().label("TOTAL"))
+    if client_id:
+        stmt = stmt.where(ParsingError.client_id == client_id)
+    return stmt
+
+# 텍스트 검색 대상 (migrations/004_text_search_indexes.sql의 trigram 인덱스와 같은 식)
+_SEARCH_FIELDS = {
+    "error_message": ParsingError.error_message,
+    "receipt_data": cast(ParsingError.receipt_data, Text),
+}
 
 class ParsingErrorRepository(BaseRepository[ParsingError]):
     """파싱 에러 Repository 클래스"""
@@ -57,7 +84,7 @@ class ParsingErrorRepository(BaseRepository[ParsingError]):
         total = query.count()
         
         # 페이징 적용 및 정렬
-        errors = (query.order_by(desc(ParsingError.created_at))
+        errors = (query.order_by(desc(ParsingError.created_at), desc(ParsingError.id))
                   .offset(skip)
                   .limit(limit)
                   .all())
@@ -69,6 +96,12 @@ class ParsingErrorRepository(BaseRepository[ParsingError]):
             "limit": limit
         }
     
+    def search_page(self, client_id: str = None, status: str = None, cursor: str = None,
+                    limit: int = 100, with_total: bool = False) -> Dict[str, Any]:
+        """필터를 적용한 keyset 페이지 검색 (search_with_filters의 OFFSET / COUNT(*) 대체)"""
+        return self.get_page(cursor=cursor, limit=limit, with_total=with_total,
+                             conditions=_search_conditions(client_id, status))
+    
     def update_status(self, error_id: int, new_status: str) -> Optional[ParsingError]:
         """파싱 에러 상태 업데이트"""
         error = self.get_by_id(error_id)
@@ -79,19 +112,20 @@ class ParsingErrorRepository(BaseRepository[ParsingError]):
         return error
     
     def get_error_statistics(self, client_id: str = None) -> Dict[str, int]:
-        """에러 통계 조회"""
-        query = self.db.query(ParsingError)
-        
-        if client_id:
-            query = query.filter(ParsingError.client_id == client_id)
-        
-        # 상태별 카운트
-        stats = {}
-        for status in ["ERROR", "FIXED", "TESTING", "COMPLETED"]:
-            stats[status] = query.filter(ParsingError.status == status).count()
+        """에러 통계 조회 (상태별 / 전체 개수를 한 번의 쿼리로 계산)"""
+        return dict(self.db.execute(_statistics_select(client_id)).one()._mapping)
+    
+    def search_text(self, search_term: str, client_id: str = None, status: str = None,
+                    skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        에러 메시지 / 영수증 내용 부분 문자열 검색 (trigram 인덱스, 유사도 순)
         
-        stats["TOTAL"] = query.count()
-        return stats
+        Returns:
+            [{"item": ParsingError, "rank": float, "highlights": {"error_message" | "receipt_data": 스니펫}}]
+        """
+        stmt = search_select(ParsingError, _SEARCH_FIELDS, search_term,
+                             _search_conditions(client_id, status), skip, limit)
+        return build_search_results(self.db.execute(stmt).all(), list(_SEARCH_FIELDS), search_term)
     
     def get_recent_errors(self, hours: int = 24, limit: int = 10) -> List[ParsingError]:
         """최근 에러 조회"""
@@ -114,4 +148,106 @@ class ParsingErrorRepository(BaseRepository[ParsingError]):
                         .filter(ParsingError.id.in_(error_ids))
                         .update({ParsingError.status: new_status}, synchronize_session=False))
         self.db.commit()
-        return updated_count 
\ No newline at end of file
+        return updated_count
+
+
+class AsyncParsingErrorRepository(AsyncBaseRepository[ParsingError]):
+    """파싱 에러 Repository 클래스 (비동기, 관리자 API용)"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, ParsingError)
+    
+    async def _all(self, stmt) -> List[ParsingError]:
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def get_by_client_id(self, client_id: str, skip: int = 0, limit: int = 100) -> List[ParsingError]:
+        """클라이언트 ID로 파싱 에러 조회"""
+        return await self._all(select(ParsingError)
+                               .where(ParsingError.client_id == client_id)
+                               .order_by(desc(ParsingError.created_at))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def get_by_status(self, status: str, skip: int = 0, limit: int = 100) -> List[ParsingError]:
+        """상태별 파싱 에러 조회"""
+        return await self._all(select(ParsingError)
+                               .where(ParsingError.status == status)
+                               .order_by(desc(ParsingError.created_at))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def get_by_client_and_status(self, client_id: str, status: str, skip: int = 0, limit: int = 100) -> List[ParsingError]:
+        """클라이언트 ID와 상태로 파싱 에러 조회"""
+        return await self._all(select(ParsingError)
+                               .where(ParsingError.client_id == client_id, ParsingError.status == status)
+                               .order_by(desc(ParsingError.created_at))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def search_with_filters(self, client_id: str = None, status: str = None,
+                                  skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """필터를 적용한 검색"""
+        conditions = _search_conditions(client_id, status)
+        
+        total = await self.db.scalar(select(func.count()).select_from(ParsingError).where(*conditions))
+        errors = await self._all(select(ParsingError)
+                                 .where(*conditions)
+                                 .order_by(desc(ParsingError.created_at), desc(ParsingError.id))
+                                 .offset(skip)
+                                 .limit(limit))
+        
+        return {
+            "data": errors,
+            "total": total,
+            "page": (skip // limit) + 1 if limit > 0 else 1,
+            "limit": limit
+        }
+    
+    async def search_page(self, client_id: str = None, status: str = None, cursor: str = None,
+                          limit: int = 100, with_total: bool = False) -> Dict[str, Any]:
+        """필터를 적용한 keyset 페이지 검색"""
+        return await self.get_page(cursor=cursor, limit=limit, with_total=with_total,
+                                   conditions=_search_conditions(client_id, status))
+    
+    async def update_status(self, error_id: int, new_status: str) -> Optional[ParsingError]:
+        """파싱 에러 상태 업데이트"""
+        error = await self.get_by_id(error_id)
+        if error:
+            error.update_status(new_status)
+            await self.db.commit()
+            await self.db.refresh(error)
+        return error
+    
+    async def get_error_statistics(self, client_id: str = None) -> Dict[str, int]:
+        """에러 통계 조회 (상태별 / 전체 개수를 한 번의 쿼리로 계산)"""
+        return dict((await self.db.execute(_statistics_select(client_id))).one()._mapping)
+    
+    async def search_text(self, search_term: str, client_id: str = None, status: str = None,
+                          skip: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """에러 메시지 / 영수증 내용 부분 문자열 검색 (trigram 인덱스, 유사도 순)"""
+        stmt = search_select(ParsingError, _SEARCH_FIELDS, search_term,
+                             _search_conditions(client_id, status), skip, limit)
+        return build_search_results((await self.db.execute(stmt)).all(), list(_SEARCH_FIELDS), search_term)
+    
+    async def get_recent_errors(self, hours: int = 24, limit: int = 10) -> List[ParsingError]:
+        """최근 에러 조회"""
+        since = datetime.now() - timedelta(hours=hours)
+        return await self._all(select(ParsingError)
+                               .where(ParsingError.created_at >= since)
+                               .order_by(desc(ParsingError.created_at))
+                               .limit(limit))
+    
+    async def count_by_client_id(self, client_id: str) -> int:
+        """클라이언트별 에러 개수"""
+        return await self.db.scalar(select(func.count()).select_from(ParsingError)
+                                    .where(ParsingError.client_id == client_id))
+    
+    async def bulk_update_status(self, error_ids: List[int], new_status: str) -> int:
+        """여러 에러의 상태를 일괄 업데이트"""
+        result = await self.db.execute(update(ParsingError)
+                                       .where(ParsingError.id.in_(error_ids))
+                                       .values(status=new_status)
+                                       .execution_options(synchronize_session=False))
+        await self.db.commit()
+        return result.rowcount
@@ -4,11 +4,44 @@
 """
 
 from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, and_
-from aiagent.repositories.base_repository import BaseRepository
+from sqlalchemy import desc, and_, func, select, update
+from aiagent.repositories.base_repository import BaseRepository, AsyncBaseRepository
 from aiagent.models.parsing_rule import ParsingRule
 
+def _search_conditions(client_id: str = None, rule_type: str = None, is_active: bool = None) -> tuple:
+    conditions = []
+    if client_id:
+        conditions.append(ParsingRule.client_id == client_id)
+    if rule_type:
+        conditions.append(ParsingRule.rule_type == rule_type)
+    if is_active is not None:
+        conditions.append(ParsingRule.is_active == is_active)
+    return tuple(conditions)
+
+def _rule_statistics_select(client_id: str = None):
+    """룰 타입별 전체 / 활성 개수 집계 쿼리"""
+    stmt = (select(ParsingRule.rule_type,
+                   func.count().label("total"),
+                   func.count().filter(ParsingRule.is_active == True).label("active"))
+            .group_by(ParsingRule.rule_type))
+    if client_id:
+        stmt = stmt.where(ParsingRule.client_id == client_id)
+    return stmt
+
+def _rule_statistics(rows) -> Dict[str, Any]:
+    """타입별 집계 행 → get_rule_statistics 응답 형식"""
+    type_counts = {row.rule_type: {"total": row.total, "active": row.active} for row in rows}
+    total_rules = sum(counts["total"] for counts in type_counts.values())
+    active_rules = sum(counts["active"] for counts in type_counts.values())
+    return {
+        "total_rules": total_rules,
+        "active_rules": active_rules,
+        "inactive_rules": total_rules - active_rules,
+        "type_counts": type_counts
+    }
+
 class ParsingRuleRepository(BaseRepository[ParsingRule]):
     """파싱 룰 Repository 클래스"""
     
@@ -110,7 +143,7 @@ class ParsingRuleRepository(BaseRepository[ParsingRule]):
         total = query.count()
         
         # 페이징 적용 및 정렬
-        rules = (query.order_by(desc(ParsingRule.created_at))
+        rules = (query.order_by(desc(ParsingRule.created_at), desc(ParsingRule.id))
                  .offset(skip)
                  .limit(limit)
                  .all())
@@ -122,33 +155,15 @@ class ParsingRuleRepository(BaseRepository[ParsingRule]):
             "limit": limit
         }
     
+    def search_rules_page(self, client_id: str = None, rule_type: str = None, is_active: bool = None,
+                          cursor: str = None, limit: int = 100, with_total: bool = False) -> Dict[str, Any]:
+        """파싱 룰 keyset 페이지 검색 (search_rules의 OFFSET / COUNT(*) 대체)"""
+        return self.get_page(cursor=cursor, limit=limit, with_total=with_total,
+                             conditions=_search_conditions(client_id, rule_type, is_active))
+    
     def get_rule_statistics(self, client_id: str = None) -> Dict[str, Any]:
-        """룰 통계 조회"""
-        query = self.db.query(ParsingRule)
-        
-        if client_id:
-            query = query.filter(ParsingRule.client_id == client_id)
-        
-        total_rules = query.count()
-        active_rules = query.filter(ParsingRule.is_active == True).count()
-        inactive_rules = total_rules - active_rules
-        
-        # 타입별 카운트
-        type_counts = {}
-        for rule in query.all():
-            rule_type = rule.rule_type
-            if rule_type not in type_counts:
-                type_counts[rule_type] = {"total": 0, "active": 0}
-            type_counts[rule_type]["total"] += 1
-            if rule.is_active:
-                type_counts[rule_type]["active"] += 1
-        
-        return {
-            "total_rules": total_rules,
-            "active_rules": active_rules,
-            "inactive_rules": inactive_rules,
-            "type_counts": type_counts
-        }
+        """룰 통계 조회 (룰 행을 읽지 않고 타입별 GROUP BY 한 번으로 계산)"""
+        return _rule_statistics(self.db.execute(_rule_statistics_select(client_id)).all())
     
     def clone_rule(self, rule_id: int, new_client_id: str = None) -> Optional[ParsingRule]:
         """룰 복제"""
@@ -168,4 +183,105 @@ class ParsingRuleRepository(BaseRepository[ParsingRule]):
         self.db.commit()
         self.db.refresh(new_rule)
         
-        return new_rule 
\ No newline at end of file
+        return new_rule
+
+
+class AsyncParsingRuleRepository(AsyncBaseRepository[ParsingRule]):
+    """파싱 룰 Repository 클래스 (비동기, 관리자 API용)"""
+    
+    def __init__(self, db: AsyncSession):
+        super().__init__(db, ParsingRule)
+    
+    async def _all(self, stmt) -> List[ParsingRule]:
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+    
+    async def get_by_client_id(self, client_id: str, skip: int = 0, limit: int = 100) -> List[ParsingRule]:
+        """클라이언트 ID로 파싱 룰 조회"""
+        return await self._all(select(ParsingRule)
+                               .where(ParsingRule.client_id == client_id)
+                               .order_by(desc(ParsingRule.created_at))
+                               .offset(skip)
+                               .limit(limit))
+    
+    async def get_active_rules_by_client(self, client_id: str) -> List[ParsingRule]:
+        """클라이언트의 활성 파싱 룰 조회"""
+        return await self._all(select(ParsingRule)
+                               .where(ParsingRule.client_id == client_id, ParsingRule.is_active == True)
+                               .order_by(desc(ParsingRule.version)))
+    
+    async def get_latest_version_by_client_and_type(self, client_id: str, rule_type: str) -> Optional[ParsingRule]:
+        """클라이언트와 타입별 최신 버전 룰 조회"""
+        return await self.db.scalar(select(ParsingRule)
+                                    .where(ParsingRule.client_id == client_id,
+                                           ParsingRule.rule_type == rule_type,
+                                           ParsingRule.is_active == True)
+                                    .order_by(desc(ParsingRule.version))
+                                    .limit(1))
+    
+    async def create_new_version(self, client_id: str, rule_type: str, xml_content: str) -> ParsingRule:
+        """새 버전의 파싱 룰 생성"""
+        latest_rule = await self.get_latest_version_by_client_and_type(client_id, rule_type)
+        new_version = (latest_rule.version + 1) if latest_rule else 1
+        
+        new_rule = ParsingRule.create(
+            client_id=client_id,
+            rule_type=rule_type,
+            xml_content=xml_content,
+            version=new_version,
+            is_active=True
+        )
+        
+        self.db.add(new_rule)
+        await self.db.commit()
+        await self.db.refresh(new_rule)
+        
+        return new_rule
+    
+    async def deactivate_old_versions(self, client_id: str, rule_type: str, except_version: int = None) -> int:
+        """이전 버전들을 비활성화"""
+        stmt = update(ParsingRule).where(ParsingRule.client_id == client_id, ParsingRule.rule_type == rule_type)
+        if except_version:
+            stmt = stmt.where(ParsingRule.version != except_version)
+        
+        result = await self.db.execute(stmt.values(is_active=False).execution_options(synchronize_session=False))
+        await self.db.commit()
+        return result.rowcount
+    
+    async def update_xml_content(self, rule_id: int, xml_content: str) -> Optional[ParsingRule]:
+        """XML 내용 업데이트"""
+        rule = await self.get_by_id(rule_id)
+        if rule:
+            rule.update_xml_content(xml_content)
+            await self.db.commit()
+            await self.db.refresh(rule)
+        return rule
+    
+    async def search_rules(self, client_id: str = None, rule_type: str = None,
+                           is_active: bool = None, skip: int = 0, limit: int = 100) -> Dict[str, Any]:
+        """파싱 룰 검색"""
+        conditions = _search_conditions(client_id, rule_type, is_active)
+        
+        total = await self.db.scalar(select(func.count()).select_from(ParsingRule).where(*conditions))
+        rules = await self._all(select(ParsingRule)
+                                .where(*conditions)
+                                .order_by(desc(ParsingRule.created_at), desc(ParsingRule.id))
+                                .offset(skip)
+                                .limit(limit))
+        
+        return {
+            "data": rules,
+            "total": total,
+            "page": (skip // limit) + 1 if limit > 0 else 1,
+            "limit": limit
+        }
+    
+    async def get_rule_statistics(self, client_id: str = None) -> Dict[str, Any]:
+        """룰 통계 조회 (타입별 GROUP BY 한 번으로 계산)"""
+        return _rule_statistics((await self.db.execute(_rule_statistics_select(client_id))).all())
+    
+    async def search_rules_page(self, client_id: str = None, rule_type: str = None, is_active: bool = None,
+                                cursor: str = None, limit: int = 100, with_total: bool = False) -> Dict[str, Any]:
+        """파싱 룰 keyset 페이지 검색"""
+        return await self.get_page(cursor=cursor, limit=limit, with_total=with_total,
+                                   conditions=_search_conditions(client_id, rule_type, is_active))
@@ -0,0 +1,179 @@
+"""
+통계 요약 테이블 Repository
+관리자 통계 API용 일자별 요약 테이블 조회 / 재계산 담당 (migrations/003_statistics_summary.sql)
+
+요약 테이블은 원본 테이블 트리거가 증분으로 유지하므로, 통계 조회는 원본 행 수와 관계없이
+(클라이언트 수 × 일자 수[× 상태 수]) 행만 읽습니다. 기간 조건은 일 단위로 적용됩니다.
+
+새 데이터베이스는 init_postgresql.sql이, 기존 데이터베이스는 003 마이그레이션이 요약 테이블을 만듭니다.
+STATISTICS_USE_SUMMARY=false면 서비스가 기존 원본 테이블 집계 쿼리를 사용합니다 (마이그레이션 적용 전).
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import column, func, select, table, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from aiagent.repositories.parsing_error_repository import ERROR_STATUSES
+
+STATISTICS_USE_SUMMARY = os.getenv("STATISTICS_USE_SUMMARY", "true").lower() in ("1", "true", "yes")
+
+# 재계산 대상 원본 테이블
+SUMMARY_SOURCES = ("parsing_errors", "receipt_records", "ml_training_data")
+
+parsing_error_daily_stats = table(
+    "parsing_error_daily_stats",
+    column("client_id"), column("status"), column("stat_date"), column("error_count"),
+)
+receipt_record_daily_stats = table(
+    "receipt_record_daily_stats",
+    column("client_id"), column("stat_date"), column("success_count"), column("error_count"),
+    column("processing_time_sum"),
+)
+ml_training_data_daily_stats = table(
+    "ml_training_data_daily_stats",
+    column("client_id"), column("stat_date"), column("data_count"),
+)
+
+def _recent_dates(days: int) -> List:
+    """오늘부터 days일 전까지의 날짜 (최신순)"""
+    today = datetime.now().date()
+    return [today - timedelta(days=i) for i in range(days)]
+
+# === 파싱 에러 ===
+
+def _error_statistics_select(client_id: str = None):
+    stats = parsing_error_daily_stats.c
+    stmt = select(stats.status, func.sum(stats.error_count).label("count")).group_by(stats.status)
+    if client_id:
+        stmt = stmt.where(stats.client_id == client_id)
+    return stmt
+
+def _error_statistics(rows) -> Dict[str, int]:
+    """ParsingErrorRepository.get_error_statistics와 같은 형식"""
+    counts = {row.status: int(row.count or 0) for row in rows}
+    stats = {status: counts.get(status, 0) for status in ERROR_STATUSES}
+    stats["TOTAL"] = sum(counts.values())
+    return stats
+
+# === ML 훈련 데이터 ===
+
+def _training_data_statistics_selects(client_id: str = None, days: int = None, daily_days: int = 7):
+    stats = ml_training_data_daily_stats.c
+    conditions = [stats.client_id == client_id] if client_id else []
+    in_period = stats.stat_date >= (datetime.now() - timedelta(days=days)).date() if days else None
+
+    period_sum = func.sum(stats.data_count).filter(in_period) if in_period is not None else func.sum(stats.data_count)
+    client_stmt = (select(stats.client_id, func.sum(stats.data_count).label("total"), period_sum.label("in_period"))
+                   .where(*conditions)
+                   .group_by(stats.client_id))
+
+    dates = _recent_dates(daily_days)
+    daily_conditions = conditions + ([in_period] if in_period is not None else [])
+    daily_stmt = (select(stats.stat_date, func.sum(stats.data_count).label("count"))
+                  .where(*daily_conditions, stats.stat_date >= dates[-1])
+                  .group_by(stats.stat_date))
+    return client_stmt, daily_stmt, dates
+
+def _training_data_statistics(client_rows, daily_rows, dates, client_id: str = None) -> Dict[str, Any]:
+    """MLTrainingDataRepository.get_statistics와 같은 형식"""
+    counts_by_day = {str(row.stat_date): int(row.count or 0) for row in daily_rows}
+    return {
+        "total_count": sum(int(row.in_period or 0) for row in client_rows),
+        "client_counts": {} if client_id else {row.client_id: int(row.total or 0) for row in client_rows},
+        "daily_counts": {date.isoformat(): counts_by_day.get(date.isoformat(), 0) for date in dates}
+    }
+
+# === 영수증 처리 기록 ===
+
+def _receipt_statistics_select(client_id: str = None, days: int = 7):
+    stats = receipt_record_daily_stats.c
+    stmt = (select(stats.client_id, stats.stat_date, stats.success_count, stats.error_count, stats.processing_time_sum)
+            .where(stats.stat_date >= _recent_dates(days)[-1]))
+    if client_id:
+        stmt = stmt.where(stats.client_id == client_id)
+    return stmt
+
+def _receipt_statistics(rows, days: int = 7) -> Dict[str, Any]:
+    """(클라이언트, 일자)별 요약 행 → 기간 전체 / 클라이언트별 / 일자별 처리 통계"""
+    def summarize(success: int, error: int, time_sum: float) -> Dict[str, Any]:
+        total = success + error
+        return {
+            "total_count": total,
+            "success_count": success,
+            "error_count": error,
+            "success_rate": round(success / total * 100, 2) if total else 0.0,
+            "avg_processing_time": round(time_sum / total, 4) if total else 0.0,
+        }
+
+    totals = [0, 0, 0.0]
+    by_client: Dict[str, list] = {}
+    by_day: Dict[str, list] = {date.isoformat(): [0, 0, 0.0] for date in _recent_dates(days)}
+    for row in rows:
+        values = (int(row.success_count), int(row.error_count), float(row.processing_time_sum))
+        for bucket in (totals, by_client.setdefault(row.client_id, [0, 0, 0.0]),
+                       by_day.setdefault(str(row.stat_date), [0, 0, 0.0])):
+            for i, value in enumerate(values):
+                bucket[i] += value
+
+    return {
+        **summarize(*totals),
+        "period_days": days,
+        "client_stats": {client: summarize(*values) for client, values in by_client.items()},
+        "daily_stats": {day: summarize(*values) for day, values in by_day.items()},
+    }
+
+class StatisticsSummaryRepository:
+    """통계 요약 테이블 Repository 클래스"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_error_statistics(self, client_id: str = None) -> Dict[str, int]:
+        """상태별 에러 개수 (요약 테이블)"""
+        return _error_statistics(self.db.execute(_error_statistics_select(client_id)).all())
+
+    def get_training_data_statistics(self, client_id: str = None, days: int = None) -> Dict[str, Any]:
+        """훈련 데이터 개수 (요약 테이블, 최근 7일 일자별 포함)"""
+        client_stmt, daily_stmt, dates = _training_data_statistics_selects(client_id, days)
+        return _training_data_statistics(self.db.execute(client_stmt).all(), self.db.execute(daily_stmt).all(),
+                                         dates, client_id)
+
+    def get_receipt_statistics(self, client_id: str = None, days: int = 7) -> Dict[str, Any]:
+        """최근 days일 영수증 처리 성공 / 오류 개수와 평균 처리 시간 (요약 테이블)"""
+        return _receipt_statistics(self.db.execute(_receipt_statistics_select(client_id, days)).all(), days)
+
+    def rebuild(self, source: Optional[str] = None) -> Dict[str, int]:
+        """
+        원본 테이블로 요약 테이블 재계산 (source가 None이면 전체)
+
+        재계산 중에는 원본 테이블 쓰기가 대기합니다. Returns: 요약 테이블별 행 수
+        """
+        if source is not None and source not in SUMMARY_SOURCES:
+            raise ValueError(f"알 수 없는 통계 원본 테이블입니다: {source} (가능: {', '.join(SUMMARY_SOURCES)})")
+        rows = self.db.execute(text("SELECT summary_table, row_count FROM rebuild_statistics_summaries(:target)"),
+                               {"target": source}).all()
+        self.db.commit()
+        return {row.summary_table: row.row_count for row in rows}
+
+class AsyncStatisticsSummaryRepository:
+    """통계 요약 테이블 Repository 클래스 (AsyncSession)"""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_error_statistics(self, client_id: str = None) -> Dict[str, int]:
+        """상태별 에러 개수 (요약 테이블)"""
+        return _error_statistics((await self.db.execute(_error_statistics_select(client_id))).all())
+
+    async def get_training_data_statistics(self, client_id: str = None, days: int = None) -> Dict[str, Any]:
+        """훈련 데이터 개수 (요약 테이블, 최근 7일 일자별 포함)"""
+        client_stmt, daily_stmt, dates = _training_data_statistics_selects(client_id, days)
+        client_rows = (await self.db.execute(client_stmt)).all()
+        daily_rows = (await self.db.execute(daily_stmt)).all()
+        return _training_data_statistics(client_rows, daily_rows, dates, client_id)
+
+    async def get_receipt_statistics(self, client_id: str = None, days: int = 7) -> Dict[str, Any]:
+        """최근 days일 영수증 처리 성공 / 오류 개수와 평균 처리 시간 (요약 테이블)"""
+        return _receipt_statistics((await self.db.execute(_receipt_statistics_select(client_id, days))).all(), days)
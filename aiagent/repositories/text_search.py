@@ -0,0 +1,87 @@
+"""
+pg_trgm 기반 부분 문자열 검색 공통 함수
+ILIKE '%검색어%' 조건을 trigram GIN 인덱스(migrations/004_text_search_indexes.sql)로 처리하고,
+word_similarity 순위와 검색어 주변 하이라이트 스니펫을 함께 조회합니다 (동기 / 비동기 Repository 공통)
+
+- 형태소 분석기가 없는 PostgreSQL 기본 텍스트 검색(tsvector)은 한국어 어절 안의 부분 문자열을 찾지 못하므로
+  trigram을 사용합니다. 한글 trigram은 데이터베이스 LC_CTYPE이 UTF-8 로케일(C 아님)이어야 생성됩니다.
+- 인덱스는 검색어에서 trigram(3글자)을 뽑을 수 있어야 사용되므로, 1~2글자 검색어는 전체 인덱스를 읽습니다.
+- 스니펫은 DB에서 첫 일치 위치 주변만 잘라오고, 강조 표시(<b>...</b>, ts_headline 기본값과 동일)는 Python에서 붙입니다.
+  스니펫 본문은 HTML 이스케이프하므로 XML 결과의 태그와 강조 표시가 구분됩니다.
+"""
+
+import html
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, desc, func, literal, or_, select
+
+SEARCH_SNIPPET_RADIUS = int(os.getenv("SEARCH_SNIPPET_RADIUS", "60"))  # 일치 위치 앞뒤 글자 수
+HIGHLIGHT_START = "<b>"
+HIGHLIGHT_END = "</b>"
+
+
+def escape_like(term: str) -> str:
+    """LIKE 패턴 특수문자(%, _, \\) 이스케이프"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def contains_condition(expr, term: str):
+    """대소문자 무시 부분 문자열 조건 (gin_trgm_ops 인덱스 사용 가능)"""
+    return expr.ilike(f"%{escape_like(term)}%", escape="\\")
+
+
+def snippet_expression(expr, term: str, radius: int = SEARCH_SNIPPET_RADIUS):
+    """첫 일치 위치 앞뒤 radius글자 (일치하지 않으면 NULL)"""
+    position = func.strpos(func.lower(expr), func.lower(literal(term)))
+    start = func.greatest(position - radius, 1)
+    return case((position > 0, func.substr(expr, start, len(term) + radius * 2)), else_=None)
+
+
+def search_select(model, fields: Dict[str, Any], term: str, conditions: Sequence = (),
+                  skip: int = 0, limit: int = 20):
+    """
+    fields(이름 → 컬럼 / 식) 중 하나라도 term을 포함하는 행을 순위순으로 조회하는 문
+
+    결과 행: (엔티티, rank, <이름>_snippet...), 정렬: rank DESC, created_at DESC, id DESC
+    """
+    rank = func.greatest(*(func.word_similarity(term, expr) for expr in fields.values())).label("rank")
+    snippets = [snippet_expression(expr, term).label(f"{name}_snippet") for name, expr in fields.items()]
+    return (select(model, rank, *snippets)
+            .where(*conditions, or_(*(contains_condition(expr, term) for expr in fields.values())))
+            .order_by(desc(rank), desc(model.created_at), desc(model.id))
+            .offset(skip)
+            .limit(limit))
+
+
+def highlight(snippet: Optional[str], term: str) -> Optional[str]:
+    """
+    스니펫 안의 검색어(대소문자 무시)를 강조 표시로 감쌈
+
+    스니펫(xml_result 등)은 HTML 이스케이프하므로 결과에 남는 태그는 강조 표시뿐입니다.
+    검색어에 &, < 등이 있어도 찾을 수 있도록 원문에서 일치 위치를 찾은 뒤 조각별로 이스케이프합니다.
+    """
+    if not snippet:
+        return None
+    parts = []
+    position = 0
+    for match in re.finditer(re.escape(term), snippet, flags=re.IGNORECASE):
+        parts.append(html.escape(snippet[position:match.start()]))
+        parts.append(f"{HIGHLIGHT_START}{html.escape(match.group(0))}{HIGHLIGHT_END}")
+        position = match.end()
+    parts.append(html.escape(snippet[position:]))
+    return "".join(parts)
+
+
+def build_search_results(rows, field_names: Sequence[str], term: str) -> List[Dict[str, Any]]:
+    """search_select 결과 → [{"item": 엔티티, "rank": float, "highlights": {필드: 스니펫}}]"""
+    results = []
+    for row in rows:
+        highlights = {}
+        for name in field_names:
+            snippet = highlight(getattr(row, f"{name}_snippet"), term)
+            if snippet:
+                highlights[name] = snippet
+        results.append({"item": row[0], "rank": float(row.rank or 0.0), "highlights": highlights})
+    return results
@@ -3,10 +3,11 @@
 모든 비즈니스 로직 서비스를 여기서 임포트
 """
 
-from aiagent.services.admin_service import AdminService
+from aiagent.services.admin_service import AdminService, AsyncAdminService
 from aiagent.services.ml_data_service import MLDataService
 
 __all__ = [
     "AdminService",
+    "AsyncAdminService",
     "MLDataService"
-] 
\ No newline at end of file
+] 
\ No newline at end of file
@@ -8,6 +8,8 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from aiagent.repositories.ml_training_data_repository import MLTrainingDataRepository
+from aiagent.repositories.pagination import with_offset_cursor
+from aiagent.repositories.statistics_repository import STATISTICS_USE_SUMMARY, StatisticsSummaryRepository
 from aiagent.models.ml_training_data import MLTrainingData
 from aiagent.exceptions import NotFoundError, ValidationError, BusinessLogicError
 from aiagent.utils.logger import get_logger
@@ -21,13 +23,30 @@ class MLDataService:
         # 의존성 주입: Repository를 주입받아 사용
         self.db = db
         self.ml_data_repo = MLTrainingDataRepository(db)
+        self.stats_repo = StatisticsSummaryRepository(db)
     
     # === 훈련 데이터 조회 기능 ===
     
     def get_training_data(self, client_id: str = None, page: int = 1, 
-                         limit: int = 50) -> Dict[str, Any]:
-        """ML 훈련 데이터 조회 (페이징 포함)"""
+                         limit: int = 50, cursor: str = None,
+                         include_total: bool = True) -> Dict[str, Any]:
+        """
+        ML 훈련 데이터 조회 (페이징 포함)
+        
+        cursor가 있거나 첫 페이지면 keyset 페이지네이션(next_cursor로 다음 페이지 요청),
+        cursor 없이 page > 1이면 기존 OFFSET 방식으로 조회합니다.
+        """
         try:
+            if cursor or page == 1:
+                result = self.ml_data_repo.get_page_by_client_id(
+                    client_id=client_id, cursor=cursor, limit=limit, with_total=include_total
+                )
+                result["data"] = [item.to_dict() for item in result["data"]]
+                result["page"] = None if cursor else 1
+                
+                logger.info(f"훈련 데이터 조회 완료: {len(result['data'])}건 반환 (total={result['total']}, has_more={result['has_more']})")
+                return result
+            
             skip = (page - 1) * limit
             
             if client_id:
@@ -39,19 +58,21 @@ class MLDataService:
                 training_data = self.ml_data_repo.get_all(skip=skip, limit=limit)
                 total = self.ml_data_repo.count()
             
-            # 모델을 딕셔너리로 변환
-            data = [item.to_dict() for item in training_data]
-            
-            result = {
-                "data": data,
+            result = with_offset_cursor({
+                "data": training_data,
                 "total": total,
                 "page": page,
                 "limit": limit
-            }
+            }, skip)
+            
+            # 모델을 딕셔너리로 변환
+            result["data"] = [item.to_dict() for item in training_data]
             
-            logger.info(f"훈련 데이터 조회 완료: {total}건 중 {len(data)}건 반환")
+            logger.info(f"훈련 데이터 조회 완료: {total}건 중 {len(result['data'])}건 반환")
             return result
             
+        except ValidationError:
+            raise
         except Exception as e:
             logger.error(f"훈련 데이터 조회 중 오류 발생: {e}")
             raise BusinessLogicError(f"훈련 데이터 조회 실패: {str(e)}")
@@ -74,9 +95,12 @@ class MLDataService:
     
     def get_training_data_statistics(self, client_id: str = None, 
                                    days: int = None) -> Dict[str, Any]:
-        """훈련 데이터 통계 조회"""
+        """훈련 데이터 통계 조회 (STATISTICS_USE_SUMMARY면 요약 테이블, 기간은 일 단위)"""
         try:
-            stats = self.ml_data_repo.get_statistics(client_id=client_id, days=days)
+            if STATISTICS_USE_SUMMARY:
+                stats = self.stats_repo.get_training_data_statistics(client_id=client_id, days=days)
+            else:
+                stats = self.ml_data_repo.get_statistics(client_id=client_id, days=days)
             
             # 추가 통계 정보 계산
             enhanced_stats = {
@@ -269,10 +293,10 @@ class MLDataService:
     
     def search_training_data(self, search_term: str, client_id: str = None, 
                            page: int = 1, limit: int = 20) -> Dict[str, Any]:
-        """훈련 데이터 검색"""
+        """훈련 데이터 검색 (XML 결과 / 영수증 내용, 유사도 순, 하이라이트 포함)"""
         try:
             skip = (page - 1) * limit
-            data = self.ml_data_repo.search_by_content(
+            data = self.ml_data_repo.search_ranked(
                 search_term=search_term,
                 client_id=client_id,
                 skip=skip,
@@ -280,7 +304,8 @@ class MLDataService:
             )
             
             result = {
-                "data": [item.to_dict() for item in data],
+                "data": [{**item["item"].to_dict(), "rank": item["rank"], "highlights": item["highlights"]}
+                         for item in data],
                 "search_term": search_term,
                 "count": len(data),
                 "page": page,
@@ -357,4 +382,4 @@ class MLDataService:
             return output.getvalue()
             
         except Exception:
-            return "" 
\ No newline at end of file
+            return "" 
\ No newline at end of file
@@ -1,10 +1,12 @@
+import hashlib
 import json
 import logging
 import os
 import re
+import time
 import traceback
 import xml.etree.ElementTree as ET
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Union
 from xml.etree.ElementTree import ParseError
 
 import backoff
@@ -14,13 +16,20 @@ from langchain.schema import OutputParserException
 from openai import OpenAIError, APIError, RateLimitError, APIConnectionError, BadRequestError
 
 from binascii import unhexlify
-from ..utils.logger import get_logger
+from ..utils.logger import get_logger, log_payload
+from ..utils.metrics import registry
 from ..core.protocol import MessageFormat
 import base64
 
 # 로깅 설정
 logger = get_logger('aiagent.services.parser')
 
+# LLM 호출 / 규칙 적용 메트릭
+LLM_LATENCY = registry.histogram("aiagent_llm_request_seconds", "LLM 호출 시간", ("operation", "status"),
+                                 buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+LLM_TOKENS = registry.counter("aiagent_llm_tokens_total", "LLM 사용 토큰 수", ("operation", "type"))
+RULE_APPLY_SECONDS = registry.histogram("aiagent_rule_apply_seconds", "PARSER 규칙 적용(영수증 파싱) 시간")
+
 class ParserError(Exception):
     """파서 관련 예외"""
     pass
@@ -122,7 +131,7 @@ class Parser:
         텍스트에서 PARSER 부분만 추출
         """
         try:
-            logger.debug(f"[Extract PARSER] 입력된 텍스트:\n{text}")
+            log_payload(logger, "[Extract PARSER] 입력된 텍스트", text)
             
             # PARSER 태그 시작과 끝 찾기 (공백과 줄바꿈 포함)
             parser_pattern = r"\s*<PARSER[^>]*>[\s\S]*?</PARSER>\s*"
@@ -134,7 +143,7 @@ class Parser:
                 raise ParserError("PARSER 파싱 규칙을 찾을 수 없습니다")
                 
             parser_xml = match.group(0).strip()
-            logger.debug(f"[Extract PARSER] 추출된 PARSER:\n{parser_xml}")
+            log_payload(logger, "[Extract PARSER] 추출된 PARSER", parser_xml)
             return parser_xml
             
         except Exception as e:
@@ -224,6 +233,27 @@ class Parser:
         except Exception as e:
             raise ParserError(f"XML 정제 실패: {str(e)}")
 
+    def _invoke_llm(self, prompt_text: str, operation: str):
+        """LLM 호출 + 호출 시간 / 토큰 사용량 메트릭 기록 (재시도는 호출하는 쪽에서 결정)"""
+        start = time.perf_counter()
+        try:
+            response = self.llm.invoke(prompt_text)
+        except Exception:
+            LLM_LATENCY.labels(operation, "error").observe(time.perf_counter() - start)
+            raise
+        LLM_LATENCY.labels(operation, "ok").observe(time.perf_counter() - start)
+
+        # langchain 버전에 따라 usage_metadata 또는 response_metadata["token_usage"]에 기록됨
+        usage = getattr(response, "usage_metadata", None) or {}
+        token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("input_tokens", token_usage.get("prompt_tokens", 0))
+        completion_tokens = usage.get("output_tokens", token_usage.get("completion_tokens", 0))
+        if prompt_tokens:
+            LLM_TOKENS.labels(operation, "prompt").inc(prompt_tokens)
+        if completion_tokens:
+            LLM_TOKENS.labels(operation, "completion").inc(completion_tokens)
+        return response
+
     @backoff.on_exception(
         backoff.expo,
         (RateLimitError, APIConnectionError),
@@ -233,10 +263,10 @@ class Parser:
     def _call_llm(self, prompt_text: str) -> str:
         """LLM 호출 with 재시도 로직"""
         try:
-            response = self.llm.invoke(prompt_text)
+            response = self._invoke_llm(prompt_text, "generate")
             # invoke 메서드는 AIMessage 객체를 반환하므로 content 속성에서 텍스트 추출
             response_text = response.content if hasattr(response, 'content') else str(response)
-            logger.debug(f"[LLM Response] GPT 응답:\n{response_text}")
+            log_payload(logger, "[LLM Response] GPT 응답", response_text)
             return response_text
         except RateLimitError:
             logger.warning("API 속도 제한에 걸림, 재시도 중...")
@@ -260,12 +290,12 @@ class Parser:
             logger.error(f"예상치 못한 LLM 오류: {str(e)}")
             raise ParserError(f"LLM 호출 실패: {str(e)}")
 
-    def _decode_raw_data(self, raw_data: str) -> str:
+    def _decode_raw_data(self, raw_data: Union[str, bytes]) -> str:
         """
-        hex 형식의 raw_data를 텍스트로 변환
+        hex 형식(v1.0) 또는 바이너리(v1.1)의 raw_data를 텍스트로 변환
         
         Args:
-            raw_data: hex 형식의 문자열
+            raw_data: hex 형식의 문자열 또는 영수증 원본 바이트
             
         Returns:
             변환된 텍스트
@@ -274,8 +304,8 @@ class Parser:
             ParserError: 변환 실패 시
         """
         try:
-            # hex 문자열을 바이트로 변환
-            raw = unhexlify(raw_data)
+            # hex 문자열을 바이트로 변환 (바이너리 프레임은 그대로 사용)
+            raw = raw_data if isinstance(raw_data, bytes) else unhexlify(raw_data)
             
             # euc-kr로 디코딩 시도
             try:
@@ -331,7 +361,7 @@ class Parser:
             lines = [line.strip() for line in text.split('\n') if line.strip()]
             text = '\n'.join(lines)
             
-            logger.debug(f"[Raw Data Decode] 변환된 텍스트 (줄 수: {len(lines)}):\n{text}")
+            log_payload(logger, f"[Raw Data Decode] 변환된 텍스트 (줄 수: {len(lines)})", text)
             return text
             
         except Exception as e:
@@ -417,6 +447,8 @@ class Parser:
         메뉴 항목 추출 - EscposParser 스타일
         """
         items = []
+        # 영수증 줄마다 호출되는 디버그 로그는 DEBUG가 꺼져 있으면 f-string도 만들지 않음
+        debug = logger.isEnabledFor(logging.DEBUG)
         if menu_rule is None:
             logger.error("[Extract Menu] menu_rule이 None입니다")
             return items
@@ -438,23 +470,23 @@ class Parser:
                     'default': field_elem.get('default', '')
                 })
             
-            logger.debug(f"[Extract Menu] 수집된 필드 정의:\n{json.dumps(fields, ensure_ascii=False, indent=2)}")
+            log_payload(logger, "[Extract Menu] 수집된 필드 정의", lambda: json.dumps(fields, ensure_ascii=False, indent=2))
 
             # 메뉴 영역 찾기
             begin_marker = menu_rule.get('begin', '')
             end_marker = menu_rule.get('end', '')
             skip_marker = menu_rule.get('skip', '')
             
-            logger.debug(f"[Extract Menu] 메뉴 영역 마커:\nbegin: {begin_marker}\nend: {end_marker}\nskip: {skip_marker}")
+            if debug:
+                logger.debug(f"[Extract Menu] 메뉴 영역 마커:\nbegin: {begin_marker}\nend: {end_marker}\nskip: {skip_marker}")
             
             # 시작/끝 인덱스 찾기
             start_idx = 0
             end_idx = len(lines)
             
             # 전체 라인 로깅
-            logger.debug("[Extract Menu] 전체 라인:")
-            for i, line in enumerate(lines):
-                logger.debug(f"[{i}] {line}")
+            log_payload(logger, "[Extract Menu] 전체 라인",
+                        lambda: "\n".join(f"[{i}] {line}" for i, line in enumerate(lines)))
             
             if begin_marker:
                 for i, line in enumerate(lines):
@@ -462,7 +494,8 @@ class Parser:
                     if begin_marker in text:
                         # 시작 마커가 있는 줄부터 파싱 시작 (마커 다음 줄이 아닌)
                         start_idx = i
-                        logger.debug(f"[Extract Menu] 시작 마커 발견 - 인덱스: {i}, 라인: {text}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 시작 마커 발견 - 인덱스: {i}, 라인: {text}")
                         break
                         
             if end_marker:
@@ -470,15 +503,16 @@ class Parser:
                     text = lines[i].get('text', '') if isinstance(lines[i], dict) else str(lines[i])
                     if end_marker in text:
                         end_idx = i
-                        logger.debug(f"[Extract Menu] 종료 마커 발견 - 인덱스: {i}, 라인: {text}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 종료 마커 발견 - 인덱스: {i}, 라인: {text}")
                         break
             
-            logger.debug(f"[Extract Menu] 메뉴 영역 인덱스: {start_idx} ~ {end_idx}")
+            if debug:
+                logger.debug(f"[Extract Menu] 메뉴 영역 인덱스: {start_idx} ~ {end_idx}")
             
             # 메뉴 영역 라인 로깅
-            logger.debug("[Extract Menu] 메뉴 영역 라인:")
-            for i in range(start_idx, end_idx):
-                logger.debug(f"[{i}] {lines[i]}")
+            log_payload(logger, "[Extract Menu] 메뉴 영역 라인",
+                        lambda: "\n".join(f"[{i}] {lines[i]}" for i in range(start_idx, end_idx)))
             
             # 메뉴 영역 파싱
             for line in lines[start_idx:end_idx]:
@@ -486,28 +520,34 @@ class Parser:
                 
                 # 같은 줄에 시작과 끝 마커가 모두 있는 경우 해당 구간만 추출
                 if begin_marker and end_marker and begin_marker in text and end_marker in text:
-                    logger.debug(f"[Extract Menu] 같은 줄에 시작/끝 마커 발견: {text}")
+                    if debug:
+                        logger.debug(f"[Extract Menu] 같은 줄에 시작/끝 마커 발견: {text}")
                     begin_pos = text.find(begin_marker) + len(begin_marker)
                     end_pos = text.find(end_marker)
                     if begin_pos < end_pos:
                         text = text[begin_pos:end_pos].strip()
-                        logger.debug(f"[Extract Menu] 추출된 메뉴 구간: {text}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 추출된 메뉴 구간: {text}")
                 
                 # 빈 줄이나 건너뛸 항목 제외
                 if not text:
-                    logger.debug(f"[Extract Menu] 빈 라인 무시: {line}")
+                    if debug:
+                        logger.debug(f"[Extract Menu] 빈 라인 무시: {line}")
                     continue
                 if skip_marker and skip_marker in text:
-                    logger.debug(f"[Extract Menu] 건너뛸 라인 발견: {line}")
+                    if debug:
+                        logger.debug(f"[Extract Menu] 건너뛸 라인 발견: {line}")
                     continue
                     
                 parts = text.split()
                 if not parts:
-                    logger.debug(f"[Extract Menu] 분할 후 빈 라인: {line}")
+                    if debug:
+                        logger.debug(f"[Extract Menu] 분할 후 빈 라인: {line}")
                     continue
                     
-                logger.debug(f"[Extract Menu] 라인 분석 중: {text}")
-                logger.debug(f"[Extract Menu] 분할된 부분: {parts}")
+                if debug:
+                    logger.debug(f"[Extract Menu] 라인 분석 중: {text}")
+                    logger.debug(f"[Extract Menu] 분할된 부분: {parts}")
                 
                 item = {}
                 total_parts = len(parts)
@@ -519,7 +559,8 @@ class Parser:
                     if field['regex']:
                         match = re.search(field['regex'], text)
                         item[key] = match.group(1) if match else field['default']
-                        logger.debug(f"[Extract Menu] 정규식 처리 결과 - {key}: {item[key]}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 정규식 처리 결과 - {key}: {item[key]}")
                         continue
                     
                     # 2. "all_before" 처리
@@ -534,7 +575,8 @@ class Parser:
                                     pass
                         cut_idx = min(other_indexes) if other_indexes else total_parts - 1
                         item[key] = ' '.join(parts[:cut_idx]) if key == 'name' else field['default']
-                        logger.debug(f"[Extract Menu] all_before 처리 결과 - {key}: {item[key]}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] all_before 처리 결과 - {key}: {item[key]}")
                         continue
                     
                     # 3. 인덱스 기반 처리
@@ -559,25 +601,30 @@ class Parser:
                                 item[key] = parts[begin] if begin < total_parts else field['default']
                         else:
                             item[key] = field['default']
-                        logger.debug(f"[Extract Menu] 인덱스 처리 결과 - {key}: {item[key]} (begin: {begin}, end: {end})")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 인덱스 처리 결과 - {key}: {item[key]} (begin: {begin}, end: {end})")
                     else:
                         item[key] = field['default']
-                        logger.debug(f"[Extract Menu] 기본값 사용 - {key}: {item[key]}")
+                        if debug:
+                            logger.debug(f"[Extract Menu] 기본값 사용 - {key}: {item[key]}")
                 
                 # 첫 번째 필드가 비어있으면 제외
                 first_key = fields[0]['key'] if fields else None
                 if first_key and not item.get(first_key, '').strip():
-                    logger.debug(f"[Extract Menu] 첫 번째 필드가 비어있어 제외: {item}")
+                    if debug:
+                        logger.debug(f"[Extract Menu] 첫 번째 필드가 비어있어 제외: {item}")
                     continue
                     
                 # 모든 필드가 비어있거나 기본값이면 제외
                 if any(v.strip() for v in item.values()):
                     items.append(item)
-                    logger.debug(f"[Extract Menu] 항목 추가됨: {item}")
-                else:
+                    if debug:
+                        logger.debug(f"[Extract Menu] 항목 추가됨: {item}")
+                elif debug:
                     logger.debug(f"[Extract Menu] 모든 필드가 비어있어 제외: {item}")
             
-            logger.debug(f"[Extract Menu] 추출된 총 메뉴 항목 수: {len(items)}")
+            if debug:
+                logger.debug(f"[Extract Menu] 추출된 총 메뉴 항목 수: {len(items)}")
             return items
             
         except Exception as e:
@@ -589,7 +636,8 @@ class Parser:
         """새로운 파싱 규칙 생성 - TYPE만 생성하고 고정 구조로 감싸기"""
         try:
             logger.debug("[Generate Rule] 새로운 파싱 규칙 생성 시작")
-            logger.debug(f"[Generate Rule] 입력 데이터:\n{json.dumps(receipt_data, ensure_ascii=False, indent=2)}")
+            log_payload(logger, "[Generate Rule] 입력 데이터", lambda: json.dumps(
+                receipt_data, ensure_ascii=False, indent=2, default=lambda value: f'<binary {len(value)} bytes>'))
             
             # MessageFormat의 extract_receipt_raw_data 사용 (프로토콜 준수)
             try:
@@ -600,51 +648,73 @@ class Parser:
                 raise ParserError(f"receipt_data 추출 실패: {str(e)}")
             
             receipt_text = self._decode_raw_data(raw_data)
-            logger.debug(f"[Generate Rule] 변환된 영수증 텍스트:\n{receipt_text}")
-            
-            # 프롬프트 생성 및 로깅 (TYPE만 생성하도록 변경된 프롬프트 사용)
-            prompt = self.prompt.format(receipt_text=receipt_text)
-            logger.debug(f"[Generate Rule] GPT 프롬프트:\n{prompt}")
-            
-            # 전체 PARSER 규칙 생성
-            llm_response = self._call_llm(prompt)
-            logger.debug(f"[Generate Rule] GPT 응답 원본:\n{llm_response}")
-            
-            # PARSER 추출
-            complete_xml = self._extract_parser(llm_response)
-            logger.debug(f"[Generate Rule] 추출된 PARSER:\n{complete_xml}")
-            
-            # PARSER 구조 검증
-            self._validate_parser_structure(complete_xml)
-            logger.debug("[Generate Rule] PARSER 구조 검증 완료")
-            
-            # 생성된 규칙을 실제 데이터에 적용해보기 (검증)
-            try:
-                logger.debug("[Generate Rule] 생성된 규칙 적용 테스트 시작")
-                test_result = self.apply_rule(receipt_text, complete_xml)
-                logger.debug(f"[Generate Rule] 규칙 적용 결과:\n{test_result}")
-                
-                # 파싱 결과 검증
-                self._validate_xml_structure(test_result)
-                logger.debug("[Generate Rule] 규칙 적용 결과 검증 완료")
-                
-            except Exception as e:
-                logger.error(f"[Generate Rule] 규칙 적용 테스트 실패: {str(e)}")
-                raise ParserError(f"생성된 파싱 규칙 검증 실패: {str(e)}")
+            log_payload(logger, "[Generate Rule] 변환된 영수증 텍스트", receipt_text)
             
-            # 버전 생성 (숫자 형식으로 변경)
-            version = "1.0"
-            
-            return {
-                "status": "ok",
-                "rule_xml": complete_xml,
-                "version": version
-            }
+            return self.generate_rule_from_text(receipt_text)
             
         except Exception as e:
             logger.error(f"[Generate Rule] 규칙 생성 실패: {str(e)}")
             raise ParserError(f"파싱 규칙 생성 실패: {str(e)}")
 
+    def generate_rule_from_text(self, receipt_text: str) -> Dict[str, Any]:
+        """디코딩된 영수증 텍스트 하나로 파싱 규칙 생성 (LLM 1회 호출)"""
+        # 프롬프트 생성 및 로깅 (TYPE만 생성하도록 변경된 프롬프트 사용)
+        prompt = self.prompt.format(receipt_text=receipt_text)
+        log_payload(logger, "[Generate Rule] GPT 프롬프트", prompt)
+        
+        # 전체 PARSER 규칙 생성
+        llm_response = self._call_llm(prompt)
+        log_payload(logger, "[Generate Rule] GPT 응답 원본", llm_response)
+        
+        # PARSER 추출
+        complete_xml = self._extract_parser(llm_response)
+        log_payload(logger, "[Generate Rule] 추출된 PARSER", complete_xml)
+        
+        # PARSER 구조 검증
+        self._validate_parser_structure(complete_xml)
+        logger.debug("[Generate Rule] PARSER 구조 검증 완료")
+        
+        # 생성된 규칙을 실제 데이터에 적용해보기 (검증)
+        try:
+            logger.debug("[Generate Rule] 생성된 규칙 적용 테스트 시작")
+            self.validate_rule(receipt_text, complete_xml)
+            logger.debug("[Generate Rule] 규칙 적용 결과 검증 완료")
+        except Exception as e:
+            logger.error(f"[Generate Rule] 규칙 적용 테스트 실패: {str(e)}")
+            raise ParserError(f"생성된 파싱 규칙 검증 실패: {str(e)}")
+        
+        # 버전 생성 (숫자 형식으로 변경)
+        version = "1.0"
+        
+        return {
+            "status": "ok",
+            "rule_xml": complete_xml,
+            "version": version
+        }
+
+    def validate_rule(self, receipt_text: str, parser_xml: str) -> str:
+        """파싱 규칙을 영수증 텍스트에 적용하고 결과 구조를 검증 (LLM 호출 없음)"""
+        test_result = self.apply_rule(receipt_text, parser_xml)
+        log_payload(logger, "[Validate Rule] 규칙 적용 결과", test_result)
+        self._validate_xml_structure(test_result)
+        return test_result
+
+    @staticmethod
+    def layout_fingerprint(receipt_text: str) -> str:
+        """
+        영수증 레이아웃 지문 계산
+
+        같은 양식(헤더 + [라벨] 구성)의 영수증은 숫자/메뉴 내용이 달라도 같은 지문을 가지므로,
+        배치 요청에서 레이아웃별로 LLM을 한 번만 호출하는 데 사용합니다.
+        """
+        lines = [line for line in receipt_text.splitlines() if line.strip()]
+        # 헤더(앞 2줄)는 숫자만 가려서 사용 - 신규/변경/취소 같은 타입 차이는 유지
+        header = [re.sub(r'\s+', ' ', re.sub(r'\d', '9', line)).strip() for line in lines[:2]]
+        # [주문번호], [테이블] 같은 라벨은 등장 순서대로 중복 없이 사용
+        labels = list(dict.fromkeys(re.findall(r'\[[^\]\d]{1,20}\]', receipt_text)))
+        digest = hashlib.sha1("\n".join(header + labels).encode("utf-8")).hexdigest()
+        return digest[:12]
+
     def apply_rule(self, receipt_text: str, parser_xml: str) -> str:
         """
         파싱 규칙을 적용하여 영수증 데이터를 XML로 변환
@@ -656,6 +726,7 @@ class Parser:
         Returns:
             파싱된 영수증 XML 문자열
         """
+        start = time.perf_counter()
         try:
             logger.debug("[Apply Rule] 파싱 규칙 적용 시작")
 
@@ -720,6 +791,8 @@ class Parser:
             logger.error(f"[Apply Rule] 규칙 적용 실패: {str(e)}")
             logger.error(f"[Apply Rule] 스택 트레이스:\n{traceback.format_exc()}")
             raise ParserError(f"파싱 규칙 적용 실패: {str(e)}")
+        finally:
+            RULE_APPLY_SECONDS.observe(time.perf_counter() - start)
 
     def _validate_parser_structure(self, parser_xml: str) -> None:
         """
@@ -813,7 +886,7 @@ class Parser:
         try:
             logger.debug(f"[Merge Rule] 현재 버전: {current_version}")
             logger.debug(f"[Merge Rule] 입력 데이터 타입: {type(receipt_raw_data)}")
-            logger.debug(f"[Merge Rule] 입력 데이터: {receipt_raw_data}")
+            log_payload(logger, "[Merge Rule] 입력 데이터", receipt_raw_data)
             
             # receipt_raw_data에서 raw_data(hex) 추출 - 다양한 경우 처리
             raw_data = None
@@ -823,10 +896,10 @@ class Parser:
                 raw_data = receipt_raw_data["receipt_data"]["raw_data"]
                 logger.debug("[Merge Rule] raw_data 추출: nested dict 구조")
             
-            # 케이스 2: receipt_data가 직접 hex 문자열인 경우
-            elif isinstance(receipt_raw_data.get("receipt_data"), str):
+            # 케이스 2: receipt_data가 직접 hex 문자열이거나 v1.1 바이너리 프레임인 경우
+            elif isinstance(receipt_raw_data.get("receipt_data"), (str, bytes)):
                 raw_data = receipt_raw_data["receipt_data"]
-                logger.debug("[Merge Rule] raw_data 추출: 직접 hex 문자열")
+                logger.debug("[Merge Rule] raw_data 추출: 직접 hex 문자열 / 바이너리")
             
             # 케이스 3: raw_data가 직접 있는 경우
             elif "raw_data" in receipt_raw_data:
@@ -839,63 +912,67 @@ class Parser:
                 
             # hex 데이터를 텍스트로 변환
             receipt_text = self._decode_raw_data(raw_data)
-            logger.debug(f"[Merge Rule] 변환된 영수증 텍스트:\n{receipt_text}")
+            log_payload(logger, "[Merge Rule] 변환된 영수증 텍스트", receipt_text)
             
-            logger.debug(f"[Merge Rule] 기존 XML 길이: {len(current_xml)}")
-            logger.debug(f"[Merge Rule] 새로운 영수증 텍스트: {receipt_text[:200]}...")
-            
-            # GPT를 통해 병합된 PARSER 생성
-            prompt = self.merge_prompt.format(current_xml=current_xml, receipt_data=receipt_text)
-            logger.debug(f"[Merge Rule] GPT 프롬프트:\n{prompt}")
-            
-            response = self.llm.invoke(prompt)
-            merged_xml = response.content.strip()
-            
-            logger.debug(f"[Merge Rule] GPT 응답:\n{merged_xml}")
-            
-            # PARSER 블록 추출 및 검증
-            parser_xml = self._extract_parser(merged_xml)
-            if not parser_xml:
-                raise ParserError("병합된 응답에서 PARSER 블록을 찾을 수 없습니다")
-            
-            # XML 유효성 검증
-            self._validate_parser_structure(parser_xml)
-            logger.debug("[Merge Rule] PARSER 구조 검증 완료")
-            
-            # 병합된 규칙을 실제 데이터에 적용해보기 (검증)
-            try:
-                logger.debug("[Merge Rule] 병합된 규칙 적용 테스트 시작")
-                test_result = self.apply_rule(receipt_text, parser_xml)
-                logger.debug(f"[Merge Rule] 규칙 적용 결과:\n{test_result}")
-                
-                # 파싱 결과 검증
-                self._validate_xml_structure(test_result)
-                logger.debug("[Merge Rule] 병합된 규칙 적용 결과 검증 완료")
-                
-            except Exception as e:
-                logger.error(f"[Merge Rule] 병합된 규칙 적용 테스트 실패: {str(e)}")
-                raise ParserError(f"병합된 파싱 규칙 검증 실패: {str(e)}")
-            
-            # 새 버전 생성 (기존 버전에서 0.1 증가)
-            try:
-                new_version = str(float(current_version or "1.0") + 0.1)
-            except (ValueError, TypeError):
-                new_version = "1.1"
-            
-            logger.info("[Merge Rule] PARSER 병합 완료")
-            
-            # generate_rule과 동일한 형식으로 반환
-            return {
-                "status": "ok",
-                "merged_rule_xml": parser_xml,
-                "version": new_version,
-                "changes": "기존 PARSER와 새로운 영수증 데이터 병합 완료"
-            }
+            return self.merge_rule_from_text(current_xml, current_version, receipt_text)
             
         except Exception as e:
             logger.error(f"[Merge Rule] PARSER 병합 실패: {str(e)}")
             raise ParserError(f"PARSER 병합 실패: {str(e)}")
 
+    def merge_rule_from_text(self, current_xml: str, current_version: str, receipt_text: str) -> Dict[str, Any]:
+        """디코딩된 영수증 텍스트 하나를 기존 PARSER에 병합 (LLM 1회 호출)"""
+        logger.debug(f"[Merge Rule] 기존 XML 길이: {len(current_xml)}")
+        logger.debug("[Merge Rule] 새로운 영수증 텍스트: %s...", receipt_text[:200])
+        
+        # GPT를 통해 병합된 PARSER 생성
+        prompt = self.merge_prompt.format(current_xml=current_xml, receipt_data=receipt_text)
+        log_payload(logger, "[Merge Rule] GPT 프롬프트", prompt)
+        
+        response = self._invoke_llm(prompt, "merge")
+        merged_xml = response.content.strip()
+        
+        log_payload(logger, "[Merge Rule] GPT 응답", merged_xml)
+        
+        # PARSER 블록 추출 및 검증
+        parser_xml = self._extract_parser(merged_xml)
+        if not parser_xml:
+            raise ParserError("병합된 응답에서 PARSER 블록을 찾을 수 없습니다")
+        
+        # XML 유효성 검증
+        self._validate_parser_structure(parser_xml)
+        logger.debug("[Merge Rule] PARSER 구조 검증 완료")
+        
+        # 병합된 규칙을 실제 데이터에 적용해보기 (검증)
+        try:
+            logger.debug("[Merge Rule] 병합된 규칙 적용 테스트 시작")
+            self.validate_rule(receipt_text, parser_xml)
+            logger.debug("[Merge Rule] 병합된 규칙 적용 결과 검증 완료")
+        except Exception as e:
+            logger.error(f"[Merge Rule] 병합된 규칙 적용 테스트 실패: {str(e)}")
+            raise ParserError(f"병합된 파싱 규칙 검증 실패: {str(e)}")
+        
+        # 새 버전 생성 (기존 버전에서 0.1 증가)
+        new_version = self.next_version(current_version)
+        
+        logger.info("[Merge Rule] PARSER 병합 완료")
+        
+        # generate_rule과 동일한 형식으로 반환
+        return {
+            "status": "ok",
+            "merged_rule_xml": parser_xml,
+            "version": new_version,
+            "changes": "기존 PARSER와 새로운 영수증 데이터 병합 완료"
+        }
+
+    @staticmethod
+    def next_version(current_version: str) -> str:
+        """병합 후 새 버전 계산 (기존 버전에서 0.1 증가)"""
+        try:
+            return str(float(current_version or "1.0") + 0.1)
+        except (ValueError, TypeError):
+            return "1.1"
+
     def _extract_parser_block(self, response: str) -> str:
         """응답에서 PARSER 블록을 추출합니다. (기존 _extract_parser 메서드 활용)"""
         return self._extract_parser(response)
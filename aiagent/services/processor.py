@@ -1,19 +1,24 @@
-import json
 import logging
 import time
 import traceback
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from sqlalchemy.orm import Session
 from .parser import parser, ParserError
+from .record_writer import record_writer
 from ..api.admin import update_metrics
 from ..database import SessionLocal  # PostgreSQL 통합 (기존: ..db.core)
 from ..models.receipt_record import ReceiptRecord  # PostgreSQL 통합 모델
-from ..core.protocol import MessageFormat
+from ..core.protocol import MessageFormat, AIRequest, AIBatchRequest, json_dumps
 from ..utils.logger import get_logger
+from ..utils.metrics import registry
 
 # 로깅 설정
 logger = get_logger('aiagent.services.processor')
 
+# 처리 단계별 메트릭
+PROCESSING_SECONDS = registry.histogram("aiagent_processing_seconds", "AI 요청 처리 시간 (디코딩 + LLM + 검증 + DB 저장)",
+                                        ("command",), buckets=(0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300))
+
 class ProcessingError(Exception):
     """처리 중 발생하는 예외"""
     pass
@@ -30,7 +35,6 @@ class BillProcessor:
         logger.debug("[Initialize] BillProcessor 초기화 완료")
 
     def _save_to_db(self, 
-                    session: Session,
                     client_id: str,
                     transaction_id: str,
                     raw_data: str,
@@ -38,14 +42,11 @@ class BillProcessor:
                     is_valid: bool = False,
                     error_message: Optional[str] = None,
                     processing_time: float = 0.0) -> ReceiptRecord:
-        """처리 결과를 DB에 저장"""
+        """처리 결과를 DB 저장 대기열에 추가 (record_writer가 배치로 저장)"""
         try:
-            logger.debug(f"[DB Save] 저장 시작 - transaction_id: {transaction_id}")
+            logger.debug(f"[DB Save] 저장 요청 - transaction_id: {transaction_id}")
             logger.debug(f"[DB Save] 상태 - is_valid: {is_valid}, processing_time: {processing_time:.2f}s")
             
-            # is_valid 값에 따라 status 결정
-            status = "SUCCESS" if is_valid else "ERROR"
-            
             if is_valid:
                 record = ReceiptRecord.create_success(
                     client_id=client_id,
@@ -64,20 +65,31 @@ class BillProcessor:
                     processing_time=processing_time
                 )
             
-            session.add(record)
-            session.commit()
-            
-            logger.debug("[DB Save] 저장 완료")
+            # 재시도 요청(같은 transaction_id)은 record_writer가 기존 기록을 갱신
+            record_writer.submit(record)
             return record
             
         except Exception as e:
             logger.error(f"[DB Save] 저장 실패: {str(e)}")
             logger.error(f"[DB Save] 스택 트레이스:\n{traceback.format_exc()}")
-            session.rollback()
             raise ProcessingError(f"DB 저장 실패: {str(e)}")
 
+    def _find_completed(self, session: Session, client_id: str, transaction_id: str) -> Optional[ReceiptRecord]:
+        """같은 transaction_id로 이미 성공 처리된 기록 조회 (재전송 요청용)"""
+        if not transaction_id or transaction_id == "UNKNOWN":
+            return None
+        try:
+            return (session.query(ReceiptRecord)
+                    .filter(ReceiptRecord.transaction_id == transaction_id,
+                            ReceiptRecord.client_id == client_id,
+                            ReceiptRecord.is_valid == True)
+                    .first())
+        except Exception as e:
+            logger.warning(f"[DB Lookup] 기존 처리 결과 조회 실패: {str(e)}")
+            session.rollback()
+            return None
+
     def _handle_error(self, 
-                     session: Session,
                      client_id: str,
                      transaction_id: str,
                      raw_data: str,
@@ -94,7 +106,6 @@ class BillProcessor:
             # DB에 오류 기록 (관리자 페이지에서 확인 가능)
             logger.debug("[Error Handler] DB에 오류 기록 시도")
             self._save_to_db(
-                session=session,
                 client_id=client_id,
                 transaction_id=transaction_id,
                 raw_data=raw_data,
@@ -102,7 +113,7 @@ class BillProcessor:
                 error_message=error_message,
                 processing_time=processing_time
             )
-            logger.info(f"[Error Handler] 오류가 DB에 기록되었습니다. 관리자 페이지에서 확인 가능: {transaction_id}")
+            logger.info(f"[Error Handler] 오류 기록을 DB 저장 대기열에 추가했습니다. 관리자 페이지에서 확인 가능: {transaction_id}")
             
         except Exception as e:
             logger.error(f"[Error Handler] 오류 처리 중 추가 오류 발생: {str(e)}")
@@ -115,41 +126,48 @@ class BillProcessor:
             "transaction_id": transaction_id
         }
 
-    def process_ai_generate(self, client_id: str, raw_data: bytes) -> Dict[str, Any]:
+    def process_ai_generate(self, request: AIRequest) -> Dict[str, Any]:
         """
         AI 생성 요청 처리
         
         Args:
-            client_id: 요청 클라이언트 ID
-            raw_data: JSON 형식의 바이트 데이터
+            request: 한 번만 디코딩된 요청 envelope (client_id, transaction_id, data)
             
         Returns:
             생성된 파싱 규칙과 버전 정보
         """
         start_time = time.time()
         session = SessionLocal()
+        client_id = request.client_id
+        transaction_id = request.transaction_id
+        data = request.data
         
         logger.debug(f"[AI Generate Start] client_id: {client_id}")
         
         try:
-            # JSON 디코딩
-            data = json.loads(raw_data.decode('utf-8'))
-            transaction_id = data.get("transaction_id", "UNKNOWN")
-            
             # 데이터 검증
             if not MessageFormat.validate_ai_generate_data(data):
                 raise ProcessingError("AI_GENERATE 필수 필드가 누락되었습니다")
             
+            # 이미 처리된 transaction_id면 LLM 호출 없이 저장된 결과 반환
+            completed = self._find_completed(session, client_id, transaction_id)
+            if completed is not None:
+                logger.info(f"[AI Generate] 기존 처리 결과 재사용 - transaction_id: {transaction_id}")
+                return {
+                    "status": "ok",
+                    "rule_xml": completed.xml_result,
+                    "version": "1.0"
+                }
+            
             # 파싱 규칙 생성
             result = self.parser.generate_rule(data)
             
             # DB에 결과 저장
             processing_time = time.time() - start_time
             self._save_to_db(
-                session=session,
                 client_id=client_id,
                 transaction_id=transaction_id,
-                raw_data=raw_data.decode('utf-8'),
+                raw_data=request.raw_text,
                 xml_result=result["rule_xml"],
                 is_valid=True,
                 processing_time=processing_time
@@ -160,41 +178,50 @@ class BillProcessor:
         except Exception as e:
             processing_time = time.time() - start_time
             return self._handle_error(
-                session=session,
                 client_id=client_id,
-                transaction_id=data.get("transaction_id", "UNKNOWN") if 'data' in locals() else "UNKNOWN",
-                raw_data=raw_data.decode(errors='ignore'),
+                transaction_id=transaction_id,
+                raw_data=request.raw_text,
                 error=e,
                 processing_time=processing_time
             )
         finally:
             session.close()
+            PROCESSING_SECONDS.labels("AI_GENERATE").observe(time.time() - start_time)
 
-    def process_ai_merge(self, client_id: str, raw_data: bytes) -> Dict[str, Any]:
+    def process_ai_merge(self, request: AIRequest) -> Dict[str, Any]:
         """
         AI 병합 요청 처리
         
         Args:
-            client_id: 요청 클라이언트 ID
-            raw_data: JSON 형식의 바이트 데이터
+            request: 한 번만 디코딩된 요청 envelope (client_id, transaction_id, data)
             
         Returns:
             병합된 파싱 규칙과 새 버전 정보
         """
         start_time = time.time()
         session = SessionLocal()
+        client_id = request.client_id
+        transaction_id = request.transaction_id
+        data = request.data
         
         logger.debug(f"[AI Merge Start] client_id: {client_id}")
         
         try:
-            # JSON 디코딩
-            data = json.loads(raw_data.decode('utf-8'))
-            transaction_id = data.get("transaction_id", "UNKNOWN")
-            
             # 데이터 검증
             if not MessageFormat.validate_ai_merge_data(data):
                 raise ProcessingError("AI_MERGE 필수 필드가 누락되었습니다")
             
+            # 이미 처리된 transaction_id면 LLM 호출 없이 저장된 결과 반환
+            completed = self._find_completed(session, client_id, transaction_id)
+            if completed is not None:
+                logger.info(f"[AI Merge] 기존 처리 결과 재사용 - transaction_id: {transaction_id}")
+                return {
+                    "status": "ok",
+                    "merged_rule_xml": completed.xml_result,
+                    "version": self.parser.next_version(data["current_version"]),
+                    "changes": "기존 PARSER와 새로운 영수증 데이터 병합 완료"
+                }
+            
             # XML 병합
             result = self.parser.merge_rule(
                 current_xml=data["current_xml"],
@@ -205,10 +232,9 @@ class BillProcessor:
             # DB에 결과 저장
             processing_time = time.time() - start_time
             self._save_to_db(
-                session=session,
                 client_id=client_id,
                 transaction_id=transaction_id,
-                raw_data=raw_data.decode('utf-8'),
+                raw_data=request.raw_text,
                 xml_result=result["merged_rule_xml"],
                 is_valid=True,
                 processing_time=processing_time
@@ -219,15 +245,169 @@ class BillProcessor:
         except Exception as e:
             processing_time = time.time() - start_time
             return self._handle_error(
-                session=session,
                 client_id=client_id,
-                transaction_id=data.get("transaction_id", "UNKNOWN") if 'data' in locals() else "UNKNOWN",
-                raw_data=raw_data.decode(errors='ignore'),
+                transaction_id=transaction_id,
+                raw_data=request.raw_text,
+                error=e,
+                processing_time=processing_time
+            )
+        finally:
+            session.close()
+            PROCESSING_SECONDS.labels("AI_MERGE").observe(time.time() - start_time)
+
+    def process_ai_batch(self, request: AIBatchRequest) -> Dict[str, Any]:
+        """
+        AI 배치 요청 처리 (AI_GENERATE_BATCH / AI_MERGE_BATCH)
+        
+        영수증을 모두 디코딩한 뒤 레이아웃 지문별로 묶어 레이아웃마다 LLM을 한 번만 호출하고,
+        같은 레이아웃의 나머지 영수증은 생성된 규칙을 적용해 검증만 합니다.
+        
+        Args:
+            request: 디코딩된 배치 요청 envelope
+            
+        Returns:
+            영수증별 결과 목록 (results), 레이아웃 수, MERGE의 경우 최종 병합 규칙
+        """
+        start_time = time.time()
+        session = SessionLocal()
+        client_id = request.client_id
+        transaction_id = request.transaction_id
+        items = request.items
+        
+        logger.debug(f"[AI Batch Start] client_id: {client_id}, mode: {request.mode}, 영수증 수: {len(items)}")
+        
+        try:
+            if not MessageFormat.validate_ai_batch_data(request.data):
+                raise ProcessingError("AI 배치 필수 필드가 누락되었습니다")
+            
+            results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+            texts: Dict[int, str] = {}
+            groups: Dict[str, List[int]] = {}
+            
+            # 1. 전체 디코딩 및 레이아웃별 그룹화
+            for index, item in enumerate(items):
+                if request.mode == "GENERATE":
+                    completed = self._find_completed(session, client_id, item["transaction_id"])
+                    if completed is not None:
+                        results[index] = {"transaction_id": item["transaction_id"], "layout": None,
+                                          "status": "ok", "rule_xml": completed.xml_result, "version": "1.0"}
+                        continue
+                try:
+                    texts[index] = self.parser._decode_raw_data(item["receipt_data"])
+                except ParserError as e:
+                    results[index] = self._batch_item_error(item, None, e)
+                    continue
+                groups.setdefault(self.parser.layout_fingerprint(texts[index]), []).append(index)
+            
+            logger.info(f"[AI Batch] {len(items)}건 → 레이아웃 {len(groups)}개 (LLM 호출 {len(groups)}회)")
+            
+            # 2. 레이아웃별 LLM 호출
+            batch_data = {}
+            if request.mode == "GENERATE":
+                for layout, indexes in groups.items():
+                    self._generate_for_layout(items, texts, layout, indexes, results)
+            else:
+                batch_data = self._merge_layouts(request, texts, groups, results)
+            
+            # 3. 영수증별 결과 저장
+            processing_time = (time.time() - start_time) / max(len(items), 1)
+            for index, item in enumerate(items):
+                if index not in texts:
+                    continue  # 기존 처리 결과를 재사용한 영수증
+                result = results[index]
+                try:
+                    self._save_to_db(
+                        client_id=client_id,
+                        transaction_id=item["transaction_id"],
+                        raw_data=request.item_raw_text(item),
+                        xml_result=result.get("rule_xml") or batch_data.get("merged_rule_xml"),
+                        is_valid=result["status"] == "ok",
+                        error_message=result.get("error"),
+                        processing_time=processing_time
+                    )
+                except ProcessingError as e:
+                    logger.error(f"[AI Batch] 영수증 결과 저장 실패 - transaction_id: {item['transaction_id']}: {e}")
+            
+            return {
+                "status": "ok",
+                "results": results,
+                "layouts": len(groups),
+                **batch_data
+            }
+            
+        except Exception as e:
+            processing_time = time.time() - start_time
+            return self._handle_error(
+                client_id=client_id,
+                transaction_id=transaction_id,
+                raw_data=json_dumps(request.data).decode('utf-8'),
                 error=e,
                 processing_time=processing_time
             )
         finally:
             session.close()
+            PROCESSING_SECONDS.labels(request.command.decode()).observe(time.time() - start_time)
+
+    @staticmethod
+    def _batch_item_error(item: Dict[str, Any], layout: Optional[str], error: Exception) -> Dict[str, Any]:
+        return {"transaction_id": item["transaction_id"], "layout": layout, "status": "error", "error": str(error)}
+
+    def _generate_for_layout(self, items, texts, layout: str, indexes: List[int], results) -> None:
+        """레이아웃 대표 영수증으로 규칙을 생성하고 같은 레이아웃의 영수증에 적용 검증"""
+        try:
+            generated = self.parser.generate_rule_from_text(texts[indexes[0]])
+        except Exception as e:
+            logger.error(f"[AI Batch] 레이아웃 {layout} 규칙 생성 실패: {e}")
+            for index in indexes:
+                results[index] = self._batch_item_error(items[index], layout, e)
+            return
+        
+        for index in indexes:
+            try:
+                if index != indexes[0]:
+                    self.parser.validate_rule(texts[index], generated["rule_xml"])
+                results[index] = {"transaction_id": items[index]["transaction_id"], "layout": layout,
+                                  "status": "ok", "rule_xml": generated["rule_xml"],
+                                  "version": generated["version"]}
+            except Exception as e:
+                results[index] = self._batch_item_error(items[index], layout, e)
+
+    def _merge_layouts(self, request: AIBatchRequest, texts, groups, results) -> Dict[str, Any]:
+        """레이아웃 대표 영수증을 순서대로 병합하고, 최종 규칙을 모든 영수증에 적용 검증"""
+        items = request.items
+        current_xml = request.data["current_xml"]
+        current_version = request.data["current_version"]
+        merged_layouts = 0
+        
+        for layout, indexes in groups.items():
+            try:
+                merged = self.parser.merge_rule_from_text(current_xml, current_version, texts[indexes[0]])
+                current_xml, current_version = merged["merged_rule_xml"], merged["version"]
+                merged_layouts += 1
+            except Exception as e:
+                logger.error(f"[AI Batch] 레이아웃 {layout} 병합 실패: {e}")
+                for index in indexes:
+                    results[index] = self._batch_item_error(items[index], layout, e)
+                continue
+            for index in indexes:
+                results[index] = {"transaction_id": items[index]["transaction_id"], "layout": layout, "status": "ok"}
+        
+        # 이후 레이아웃 병합이 앞선 레이아웃을 깨뜨리지 않았는지 최종 규칙으로 확인
+        for index, result in enumerate(results):
+            if result is None or result["status"] != "ok":
+                continue
+            try:
+                self.parser.validate_rule(texts[index], current_xml)
+                result["version"] = current_version
+            except Exception as e:
+                results[index] = self._batch_item_error(items[index], result["layout"],
+                                                        ParserError(f"최종 병합 규칙 적용 실패: {e}"))
+        
+        return {
+            "merged_rule_xml": current_xml,
+            "version": current_version,
+            "changes": f"{merged_layouts}/{len(groups)}개 레이아웃 병합 완료"
+        }
 
 # 싱글톤 인스턴스 생성
 try:
@@ -0,0 +1,278 @@
+"""
+receipt_records 비동기 배치 저장
+
+AI 요청 처리 결과(성공 / 오류)를 요청 경로에서 바로 커밋하지 않고 대기열에 넣은 뒤,
+백그라운드 스레드가 모아서 한 번의 multi-row INSERT ... ON CONFLICT로 저장합니다.
+AI_OK 응답이 PostgreSQL 왕복을 기다리지 않고, 요청마다 발생하던 커밋 비용이 배치당 한 번으로 줄어듭니다.
+
+- 배치 크기(RECORD_WRITER_BATCH_SIZE) 또는 첫 레코드 이후 경과 시간(RECORD_WRITER_FLUSH_INTERVAL) 도달 시 저장
+- 대기열이 가득 차면 호출 스레드가 최대 RECORD_WRITER_PUT_TIMEOUT초 기다린 뒤 직접 저장 (백프레셔, 유실 없음)
+- 연결 오류 등은 지수 백오프로 재시도, 데이터 오류는 레코드별로 나눠 저장하여 문제 레코드만 제외
+- 종료 시(close / atexit) 대기열에 남은 레코드를 모두 저장
+
+재시도 요청은 같은 transaction_id(UNIQUE)를 사용하므로 기존 기록을 갱신합니다 (created_at 유지).
+다른 클라이언트의 기록과 transaction_id가 겹치면 기존 기록을 덮어쓰지 않고 새 기록을 버립니다 (경고 로그).
+아직 저장되지 않은 결과에 대한 재전송은 core.result_cache의 메모리 캐시가 응답합니다.
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from ..database import engine
+from ..models.receipt_record import ReceiptRecord
+from ..utils.logger import get_logger
+from ..utils.metrics import registry
+
+logger = get_logger('aiagent.services.record_writer')
+
+RECORD_WRITER_ASYNC = os.getenv("RECORD_WRITER_ASYNC", "true").lower() in ("1", "true", "yes")  # false: 요청 경로에서 바로 저장
+RECORD_WRITER_BATCH_SIZE = int(os.getenv("RECORD_WRITER_BATCH_SIZE", "100"))
+RECORD_WRITER_FLUSH_INTERVAL = float(os.getenv("RECORD_WRITER_FLUSH_INTERVAL", "0.5"))  # 초
+RECORD_WRITER_QUEUE_SIZE = int(os.getenv("RECORD_WRITER_QUEUE_SIZE", "10000"))
+RECORD_WRITER_PUT_TIMEOUT = float(os.getenv("RECORD_WRITER_PUT_TIMEOUT", "1.0"))  # 초
+RECORD_WRITER_MAX_RETRIES = int(os.getenv("RECORD_WRITER_MAX_RETRIES", "3"))
+
+DB_WRITE_SECONDS = registry.histogram("aiagent_db_write_seconds", "receipt_records 저장 시간 (배치 단위)", ("status",))
+DB_WRITE_BATCH_ROWS = registry.histogram("aiagent_db_write_batch_rows", "receipt_records 배치당 레코드 수",
+                                         buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000))
+DB_WRITE_ROWS = registry.counter("aiagent_db_write_rows_total", "receipt_records 저장 결과별 레코드 수", ("result",))
+_rows_written = DB_WRITE_ROWS.labels("written")
+_rows_sync = DB_WRITE_ROWS.labels("sync")  # 대기열 초과 / 종료 후 호출 스레드에서 직접 저장
+_rows_failed = DB_WRITE_ROWS.labels("failed")
+_rows_conflict = DB_WRITE_ROWS.labels("conflict")  # 다른 클라이언트의 같은 transaction_id
+
+_STOP = object()
+
+# 재시도 시 갱신하지 않는 컬럼
+_KEEP_ON_CONFLICT = ("id", "client_id", "transaction_id", "created_at")
+
+
+def record_to_row(record: ReceiptRecord) -> Dict[str, Any]:
+    """
+    ORM 객체를 INSERT용 dict로 변환
+
+    ORM flush 때 채워지던 컬럼 기본값(error_message="", created_at 등)을 여기서 채우므로
+    created_at은 저장 시점이 아닌 처리 완료 시점이 됩니다.
+    """
+    row = {}
+    for column in ReceiptRecord.__table__.columns:
+        if column.primary_key:
+            continue
+        value = getattr(record, column.name, None)
+        default = column.default
+        if value is None and default is not None:
+            if default.is_scalar:
+                value = default.arg
+            elif default.is_callable:
+                value = default.arg(None)
+        row[column.name] = value
+    return row
+
+
+def _skip_conflict(row: Dict[str, Any]):
+    """다른 클라이언트의 기록과 transaction_id가 겹쳐 저장하지 않은 레코드"""
+    _rows_conflict.inc()
+    logger.warning(f"[Record Writer] 다른 클라이언트의 기록과 transaction_id가 겹쳐 저장하지 않습니다 "
+                   f"- client_id: {row['client_id']}, transaction_id: {row['transaction_id']}")
+
+
+class ReceiptRecordWriter:
+    """receipt_records 배치 저장 백그라운드 스레드"""
+
+    def __init__(self,
+                 batch_size: int = RECORD_WRITER_BATCH_SIZE,
+                 flush_interval: float = RECORD_WRITER_FLUSH_INTERVAL,
+                 queue_size: int = RECORD_WRITER_QUEUE_SIZE,
+                 put_timeout: float = RECORD_WRITER_PUT_TIMEOUT,
+                 max_retries: int = RECORD_WRITER_MAX_RETRIES,
+                 asynchronous: bool = RECORD_WRITER_ASYNC):
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = max(flush_interval, 0.0)
+        self.put_timeout = put_timeout
+        self.max_retries = max(max_retries, 0)
+        self.asynchronous = asynchronous
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(queue_size, 0))
+        self._thread = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    # === 요청 경로 ===
+
+    def submit(self, record: ReceiptRecord) -> None:
+        """
+        처리 결과 저장 요청
+
+        비동기 모드에서는 대기열에 넣고 바로 반환합니다. 대기열이 put_timeout 동안 가득 차 있거나
+        종료된 뒤에는 호출 스레드에서 직접 저장하며, 이때 저장 실패는 예외로 전달됩니다.
+        """
+        row = record_to_row(record)
+        if self.asynchronous and not self._closed:
+            self._ensure_started()
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+                return
+            except queue.Full:
+                logger.warning("[Record Writer] 저장 대기열이 가득 차 직접 저장합니다 - transaction_id: %s",
+                               row["transaction_id"])
+        self._write_with_timing([row])
+        _rows_sync.inc()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="receipt-record-writer", daemon=True)
+                self._thread.start()
+                logger.info(f"[Record Writer] 시작 - 배치 {self.batch_size}건 / {self.flush_interval}초")
+
+    # === 백그라운드 스레드 ===
+
+    def _run(self):
+        batch: List[Dict[str, Any]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(deadline - time.monotonic(), 0.0) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None  # 첫 레코드 이후 flush_interval 경과
+
+            if item is _STOP:
+                batch.extend(self._drain())
+                for start in range(0, len(batch), self.batch_size):
+                    self._flush(batch[start:start + self.batch_size])
+                return
+            if item is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(item)
+                if len(batch) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            if batch:
+                self._flush(batch)
+                batch = []
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        rows = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return rows
+            if item is not _STOP:
+                rows.append(item)
+
+    def _flush(self, rows: List[Dict[str, Any]]):
+        """배치 저장 (일시적 오류는 재시도, 데이터 오류는 레코드별로 분리 저장)"""
+        # 같은 배치에 같은 transaction_id가 두 번 있으면 ON CONFLICT가 실패하므로 마지막 결과만 저장
+        # (다른 클라이언트의 같은 transaction_id는 먼저 들어온 기록을 유지)
+        latest: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            previous = latest.get(row["transaction_id"])
+            if previous is not None and previous["client_id"] != row["client_id"]:
+                _skip_conflict(row)
+                continue
+            latest[row["transaction_id"]] = row
+        rows = list(latest.values())
+        for attempt in range(self.max_retries + 1):
+            try:
+                _rows_written.inc(self._write_with_timing(rows))
+                return
+            except (DataError, IntegrityError) as e:
+                logger.error(f"[Record Writer] 배치 저장 실패 (데이터 오류), 레코드별로 저장합니다: {e}")
+                self._flush_each(rows)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    _rows_failed.inc(len(rows))
+                    logger.error(f"[Record Writer] 배치 {len(rows)}건 저장 실패 ({attempt + 1}회 시도), 기록을 버립니다: {e} "
+                                 f"- transaction_id: {[row['transaction_id'] for row in rows]}")
+                    return
+                backoff = min(0.5 * 2 ** attempt, 10.0)
+                logger.warning(f"[Record Writer] 배치 저장 실패, {backoff}초 후 재시도 ({attempt + 1}/{self.max_retries}): {e}")
+                time.sleep(backoff)
+
+    def _flush_each(self, rows: List[Dict[str, Any]]):
+        for row in rows:
+            try:
+                _rows_written.inc(self._write_with_timing([row]))
+            except Exception as e:
+                _rows_failed.inc()
+                logger.error(f"[Record Writer] 레코드 저장 실패 - transaction_id: {row['transaction_id']}: {e}")
+
+    def _write_with_timing(self, rows: List[Dict[str, Any]]) -> int:
+        start = time.perf_counter()
+        try:
+            written = self._write_rows(rows)
+        except Exception:
+            DB_WRITE_SECONDS.labels("error").observe(time.perf_counter() - start)
+            raise
+        DB_WRITE_SECONDS.labels("ok").observe(time.perf_counter() - start)
+        DB_WRITE_BATCH_ROWS.observe(len(rows))
+        return written
+
+    @staticmethod
+    def _write_rows(rows: List[Dict[str, Any]]) -> int:
+        """
+        multi-row INSERT ... ON CONFLICT (transaction_id) DO UPDATE 한 번으로 저장
+
+        같은 클라이언트의 기록만 갱신합니다 (client_id는 바꾸지 않음). Returns: 저장된 레코드 수
+        """
+        table = ReceiptRecord.__table__
+        stmt = pg_insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.transaction_id],
+            set_={column.name: stmt.excluded[column.name]
+                  for column in table.columns if column.name not in _KEEP_ON_CONFLICT},
+            where=table.c.client_id == stmt.excluded.client_id,
+        ).returning(table.c.transaction_id)
+        with engine.begin() as connection:
+            saved = set(connection.execute(stmt).scalars())
+        skipped = [row for row in rows if row["transaction_id"] not in saved]
+        for row in skipped:
+            _skip_conflict(row)
+        return len(rows) - len(skipped)
+
+    # === 종료 / 메트릭 ===
+
+    def close(self, timeout: float = 30.0):
+        """새 레코드 접수를 멈추고 대기열에 남은 레코드를 모두 저장한 뒤 스레드 종료"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is None:
+            return
+        pending = self._queue.qsize()
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(f"[Record Writer] {timeout}초 안에 대기열을 비우지 못했습니다 (남은 레코드 약 {self._queue.qsize()}건)")
+            return
+        # 종료 직전에 submit()이 넣은 레코드
+        leftovers = self._drain()
+        if leftovers:
+            self._flush(leftovers)
+        logger.info(f"[Record Writer] 종료 - 종료 시 저장한 레코드 {pending + len(leftovers)}건")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+# 싱글톤 인스턴스 (스레드는 첫 저장 요청 시 시작)
+record_writer = ReceiptRecordWriter()
+atexit.register(record_writer.close)
+
+registry.register_collector(lambda: [
+    ("aiagent_db_write_queue_depth", "gauge", "receipt_records 저장 대기 레코드 수",
+     [("", {}, record_writer.qsize())]),
+])
@@ -1,35 +1,83 @@
+"""
+통합 로거 설정
+
+로그 호출 스레드(브로커 수신 루프, AI 워커, API 요청)는 레코드를 큐에 넣기만 하고,
+콘솔 / 파일 출력은 QueueListener 백그라운드 스레드 하나가 담당합니다.
+- 큐가 가득 차면 호출 스레드를 막지 않고 레코드를 버립니다 (get_logging_stats의 dropped)
+- 프롬프트 / GPT 응답 / 영수증 원문 같은 큰 payload는 log_payload()로 레벨 확인 → 샘플링 → 길이 제한
+"""
+
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
 import threading
 import os
-from datetime import datetime
-import pytz
+from datetime import datetime, timedelta, timezone
 
 # 로거 설정 완료 여부를 추적하는 플래그
 _logger_configured = False
 _lock = threading.Lock()
+_listener = None
+_queue_handler = None
 
-# 한국 시간대 설정
-KST = pytz.timezone('Asia/Seoul')
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # 0: 무제한
+# 큰 payload 로그: 최대 출력 글자 수 / 출력 비율 (1.0: 항상, 0: 출력 안 함)
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+
+# 한국 시간대 설정 (서머타임이 없으므로 tz 데이터베이스 조회 없이 고정 UTC+9 사용)
+KST = timezone(timedelta(hours=9), "KST")
 
 class KSTFormatter(logging.Formatter):
-    """한국 시간대를 사용하는 로그 포맷터"""
-    
+    """
+    한국 시간대를 사용하는 로그 포맷터
+
+    같은 초에 찍힌 레코드는 초 단위까지 포맷한 문자열을 재사용합니다.
+    (DEBUG 레벨에서는 영수증 하나에 수십 개의 레코드가 같은 초에 기록됨)
+    datefmt가 없으면 logging 기본 형식처럼 뒤에 ",밀리초"를 붙입니다.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache = (None, None, "")  # (초, datefmt, 포맷된 문자열) - 한 번에 교체하여 스레드 간 일관성 유지
+
     def formatTime(self, record, datefmt=None):
         """로그 레코드의 시간을 한국 시간대로 변환"""
-        # UTC 시간을 한국 시간으로 변환
-        dt = datetime.fromtimestamp(record.created, tz=KST)
+        second = int(record.created)
+        cached_second, cached_datefmt, prefix = self._cache
+        if second != cached_second or datefmt != cached_datefmt:
+            prefix = datetime.fromtimestamp(second, tz=KST).strftime(datefmt or "%Y-%m-%d %H:%M:%S")
+            self._cache = (second, datefmt, prefix)
         if datefmt:
-            return dt.strftime(datefmt)
-        else:
-            return dt.strftime('%Y-%m-%d %H:%M:%S')
+            return prefix
+        return f"{prefix},{int(record.msecs):03d}"
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """큐가 가득 차면 호출 스레드를 기다리게 하지 않고 레코드를 버리는 QueueHandler"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 def setup_logger():
     """
     애플리케이션 전체에서 사용할 로거를 설정합니다.
     중복 호출을 방지하여 핸들러가 여러 번 추가되지 않도록 합니다.
+
+    루트 로거에는 QueueHandler만 붙이고 실제 출력 핸들러는 QueueListener 스레드에서 실행합니다.
+    로그 레벨은 LOG_LEVEL 환경변수(기본 INFO)를 따릅니다.
     """
-    global _logger_configured
+    global _logger_configured, _listener, _queue_handler
     
     with _lock:
         # 이미 설정되었으면 중복 설정 방지
@@ -40,9 +88,9 @@ def setup_logger():
         if 'TZ' not in os.environ:
             os.environ['TZ'] = 'Asia/Seoul'
         
-        # 루트 로거 설정
+        # 루트 로거 설정 (레벨 이하 로그는 레코드 생성 전에 걸러짐)
         root_logger = logging.getLogger()
-        root_logger.setLevel(logging.DEBUG)
+        root_logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
         
         # 기존 핸들러 제거
         for handler in root_logger.handlers[:]:
@@ -50,7 +98,6 @@ def setup_logger():
         
         # 콘솔 핸들러 설정
         console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(logging.DEBUG)
         
         # 한국 시간대를 사용하는 포맷터 설정
         formatter = KSTFormatter(
@@ -59,8 +106,13 @@ def setup_logger():
         )
         console_handler.setFormatter(formatter)
         
-        # 루트 로거에만 핸들러 추가
-        root_logger.addHandler(console_handler)
+        # 루트 로거에는 큐 핸들러만 추가하고 콘솔 출력은 백그라운드 스레드에서 처리
+        log_queue = queue.Queue(max(LOG_QUEUE_SIZE, 0))
+        _queue_handler = DroppingQueueHandler(log_queue)
+        root_logger.addHandler(_queue_handler)
+        _listener = logging.handlers.QueueListener(log_queue, console_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
         
         # aiagent 네임스페이스 로거들의 propagate 설정
         # 이렇게 하면 자식 로거들이 루트 로거로 메시지를 전파하여 한 번만 출력됩니다
@@ -87,4 +139,57 @@ def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     # 추가 핸들러 설정 없이 propagate로 처리
     logger.propagate = True
-    return logger 
\ No newline at end of file
+    return logger
+
+def add_handler(handler: logging.Handler):
+    """
+    출력 핸들러(파일 등)를 백그라운드 출력 스레드에 추가
+
+    루트 로거에 직접 addHandler하면 호출 스레드에서 디스크 I/O가 일어나므로 이 함수를 사용합니다.
+    핸들러 레벨 / 필터는 그대로 적용됩니다.
+    """
+    setup_logger()
+    with _lock:
+        # 실행 중인 리스너의 핸들러 목록을 바꾸지 않도록 잠시 멈춘 뒤 (남은 레코드 처리 후) 재시작
+        _listener.stop()
+        _listener.handlers = _listener.handlers + (handler,)
+        _listener.start()
+
+def stop_logging():
+    """큐에 남은 로그를 모두 출력하고 출력 스레드 종료 (프로세스 종료 시 atexit로 호출)"""
+    with _lock:
+        if _listener is not None and _listener._thread is not None:
+            _listener.stop()
+
+def get_logging_stats() -> dict:
+    """로그 큐 현황 (대기 중 레코드 수 / 큐가 가득 차서 버린 레코드 수)"""
+    if _queue_handler is None:
+        return {"queued": 0, "dropped": 0}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
+
+def truncate_payload(payload, max_chars: int = None) -> str:
+    """payload 문자열을 max_chars까지 자르고 생략한 길이를 표시"""
+    max_chars = LOG_PAYLOAD_MAX_CHARS if max_chars is None else max_chars
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        size = len(payload)
+        text = bytes(payload[:max_chars]).decode("utf-8", errors="replace")
+        return text if size <= max_chars else f"{text}... (+{size - max_chars} bytes)"
+    text = payload if isinstance(payload, str) else str(payload)
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... (+{len(text) - max_chars}자)"
+
+def log_payload(logger: logging.Logger, message: str, payload, level: int = logging.DEBUG):
+    """
+    큰 payload(프롬프트, GPT 응답, 영수증 원문 등) 로그
+
+    레벨이 꺼져 있거나 샘플링에서 빠지면 payload를 문자열로 만들지 않고 바로 반환합니다.
+    payload가 callable이면(json.dumps 등 비싼 변환) 출력하는 경우에만 호출합니다.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    if LOG_PAYLOAD_SAMPLE_RATE < 1.0 and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    if callable(payload):
+        payload = payload()
+    logger.log(level, "%s:\n%s", message, truncate_payload(payload), stacklevel=2)
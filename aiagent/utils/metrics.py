@@ -0,0 +1,278 @@
+"""
+Prometheus 메트릭 (텍스트 exposition 형식 0.0.4)
+
+prometheus_client 없이 라벨이 있는 카운터 / 게이지 / 히스토그램을 제공하는 최소 구현입니다.
+brokerserver.py도 같은 모듈을 사용하므로 표준 라이브러리만 사용합니다.
+
+- 값 갱신은 메트릭별 락 하나로 보호하며, 문자열 포맷팅은 수집(render) 시점에만 합니다.
+- 스케줄러 큐 깊이처럼 다른 객체가 이미 가진 값은 collector 콜백으로 수집 시점에 읽습니다.
+
+사용 예:
+    REQUESTS = registry.counter("aiagent_messages_total", "수신 메시지 수", ("command",))
+    REQUESTS.labels("AI_GENERATE").inc()
+
+    LATENCY = registry.histogram("aiagent_llm_request_seconds", "LLM 호출 시간", ("operation",))
+    with LATENCY.labels("generate").time():
+        ...
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# (이름 접미사, 라벨, 값)
+Sample = Tuple[str, Dict[str, str], float]
+# (이름, 타입, 설명, 샘플 목록)
+MetricFamily = Tuple[str, str, str, List[Sample]]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def render_family(name: str, metric_type: str, help_text: str, samples: Iterable[Sample]) -> str:
+    """메트릭 하나를 exposition 형식 문자열로 변환"""
+    lines = [f"# HELP {name} {_escape_help(help_text)}", f"# TYPE {name} {metric_type}"]
+    for suffix, labels, value in samples:
+        if labels:
+            label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+            lines.append(f"{name}{suffix}{{{label_text}}} {_format_value(value)}")
+        else:
+            lines.append(f"{name}{suffix} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def histogram_samples(labels: Dict[str, str], bounds: Sequence[float], cumulative: Sequence[int],
+                      total: float, count: int) -> List[Sample]:
+    """누적 버킷 값으로 히스토그램 샘플(_bucket / _sum / _count) 생성"""
+    samples = []
+    for bound, value in zip(bounds, cumulative):
+        samples.append(("_bucket", {**labels, "le": _format_value(float(bound))}, value))
+    if not bounds or bounds[-1] != math.inf:
+        samples.append(("_bucket", {**labels, "le": "+Inf"}, count))
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, count))
+    return samples
+
+
+class _Metric:
+    """라벨 조합별 child를 가지는 메트릭 공통 구현"""
+    metric_type = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """라벨 값 순서는 labelnames와 같음 (child는 캐시되므로 핫 패스에서 재사용 가능)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: 라벨 {self.labelnames} 값이 필요합니다: {values}")
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._new_child()
+        return child
+
+    def _label_dict(self, values: tuple) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def collect(self) -> List[MetricFamily]:
+        return [(self.name, self.metric_type, self.help, self.samples())]
+
+
+class _ValueChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = float(value)
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+    metric_type = "counter"
+
+    def _new_child(self):
+        return _ValueChild(self._lock)
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+    def samples(self) -> List[Sample]:
+        return [("", self._label_dict(key), child.value) for key, child in list(self._children.items())]
+
+
+class Gauge(Counter):
+    """현재 값 게이지"""
+    metric_type = "gauge"
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def dec(self, amount: float = 1.0):
+        self._default.dec(amount)
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum", "count")
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]):
+        self._lock = lock
+        self._bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self) -> _Timer:
+        """with 블록 실행 시간(초) 기록"""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """고정 버킷 히스토그램"""
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self._lock, self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        for key, child in list(self._children.items()):
+            with self._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative, running = [], 0
+            for value in counts:
+                running += value
+                cumulative.append(running)
+            samples.extend(histogram_samples(self._label_dict(key), self.buckets + (math.inf,),
+                                             cumulative, total, count))
+        return samples
+
+
+class MetricsRegistry:
+    """메트릭 / collector 등록 및 exposition 형식 출력"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help_text: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"이미 다른 형식으로 등록된 메트릭: {name}")
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """수집 시점에 호출되어 MetricFamily 목록을 반환하는 콜백 등록"""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def collect(self) -> List[MetricFamily]:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        families = [family for metric in metrics for family in metric.collect()]
+        for collector in collectors:
+            families.extend(collector())
+        return families
+
+    def render(self, extra: Optional[Iterable[MetricFamily]] = None) -> str:
+        families = self.collect()
+        if extra:
+            families.extend(extra)
+        return "".join(render_family(*family) for family in families)
+
+
+# 애플리케이션 전역 레지스트리
+registry = MetricsRegistry()
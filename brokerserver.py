@@ -4,6 +4,7 @@ AI AGENT ZeroMQ 브로커
 """
 import os
 import sys
+import json
 import logging
 from pathlib import Path
 
@@ -18,23 +19,82 @@ sys.path.insert(0, os.path.join(current_dir, '..'))
 
 # aiagent 모듈 import 시도
 try:
-    from aiagent.utils.logger import setup_logger, get_logger
+    from aiagent.utils.logger import setup_logger, get_logger, add_handler
     USE_CUSTOM_LOGGER = True
 except ImportError:
     # aiagent 모듈을 찾을 수 없는 경우 기본 로깅 사용
     USE_CUSTOM_LOGGER = False
     print("WARNING: aiagent 모듈을 찾을 수 없습니다. 기본 로깅을 사용합니다.")
 
+# Prometheus 메트릭 출력 (표준 라이브러리만 사용하는 모듈이라 로거와 별도로 import)
+try:
+    from aiagent.utils.metrics import render_family, histogram_samples, CONTENT_TYPE as METRICS_CONTENT_TYPE
+    HAS_METRICS = True
+except ImportError:
+    HAS_METRICS = False
+
 import zmq
 import time
 import threading
 import re
 import signal
+from bisect import bisect_left
+from collections import deque
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from logging.handlers import TimedRotatingFileHandler
 from zmq.utils.monitor import recv_monitor_message
 
 last_active = time.monotonic()  # 메시지 수신 시각 갱신
 
+BROKER_PORT = os.getenv("BROKER_PORT", "5555")
+ID_PATTERN = re.compile(rb"^[A-Z]{6}$")  # 6자리 허용
+# 명령별 평균 payload 크기(bytes)가 이 값 이상이면 payload 프레임을 복사 없이 zmq.Frame 그대로 전달
+# (작은 메시지는 Frame 객체 생성 비용이 복사보다 커서 기존 bytes 경로 유지, 0: zero-copy 비활성화)
+ZERO_COPY_THRESHOLD = int(os.getenv("BROKER_ZERO_COPY_THRESHOLD", str(zmq.COPY_THRESHOLD)))
+# 수신 시 bytes로 꺼내는 헤더 프레임 수: routing_id, b'', cmd, dest_id
+HEADER_FRAMES = 4
+# 메시지 전달마다 DEBUG 로그 기록 여부 (전달 fast path의 로깅 비용이 커서 기본 비활성화)
+LOG_FORWARDS = os.getenv("BROKER_LOG_FORWARDS", "false").lower() == "true"
+
+# 기능(capability) 협상 설정
+AI_AGENT_ID = os.getenv("AI_AGENT_ID", "AIAGNT").encode()  # 기능 협상 상대인 AI 에이전트 ID
+# 브로커에서 허용하는 기능 목록 (쉼표 구분, 비어있으면 제한 없음) - 단계적 배포용
+BROKER_CAPABILITIES = frozenset(
+    c.strip().lower() for c in os.getenv("BROKER_CAPABILITIES", "").split(",") if c.strip()
+)
+
+# 클라이언트 생존 확인: 마지막 수신(PING, AI 요청 / 응답 등 모든 메시지) 후 이 시간(초)이 지나면
+# 레지스트리에서 제거 (기본 0: 제거 안 함) - 사용하려면 모든 클라이언트가 이보다 짧은 주기로 PING을 보내야 함
+CLIENT_TTL = float(os.getenv("BROKER_CLIENT_TTL", "0"))
+# 만료 클라이언트 정리 주기 (초) - 수신 대기 타임아웃으로 구동되므로 수신 루프를 막지 않음
+SWEEP_INTERVAL = float(os.getenv("BROKER_SWEEP_INTERVAL", "10"))
+# store-and-forward: 연결이 끊긴 등록 클라이언트로 가는 메시지를 보관할 시간(초) (0: 사용 안 함)
+OUTBOX_TTL = float(os.getenv("BROKER_OUTBOX_TTL", "0"))
+OUTBOX_MAX_MESSAGES = int(os.getenv("BROKER_OUTBOX_MAX_MESSAGES", "100"))  # 목적지별 최대 보관 메시지 수
+# 요청 추적: AI 요청 ↔ 응답을 transaction_id로 연결하여 지연 시간 / 미응답(orphan) 집계
+# (서비스 그룹으로 재전송된 요청을 처음 멤버로 보내는 데에도 사용)
+TRACK_REQUESTS = os.getenv("BROKER_TRACK_REQUESTS", "true").lower() == "true"
+TRACK_MAX_OUTSTANDING = int(os.getenv("BROKER_TRACK_MAX_OUTSTANDING", "10000"))
+# 이 시간(초) 안에 응답이 없으면 orphan으로 집계 (POS 클라이언트 타임아웃과 동일하게 설정)
+REQUEST_TIMEOUTS = {
+    b"AI_GENERATE": float(os.getenv("BROKER_AI_TIMEOUT", "30")),
+    b"AI_MERGE": float(os.getenv("BROKER_AI_TIMEOUT", "30")),
+    b"AI_GENERATE_BATCH": float(os.getenv("BROKER_AI_BATCH_TIMEOUT", "300")),
+    b"AI_MERGE_BATCH": float(os.getenv("BROKER_AI_BATCH_TIMEOUT", "300")),
+}
+# JSON 전체를 파싱하지 않고 transaction_id 값만 찾음
+TXID_PATTERN = re.compile(rb'"transaction_id"\s*:\s*"([^"\\]{1,128})"')
+
+# 레지스트리 스냅샷 파일 (비어있으면 사용 안 함) - 재시작 시 클라이언트 재등록 없이 바로 라우팅 재개
+SNAPSHOT_PATH = os.getenv("BROKER_SNAPSHOT_PATH", "")
+SNAPSHOT_INTERVAL = float(os.getenv("BROKER_SNAPSHOT_INTERVAL", "30"))  # 변경이 있을 때만 저장 (초)
+SNAPSHOT_VERSION = 1
+
+# Prometheus /metrics HTTP 포트 (0: 사용 안 함) - 수신 루프와 별도 스레드에서 응답
+METRICS_PORT = int(os.getenv("BROKER_METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("BROKER_METRICS_HOST", "0.0.0.0")
+
 ZMQ_EVENT_MAP = {
     zmq.EVENT_CONNECTED: "CONNECTED",
     zmq.EVENT_CONNECT_DELAYED: "CONNECT_DELAYED",
@@ -68,13 +128,17 @@ else:
 
 # 파일 로거 추가 (broker 전용)
 broker_file_handler = TimedRotatingFileHandler("broker.log", when="midnight", backupCount=15, encoding="utf-8")
-broker_file_handler.setLevel(logging.DEBUG)
 broker_formatter = logging.Formatter(
     '[%(asctime)s][%(levelname)s] %(message)s',
     datefmt='%Y-%m-%d %H:%M:%S'
 )
 broker_file_handler.setFormatter(broker_formatter)
-logger.addHandler(broker_file_handler)
+if USE_CUSTOM_LOGGER:
+    # 수신 루프 스레드에서 디스크 I/O가 일어나지 않도록 로그 출력 스레드에서 기록
+    broker_file_handler.addFilter(logging.Filter("broker"))
+    add_handler(broker_file_handler)
+else:
+    logger.addHandler(broker_file_handler)
 
 def start_monitor(sock: zmq.Socket, name: str):
     """
@@ -96,315 +160,1221 @@ def start_monitor(sock: zmq.Socket, name: str):
     t.start()
     return t
 
-def broker():
-    # clients, p2p_info = load_clients_from_db(DB_PATH)  # 삭제
-    clients = {}
-    p2p_info = {}
-    logger.info(f"브로커 시작: 클라이언트 정보 메모리에서만 관리")
-    logger.error(f"브로커 시작: 클라이언트 정보 메모리에서만 관리")
+class ClientEntry:
+    """
+    등록된 클라이언트 정보 (ID / 주소는 수신한 bytes 그대로 보관)
 
-    ctx = zmq.Context()
-    socket = ctx.socket(zmq.ROUTER)
-    socket.bind("tcp://*:5555")
-    id_pattern = re.compile(r"^[A-Z]{6}$")  # 6자리 허용
+    tentative: 스냅샷에서 복원되어 아직 이 브로커에서 수신한 적 없는 항목
+    (첫 수신 시 확정되며, 수신이 없으면 생존 확인 만료로 제거됨)
+    group: 소속 서비스 그룹 ID (없으면 b"")
+    """
+    __slots__ = ("client_id", "routing_id", "ip", "port", "capabilities", "last_seen", "tentative", "group")
 
-    global last_active
-    while True:
-        msg = socket.recv_multipart()
-        last_active = time.monotonic()  # 메시지 수신 시각 갱신
-        if len(msg) < 3:
-            logger.warning(f"잘못된 프레임 수신: {msg}")
-            continue
-        client_rid, empty, cmd, *args = msg
-        logger.debug(f"수신: {msg}")
-
-        # 클라이언트 ID가 등록되어 있는지 확인 (REGISTER, GET_ADDR 명령은 제외)
-        if cmd not in (b"REGISTER", b"GET_ADDR"):
-            if not any(v == client_rid for v in clients.values()):
-                logger.warning(f"미등록 클라이언트: {client_rid}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Registration required"])
-                continue
+    def __init__(self, client_id: bytes, routing_id: bytes, ip: bytes, port: bytes,
+                 capabilities: frozenset, last_seen: float, tentative: bool = False, group: bytes = b""):
+        self.client_id = client_id
+        self.routing_id = routing_id
+        self.ip = ip
+        self.port = port
+        self.capabilities = capabilities
+        self.last_seen = last_seen
+        self.tentative = tentative
+        self.group = group
 
-        if cmd == b"REGISTER":
-            my_id = args[0].decode()
-            my_ip = args[1].decode() if len(args) > 1 else ""
-            my_port = args[2].decode() if len(args) > 2 else ""
-            if not id_pattern.match(my_id):
-                logger.info(f"잘못된 ID 등록 시도: {my_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid ID"])
-                continue
-            prev_rid = clients.get(my_id)
-            if prev_rid is not None and prev_rid != client_rid:
-                logger.info(f"{my_id}의 routing_id 갱신: {prev_rid} → {client_rid}")
-            clients[my_id] = client_rid  # routing_id는 메모리에서만 관리
-            p2p_info[my_id] = (my_ip, my_port)
-            logger.info(f"등록(갱신) 완료: {my_id}, ip={my_ip}, port={my_port}")
-            socket.send_multipart([client_rid, b"", b"OK"])
-            continue
-
-        elif cmd == b"GET_ADDR":
-            target_id = args[0].decode()
-            if target_id in p2p_info:
-                ip, port = p2p_info[target_id]
-                logger.info(f"GET_ADDR: {target_id} → ip={ip}, port={port}")
-                socket.send_multipart([client_rid, b"", b"ADDR", target_id.encode(), ip.encode(), port.encode()])
-            else:
-                logger.info(f"GET_ADDR: {target_id} 정보 없음")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown target"])
-            continue
-
-        elif cmd == b"BILL_SEND":
-            # [client_rid, b'', b'BILL_SEND', dest_id, ...payload]
-            if len(args) < 1:
-                logger.warning(f"BILL_SEND: 목적지 ID 누락: {msg}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Bad destination ID"])
-                continue
-            dest_id = args[0].decode()
-            payload = args[1:]
-            if not id_pattern.match(dest_id):
-                logger.info(f"BILL_SEND: 잘못된 목적지 ID: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Bad destination ID"])
-                continue
-            if dest_id not in clients:
-                logger.info(f"BILL_SEND: 미등록 목적지: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown destination"])
-                continue
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            logger.info(f"BILL_SEND 전달: {from_id.decode()} → {dest_id}, payload={payload}")
-            socket.send_multipart([
-                dest_rid, b"",
-                b"BILL_SEND", from_id, *payload
-            ])
-            continue
 
-        elif cmd == b"BILL_OK":
-            # [client_rid, b'', b'BILL_OK', dest_id, bill_no, ...]
-            logger.debug(f"BILL_OK 수신 프레임: {msg}")
-            if len(args) < 1:
-                logger.warning(f"BILL_OK: 목적지 ID 누락: {msg}")
-                continue
-            dest_id = args[0].decode()
-            payload = args[1:]  # bill_no 등 추가 payload
-            if not id_pattern.match(dest_id):
-                logger.info(f"BILL_OK: 잘못된 목적지 ID: {dest_id}")
-                continue
-            if dest_id not in clients:
-                logger.info(f"BILL_OK: 미등록 목적지: {dest_id}")
-                continue
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            # bill_no 값만 명확하게 로그에 남김
-            bill_no_str = payload[0].decode(errors='replace') if payload else ''
-            logger.info(f"BILL_OK 전달: {from_id.decode()} → {dest_id}, bill_no={bill_no_str}, raw_payload={payload}")
-            send_frame = [dest_rid, b"", b"BILL_OK", from_id, *payload]
-            logger.debug(f"BILL_OK 송신 프레임: {send_frame}")
-            socket.send_multipart(send_frame)
-            continue
-
-        elif cmd == b"AI_GENERATE":
-            # [client_rid, b'', b'AI_GENERATE', dest_id, json_data]
-            if len(args) < 2:
-                logger.warning(f"AI_GENERATE: 잘못된 형식: {msg}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid AI_GENERATE format"])
-                continue
-                
-            dest_id = args[0].decode()
-            payload = args[1:]
-            
-            if not id_pattern.match(dest_id):
-                logger.info(f"AI_GENERATE: 잘못된 목적지 ID: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Bad destination ID"])
-                continue
-                
-            if dest_id not in clients:
-                logger.info(f"AI_GENERATE: 미등록 목적지: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown destination"])
-                continue
-                
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            logger.info(f"AI_GENERATE 전달: {from_id.decode()} → {dest_id}")
-            
-            socket.send_multipart([
-                dest_rid, b"",
-                b"AI_GENERATE", from_id, *payload
-            ])
-            continue
+class ClientRegistry:
+    """
+    client_id <-> routing_id 양방향 레지스트리
 
-        elif cmd == b"AI_MERGE":
-            # [client_rid, b'', b'AI_MERGE', dest_id, json_data]
-            if len(args) < 2:
-                logger.warning(f"AI_MERGE: 잘못된 형식: {msg}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid AI_MERGE format"])
-                continue
-                
-            dest_id = args[0].decode()
-            payload = args[1:]
-            
-            if not id_pattern.match(dest_id):
-                logger.info(f"AI_MERGE: 잘못된 목적지 ID: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Bad destination ID"])
-                continue
-                
-            if dest_id not in clients:
-                logger.info(f"AI_MERGE: 미등록 목적지: {dest_id}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown destination"])
-                continue
-                
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            logger.info(f"AI_MERGE 전달: {from_id.decode()} → {dest_id}")
-            
-            socket.send_multipart([
-                dest_rid, b"",
-                b"AI_MERGE", from_id, *payload
-            ])
-            continue
+    메시지마다 수행하는 등록 확인 / 발신자 조회를 딕셔너리 조회 한 번으로 처리합니다.
+    두 인덱스는 register()에서 함께 갱신되므로 항상 서로 일치합니다.
+    ID 형식 검증은 REGISTER에서 한 번만 수행하므로, 레지스트리에 있는 ID는 검증된 ID입니다.
+    (브로커 수신 루프 스레드에서만 변경)
+    """
 
-        elif cmd == b"AI_OK":
-            # [client_rid, b'', b'AI_OK', dest_id, response_data]
-            if len(args) < 2:
-                logger.warning(f"AI_OK: 잘못된 형식: {msg}")
-                continue
-                
-            dest_id = args[0].decode()
-            payload = args[1:]
-            
-            if not id_pattern.match(dest_id):
-                logger.info(f"AI_OK: 잘못된 목적지 ID: {dest_id}")
+    def __init__(self):
+        self._by_id = {}   # client_id -> ClientEntry
+        self._by_rid = {}  # routing_id -> ClientEntry
+        self.version = 0   # 등록/제거 시 증가 (스냅샷 필요 여부 판단)
+
+    def __contains__(self, client_id: bytes) -> bool:
+        return client_id in self._by_id
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def register(self, client_id: bytes, routing_id: bytes, ip: bytes = b"", port: bytes = b"",
+                 capabilities: frozenset = frozenset(), group: bytes = b"") -> ClientEntry:
+        """등록 / 재등록 (routing_id 변경 시 이전 매핑 제거)"""
+        now = time.monotonic()
+        entry = self._by_id.get(client_id)
+        if entry is not None and entry.routing_id != routing_id:
+            logger.info(f"{client_id.decode()}의 routing_id 갱신: {entry.routing_id} → {routing_id}")
+            if self._by_rid.get(entry.routing_id) is entry:
+                del self._by_rid[entry.routing_id]
+
+        # 같은 연결이 다른 ID로 다시 등록한 경우 이전 ID 제거
+        previous = self._by_rid.get(routing_id)
+        if previous is not None and previous.client_id != client_id:
+            logger.info(f"routing_id {routing_id}의 클라이언트 ID 변경: "
+                        f"{previous.client_id.decode()} → {client_id.decode()}")
+            del self._by_id[previous.client_id]
+
+        entry = ClientEntry(client_id, routing_id, ip, port, capabilities, now, group=group)
+        self._by_id[client_id] = entry
+        self._by_rid[routing_id] = entry
+        self.version += 1
+        return entry
+
+    def touch(self, routing_id: bytes, now: float):
+        """발신자 조회 + 마지막 수신 시각 갱신 (미등록이면 None, 스냅샷 복원 항목은 확정)"""
+        entry = self._by_rid.get(routing_id)
+        if entry is None:
+            return None
+        entry.last_seen = now
+        if entry.tentative:
+            entry.tentative = False
+            logger.info(f"스냅샷 복원 클라이언트 확인: {entry.client_id.decode()}")
+        return entry
+
+    def get(self, client_id: bytes):
+        return self._by_id.get(client_id)
+
+    def routing_id(self, client_id: bytes):
+        entry = self._by_id.get(client_id)
+        return entry.routing_id if entry is not None else None
+
+    def capabilities(self, client_id: bytes) -> frozenset:
+        entry = self._by_id.get(client_id)
+        return entry.capabilities if entry is not None else frozenset()
+
+    def evict_expired(self, now: float, ttl: float) -> list:
+        """마지막 수신 후 ttl(초)이 지난 클라이언트 제거 → 제거된 ClientEntry 목록"""
+        deadline = now - ttl
+        expired = [entry for entry in self._by_id.values() if entry.last_seen < deadline]
+        for entry in expired:
+            del self._by_id[entry.client_id]
+            if self._by_rid.get(entry.routing_id) is entry:
+                del self._by_rid[entry.routing_id]
+        if expired:
+            self.version += 1
+        return expired
+
+    def tentative_count(self) -> int:
+        return sum(1 for entry in self._by_id.values() if entry.tentative)
+
+    def entries(self) -> list:
+        return list(self._by_id.values())
+
+    def save_snapshot(self, path: str):
+        """
+        레지스트리를 JSON 파일로 저장
+
+        임시 파일에 쓰고 fsync 후 rename하므로 저장 중 종료되어도 이전 스냅샷이 유지됩니다.
+        routing_id는 임의 bytes일 수 있어 hex, 나머지는 latin-1 문자열로 저장합니다.
+        """
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "saved_at": time.time(),
+            "clients": [
+                {
+                    "client_id": entry.client_id.decode("latin-1"),
+                    "routing_id": entry.routing_id.hex(),
+                    "ip": entry.ip.decode("latin-1"),
+                    "port": entry.port.decode("latin-1"),
+                    "capabilities": sorted(entry.capabilities),
+                    "group": entry.group.decode("latin-1"),
+                }
+                for entry in self._by_id.values()
+            ],
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".registry_", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def load_snapshot(self, path: str, now: float) -> int:
+        """
+        스냅샷 복원 (모든 항목은 tentative 상태, last_seen은 복원 시각)
+
+        Returns:
+            복원한 클라이언트 수 (파일이 없거나 형식이 맞지 않으면 0)
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            logger.warning(f"레지스트리 스냅샷 로드 실패 ({path}): {e}")
+            return 0
+        if data.get("version") != SNAPSHOT_VERSION:
+            logger.warning(f"지원하지 않는 레지스트리 스냅샷 버전: {data.get('version')}")
+            return 0
+
+        loaded = 0
+        for item in data.get("clients", []):
+            try:
+                client_id = item["client_id"].encode("latin-1")
+                routing_id = bytes.fromhex(item["routing_id"])
+                entry = ClientEntry(client_id, routing_id,
+                                    item.get("ip", "").encode("latin-1"),
+                                    item.get("port", "").encode("latin-1"),
+                                    frozenset(item.get("capabilities", ())),
+                                    now, tentative=True,
+                                    group=item.get("group", "").encode("latin-1"))
+            except (KeyError, TypeError, ValueError, UnicodeError):
+                logger.warning(f"잘못된 스냅샷 항목 무시: {item}")
                 continue
-                
-            if dest_id not in clients:
-                logger.info(f"AI_OK: 미등록 목적지: {dest_id}")
+            if not ID_PATTERN.match(client_id) or client_id in self._by_id or routing_id in self._by_rid:
                 continue
-                
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            logger.info(f"AI_OK 전달: {from_id.decode()} → {dest_id}")
-            
-            socket.send_multipart([
-                dest_rid, b"",
-                b"AI_OK", from_id, *payload
-            ])
-            continue
+            self._by_id[client_id] = entry
+            self._by_rid[routing_id] = entry
+            loaded += 1
+        if loaded:
+            self.version += 1
+        return loaded
 
-        elif cmd == b"AI_ERROR":
-            # [client_rid, b'', b'AI_ERROR', dest_id, error_data]
-            if len(args) < 2:
-                logger.warning(f"AI_ERROR: 잘못된 형식: {msg}")
-                continue
-                
-            dest_id = args[0].decode()
-            payload = args[1:]
-            
-            if not id_pattern.match(dest_id):
-                logger.info(f"AI_ERROR: 잘못된 목적지 ID: {dest_id}")
+
+class Outbox:
+    """
+    일시적으로 연결이 끊긴 목적지용 store-and-forward 버퍼
+
+    목적지(client_id)별로 최대 max_messages개를 ttl(초) 동안 보관하고, 목적지가 다시
+    REGISTER 하거나 메시지를 보내오면 순서대로 전달합니다.
+    가득 차면 가장 오래된 메시지부터 버리며, 버린 개수는 사유별로 기록합니다.
+    (브로커 수신 루프 스레드에서만 사용)
+    """
+
+    def __init__(self, ttl: float, max_messages: int):
+        self.ttl = ttl
+        self.max_messages = max(max_messages, 1)
+        self.queues = {}  # client_id -> deque[(expires_at, frames, size)]
+        self.bytes = 0
+        self.queued = 0
+        self.flushed = 0
+        self.dropped_overflow = 0
+        self.dropped_expired = 0
+        self.dropped_evicted = 0
+
+    def __contains__(self, client_id: bytes) -> bool:
+        return client_id in self.queues
+
+    def put(self, client_id: bytes, frames: list, now: float):
+        """frames: routing_id를 제외한 전송 프레임 ([b"", cmd, from_id, *payload])"""
+        queue = self.queues.get(client_id)
+        if queue is None:
+            queue = self.queues[client_id] = deque()
+        if len(queue) >= self.max_messages:
+            _, _, size = queue.popleft()
+            self.bytes -= size
+            self.dropped_overflow += 1
+        size = sum(len(frame) for frame in frames)
+        queue.append((now + self.ttl, frames, size))
+        self.bytes += size
+        self.queued += 1
+
+    def flush(self, client_id: bytes, send, now: float) -> int:
+        """
+        보관 메시지를 순서대로 전송
+
+        send(frames) → bool: 전송 실패(False) 시 남은 메시지는 계속 보관
+        Returns:
+            전송한 메시지 수
+        """
+        queue = self.queues.pop(client_id, None)
+        if not queue:
+            return 0
+        sent = 0
+        while queue:
+            expires_at, frames, size = queue[0]
+            if expires_at > now and not send(frames):
+                self.queues[client_id] = queue
+                break
+            queue.popleft()
+            self.bytes -= size
+            if expires_at > now:
+                sent += 1
+            else:
+                self.dropped_expired += 1
+        self.flushed += sent
+        return sent
+
+    def expire(self, now: float) -> int:
+        """TTL이 지난 메시지 제거 (큐는 보관 순서 = 만료 순서)"""
+        dropped = 0
+        for client_id in list(self.queues):
+            queue = self.queues[client_id]
+            while queue and queue[0][0] <= now:
+                self.bytes -= queue.popleft()[2]
+                dropped += 1
+            if not queue:
+                del self.queues[client_id]
+        self.dropped_expired += dropped
+        return dropped
+
+    def discard(self, client_id: bytes):
+        """등록 해제된 목적지의 보관 메시지 폐기"""
+        queue = self.queues.pop(client_id, None)
+        if queue:
+            self.bytes -= sum(item[2] for item in queue)
+            self.dropped_evicted += len(queue)
+
+    def get_stats(self) -> dict:
+        return {
+            "destinations": len(self.queues),
+            "messages": sum(len(queue) for queue in self.queues.values()),
+            "bytes": self.bytes,
+            "queued": self.queued,
+            "flushed": self.flushed,
+            "dropped_overflow": self.dropped_overflow,
+            "dropped_expired": self.dropped_expired,
+            "dropped_evicted": self.dropped_evicted,
+        }
+
+
+class ServiceGroups:
+    """
+    서비스 그룹: 여러 클라이언트(예: AI 에이전트 인스턴스)가 하나의 그룹 ID로 요청을 받음
+
+    그룹 ID로 온 요청은 처리 중인 요청 수(outstanding)가 가장 적은 멤버에게 전달하고
+    (같으면 라운드 로빈), 멤버의 응답(AI_OK / AI_ERROR / AI_BATCH_OK)으로 수를 줄입니다.
+    응답 전에 재전송된 같은 요청은 Broker가 RequestTracker의 기록으로 처음 멤버에게 보냅니다 (sticky).
+    (브로커 수신 루프 스레드에서만 사용)
+    """
+
+    def __init__(self):
+        self._groups = {}   # group_id -> {member_id: outstanding}
+        self._member_group = {}  # member_id -> group_id
+        self._cursor = 0
+
+    def __contains__(self, group_id: bytes) -> bool:
+        return group_id in self._groups
+
+    def __bool__(self) -> bool:
+        return bool(self._groups)
+
+    def join(self, group_id: bytes, member_id: bytes):
+        """그룹 가입 (다른 그룹에 있었다면 이동, 재가입 시 outstanding 초기화)"""
+        self.leave(member_id)
+        self._groups.setdefault(group_id, {})[member_id] = 0
+        self._member_group[member_id] = group_id
+
+    def leave(self, member_id: bytes):
+        group_id = self._member_group.pop(member_id, None)
+        if group_id is None:
+            return
+        members = self._groups[group_id]
+        members.pop(member_id, None)
+        if not members:
+            del self._groups[group_id]
+
+    def group_of(self, member_id: bytes):
+        return self._member_group.get(member_id)
+
+    def members(self, group_id: bytes) -> list:
+        return list(self._groups.get(group_id, ()))
+
+    def pick(self, group_id: bytes, clients: ClientRegistry):
+        """
+        outstanding이 가장 적은 등록 멤버 선택 (요청을 실제로 보낼 때 begin() 호출)
+
+        Returns:
+            ClientEntry 또는 None (등록된 멤버 없음)
+        """
+        members = self._groups.get(group_id)
+        if not members:
+            return None
+        ids = list(members)
+        self._cursor += 1
+        best = None
+        best_load = None
+        for offset in range(len(ids)):
+            member_id = ids[(self._cursor + offset) % len(ids)]
+            load = members[member_id]
+            if best_load is not None and load >= best_load:
                 continue
-                
-            if dest_id not in clients:
-                logger.info(f"AI_ERROR: 미등록 목적지: {dest_id}")
+            entry = clients.get(member_id)
+            if entry is None:
                 continue
-                
-            from_id = next(k for k, v in clients.items() if v == client_rid).encode()
-            dest_rid = clients[dest_id]
-            logger.info(f"AI_ERROR 전달: {from_id.decode()} → {dest_id}")
-            
-            socket.send_multipart([
-                dest_rid, b"",
-                b"AI_ERROR", from_id, *payload
-            ])
-            continue
+            best, best_load = entry, load
+        return best
 
-        elif cmd == b"PING":
-            # PING 메시지 처리: [client_rid, b'', b'PING', from_id, target_id1, target_id2, ...]
-            if len(args) < 2:
-                logger.warning(f"잘못된 PING 형식: {msg}")
-                socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid PING format"])
-                continue
+    def begin(self, member_id: bytes):
+        """멤버에게 요청 하나를 전달함"""
+        group_id = self._member_group.get(member_id)
+        if group_id is not None:
+            self._groups[group_id][member_id] += 1
+
+    def complete(self, member_id: bytes):
+        """멤버가 요청 하나를 완료(응답)함"""
+        group_id = self._member_group.get(member_id)
+        if group_id is None:
+            return
+        members = self._groups[group_id]
+        if members.get(member_id, 0) > 0:
+            members[member_id] -= 1
+
+    def capabilities(self, group_id: bytes, clients: ClientRegistry):
+        """그룹 멤버 모두가 지원하는 기능 (등록된 멤버가 없으면 None)"""
+        caps = None
+        for member_id in self._groups.get(group_id, ()):
+            entry = clients.get(member_id)
+            if entry is not None:
+                caps = entry.capabilities if caps is None else caps & entry.capabilities
+        return caps
+
+    def get_stats(self) -> dict:
+        return {
+            group_id.decode(): {member_id.decode(): load for member_id, load in members.items()}
+            for group_id, members in self._groups.items()
+        }
+
+
+def peek_transaction_id(frame) -> bytes:
+    """요청 JSON 프레임에서 transaction_id만 추출 (bytes 또는 zmq.Frame, 없으면 b"")"""
+    match = TXID_PATTERN.search(frame if isinstance(frame, bytes) else frame.buffer)
+    return match.group(1) if match else b""
+
+
+class LatencyHistogram:
+    """고정 버킷 지연 시간 히스토그램 (초)"""
+    BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """버킷 상한 기준 근사 백분위수"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.BUCKETS[index] if index < len(self.BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.BUCKETS + (float("inf"),), self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "avg": round(self.sum / self.count, 3) if self.count else 0.0,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+class RequestTracker:
+    """
+    AI 요청 / 응답 추적
+
+    (요청 클라이언트, transaction_id)로 요청 시각을 기록해 두었다가 응답
+    (AI_OK / AI_ERROR / AI_BATCH_OK)이 지나갈 때 지연 시간을 명령별 / 목적지별 히스토그램에
+    기록합니다. timeouts 안에 응답이 없는 요청은 orphan으로 집계하고 테이블에서 제거합니다.
+    (브로커 수신 루프 스레드에서만 사용)
+    """
+
+    def __init__(self, timeouts: dict, max_outstanding: int = 10000, default_timeout: float = 30.0):
+        self.timeouts = timeouts
+        self.default_timeout = default_timeout
+        self.max_outstanding = max(max_outstanding, 1)
+        self.outstanding = {}  # (client_id, txid) -> (cmd, dest_id, started_at, deadline) - 삽입 순서 유지
+        self.by_command = {}   # cmd -> LatencyHistogram
+        self.by_destination = {}  # dest_id -> LatencyHistogram
+        self.started = 0
+        self.completed = 0
+        self.retries = 0       # 응답 전 같은 transaction_id 재요청
+        self.orphans = {}      # cmd -> 미응답 요청 수
+        self.dropped = 0       # 테이블이 가득 차서 추적을 포기한 요청
+        self.unmatched = 0     # 추적 중이 아닌 요청에 대한 응답 (orphan 이후 늦은 응답 등)
+
+    def start(self, cmd: bytes, client_id: bytes, dest_id: bytes, txid: bytes, now: float) -> bool:
+        """요청 기록 → 응답 대기 중인 요청의 재전송이면 False (transaction_id가 없으면 추적하지 않고 True)"""
+        if not txid:
+            return True
+        key = (client_id, txid)
+        if key in self.outstanding:
+            # POS 재전송은 첫 요청 기준으로 종단 지연 시간을 측정
+            self.retries += 1
+            return False
+        if len(self.outstanding) >= self.max_outstanding:
+            del self.outstanding[next(iter(self.outstanding))]
+            self.dropped += 1
+        timeout = self.timeouts.get(cmd, self.default_timeout)
+        self.outstanding[key] = (cmd, dest_id, now, now + timeout)
+        self.started += 1
+        return True
+
+    def destination(self, client_id: bytes, txid: bytes):
+        """응답 대기 중인 요청을 전달한 목적지 ID (추적 중이 아니면 None)"""
+        item = self.outstanding.get((client_id, txid)) if txid else None
+        return item[1] if item is not None else None
+
+    def finish(self, reply_cmd: bytes, client_id: bytes, txid: bytes, now: float):
+        """응답 처리 → 지연 시간(초), 추적 중이 아니면 None"""
+        item = self.outstanding.pop((client_id, txid), None)
+        if item is None:
+            self.unmatched += 1
+            return None
+        cmd, dest_id, started_at, _ = item
+        latency = now - started_at
+        histogram = self.by_command.get(cmd)
+        if histogram is None:
+            histogram = self.by_command[cmd] = LatencyHistogram()
+        histogram.observe(latency)
+        histogram = self.by_destination.get(dest_id)
+        if histogram is None:
+            histogram = self.by_destination[dest_id] = LatencyHistogram()
+        histogram.observe(latency)
+        self.completed += 1
+        return latency
+
+    def expire(self, now: float) -> list:
+        """응답 시한이 지난 요청을 orphan으로 집계 → orphan 요청의 목적지 ID 목록"""
+        expired = [key for key, item in self.outstanding.items() if item[3] <= now]
+        destinations = []
+        for key in expired:
+            cmd, dest_id, _, _ = self.outstanding.pop(key)
+            self.orphans[cmd] = self.orphans.get(cmd, 0) + 1
+            destinations.append(dest_id)
+            logger.info(f"응답 없는 요청(orphan): {cmd.decode()} {key[0].decode()} → {dest_id.decode()} "
+                        f"txid={key[1].decode(errors='replace')}")
+        return destinations
+
+    def outstanding_by_destination(self) -> dict:
+        counts = {}
+        for _, dest_id, _, _ in self.outstanding.values():
+            counts[dest_id] = counts.get(dest_id, 0) + 1
+        return counts
+
+    def get_stats(self) -> dict:
+        return {
+            "outstanding": len(self.outstanding),
+            "outstanding_by_destination": {k.decode(): v for k, v in self.outstanding_by_destination().items()},
+            "started": self.started,
+            "completed": self.completed,
+            "retries": self.retries,
+            "orphans": {k.decode(): v for k, v in self.orphans.items()},
+            "dropped": self.dropped,
+            "unmatched_replies": self.unmatched,
+            "latency_by_command": {k.decode(): h.to_dict() for k, h in self.by_command.items()},
+            "latency_by_destination": {k.decode(): h.to_dict() for k, h in self.by_destination.items()},
+        }
+
+
+def parse_capabilities(frame: bytes) -> frozenset:
+    """b"binary,zstd" 형식의 기능 목록 파싱"""
+    return frozenset(c.strip().lower() for c in frame.decode(errors="ignore").split(",") if c.strip())
+
+def encode_capabilities(caps) -> bytes:
+    return ",".join(sorted(caps)).encode()
+
+def negotiate_capabilities(my_id: bytes, offered: frozenset, agent_caps=None) -> frozenset:
+    """
+    요청 기능 중 브로커 설정과 AI 에이전트가 모두 허용하는 기능만 남김
+
+    agent_caps: 등록된 AI 에이전트의 기능 목록 (에이전트 미등록이면 None)
+    """
+    negotiated = offered
+    if BROKER_CAPABILITIES:
+        negotiated &= BROKER_CAPABILITIES
+    if my_id != AI_AGENT_ID and agent_caps is not None:
+        negotiated &= agent_caps
+    return negotiated
+
+
+class ForwardSpec:
+    """
+    단순 전달 명령 정의: [cmd, dest_id, *payload] → 목적지에 [cmd, from_id, *payload]
+
+    min_args: 최소 인자 프레임 수 (dest_id 포함)
+    format_error: 형식 오류 시 발신자에게 보낼 에러 (None이면 응답 없이 무시)
+    reply_errors: 목적지 오류를 발신자에게 알릴지 여부 (응답 메시지 계열은 조용히 무시)
+    hook: 전달 전 추가 검사 hook(broker, sender, args) → 에러 bytes 또는 None
+    role: 요청/응답 구분 (ROLE_REQUEST: 요청 추적 시작 + 그룹 멤버 outstanding 증가,
+          ROLE_REPLY: 요청 추적 완료 + 멤버 outstanding 감소 + 발신자 ID를 그룹 ID로 변경)
+    """
+    __slots__ = ("min_args", "format_error", "reply_errors", "hook", "role")
+
+    def __init__(self, min_args: int, format_error=None, reply_errors: bool = False, hook=None,
+                 role=None):
+        self.min_args = min_args
+        self.format_error = format_error
+        self.reply_errors = reply_errors
+        self.hook = hook
+        self.role = role
+
+
+ROLE_REQUEST = "request"
+ROLE_REPLY = "reply"
+
+
+def _log_bill_ok(broker, sender, args):
+    """BILL_OK는 정산 추적을 위해 bill_no를 기록"""
+    bill_no = bytes(args[1]).decode(errors='replace') if len(args) > 1 else ''
+    logger.info("BILL_OK 전달: %s → %s, bill_no=%s", sender.client_id.decode(), args[0].decode(), bill_no)
+    return None
+
+def _require_batch(broker, sender, args):
+    """배치 명령은 REGISTER에서 batch 기능을 협상한 클라이언트만 사용 가능"""
+    if "batch" not in sender.capabilities:
+        logger.info("batch 기능 미협상 클라이언트: %s", sender.client_id.decode())
+        return b"Capability not negotiated: batch"
+    return None
 
-            sender_id = args[0].decode()  # 원래 발신자 ID
-            target_ids = [arg.decode() for arg in args[1:]]  # 목적지 ID 목록
-
-            # target_ids가 비어있거나, from_id와 target_id[0]이 같으면 바로 PONG 응답
-            if not target_ids or sender_id == target_ids[0]:
-                if sender_id in clients:
-                    from_rid = clients[sender_id]
-                    logger.info(f"PING to BROKER: {sender_id}에게 PONG 응답")
-                    socket.send_multipart([
-                        from_rid, b"",
-                        b"PONG", from_rid, b"", b""
-                    ])
+
+# 전달 전용 명령 테이블 (공통 fast path로 처리)
+FORWARD_COMMANDS = {
+    b"BILL_SEND": ForwardSpec(1, format_error=b"Bad destination ID", reply_errors=True),
+    b"BILL_OK": ForwardSpec(1, hook=_log_bill_ok),
+    b"AI_GENERATE": ForwardSpec(2, format_error=b"Invalid AI_GENERATE format", reply_errors=True,
+                                role=ROLE_REQUEST),
+    b"AI_MERGE": ForwardSpec(2, format_error=b"Invalid AI_MERGE format", reply_errors=True,
+                             role=ROLE_REQUEST),
+    b"AI_GENERATE_BATCH": ForwardSpec(2, format_error=b"Invalid AI_GENERATE_BATCH format",
+                                      reply_errors=True, hook=_require_batch, role=ROLE_REQUEST),
+    b"AI_MERGE_BATCH": ForwardSpec(2, format_error=b"Invalid AI_MERGE_BATCH format",
+                                   reply_errors=True, hook=_require_batch, role=ROLE_REQUEST),
+    b"AI_OK": ForwardSpec(2, role=ROLE_REPLY),
+    b"AI_ERROR": ForwardSpec(2, role=ROLE_REPLY),
+    b"AI_BATCH_OK": ForwardSpec(3, role=ROLE_REPLY),
+}
+
+# 등록 없이 사용할 수 있는 명령
+UNREGISTERED_COMMANDS = (b"REGISTER", b"GET_ADDR")
+
+
+class Broker:
+    """
+    ROUTER 소켓 기반 메시지 브로커
+
+    명령은 테이블로 분기합니다.
+    - FORWARD_COMMANDS: 목적지 조회 후 그대로 전달하는 공통 fast path
+      (payload 디코딩/포맷팅 없음, 목적지 ID는 레지스트리 조회로 검증)
+    - self.handlers: REGISTER, PING 등 별도 처리가 필요한 명령
+
+    zero-copy 모드에서는 헤더 프레임만 bytes로 꺼내고, payload 프레임은 zmq.Frame 그대로
+    목적지 소켓에 넘깁니다. (AI_MERGE의 current_xml처럼 큰 프레임의 Python bytes 복사 제거)
+
+    client_ttl > 0 이면 그 시간 동안 아무 메시지(PING 포함)도 보내지 않은 클라이언트는 sweep_interval마다
+    레지스트리에서 제거되며, 이후 그 클라이언트로의 전달은 즉시 Unknown destination 에러가 됩니다.
+
+    outbox_ttl > 0 이면 ROUTER_MANDATORY로 전달 실패를 감지하여, 등록은 되어 있지만 연결이
+    끊긴 목적지로 가는 메시지를 Outbox에 보관했다가 재등록(또는 수신) 시 전달합니다.
+
+    snapshot_path를 지정하면 레지스트리가 바뀐 경우 snapshot_interval마다 파일로 저장하고,
+    시작 시 복원하여 재등록 없이 바로 라우팅을 재개합니다. (복원 항목은 첫 수신 전까지 tentative)
+
+    REGISTER에 서비스 그룹 ID를 보낸 클라이언트는 그룹 멤버가 되며, 같은 ID로 직접 등록된
+    클라이언트가 없을 때 그룹 ID로 온 메시지는 ServiceGroups가 고른 멤버에게 전달됩니다.
+
+    metrics_port를 지정하면 별도 스레드의 HTTP 서버가 /metrics로 collect_metrics() 결과를 제공합니다.
+    """
+
+    def __init__(self, bind: str = None, zero_copy_threshold: int = None,
+                 client_ttl: float = None, sweep_interval: float = None,
+                 outbox_ttl: float = None, outbox_max_messages: int = None,
+                 snapshot_path: str = None, snapshot_interval: float = None, metrics_port: int = None):
+        self.bind = bind or f"tcp://*:{BROKER_PORT}"
+        self.zero_copy_threshold = ZERO_COPY_THRESHOLD if zero_copy_threshold is None else zero_copy_threshold
+        self.payload_sizes = {}  # 전달 명령별 payload 크기 이동 평균 (bytes)
+        self.client_ttl = CLIENT_TTL if client_ttl is None else client_ttl
+        self.sweep_interval = SWEEP_INTERVAL if sweep_interval is None else sweep_interval
+        self.evicted = 0  # 만료로 제거된 클라이언트 누적 수
+        outbox_ttl = OUTBOX_TTL if outbox_ttl is None else outbox_ttl
+        self.outbox = None
+        if outbox_ttl > 0:
+            self.outbox = Outbox(outbox_ttl, OUTBOX_MAX_MESSAGES if outbox_max_messages is None else outbox_max_messages)
+        self.snapshot_path = SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+        self.snapshot_interval = SNAPSHOT_INTERVAL if snapshot_interval is None else snapshot_interval
+        self._snapshot_version = 0  # 마지막으로 저장한 레지스트리 version
+        self._next_snapshot = 0.0
+        self.clients = ClientRegistry()
+        self.groups = ServiceGroups()
+        self.tracker = RequestTracker(REQUEST_TIMEOUTS, TRACK_MAX_OUTSTANDING) if TRACK_REQUESTS else None
+        self.messages = {}          # 명령별 수신 메시지 수 (지원하지 않는 명령은 b"OTHER")
+        self.forward_failures = {}  # (cmd, 사유) -> 전달 실패 수
+        self.unregistered = 0       # 미등록 클라이언트가 보낸 메시지 수
+        self.metrics_port = METRICS_PORT if metrics_port is None else metrics_port
+        self.forwards = dict(FORWARD_COMMANDS)
+        self.handlers = {
+            b"REGISTER": self.handle_register,
+            b"GET_ADDR": self.handle_get_addr,
+            b"GET_CAPS": self.handle_get_caps,
+            b"PING": self.handle_ping,
+            b"PONG": self.handle_pong,
+        }
+        self.socket = None
+
+    def run(self):
+        global last_active
+        logger.info(f"브로커 시작: 클라이언트 정보 메모리에서만 관리 ({self.bind})")
+
+        if self.snapshot_path:
+            restored = self.clients.load_snapshot(self.snapshot_path, time.monotonic())
+            for entry in self.clients.entries():
+                if entry.group:
+                    self.groups.join(entry.group, entry.client_id)
+            self._snapshot_version = self.clients.version
+            self._next_snapshot = time.monotonic() + self.snapshot_interval
+            logger.info(f"레지스트리 스냅샷 복원: {restored}개 클라이언트 ({self.snapshot_path})")
+
+        ctx = zmq.Context()
+        self.socket = socket = ctx.socket(zmq.ROUTER)
+        outbox = self.outbox
+        timed = (self.client_ttl > 0 or outbox is not None or bool(self.snapshot_path)
+                 or self.tracker is not None)
+        if timed:
+            # 메시지가 없어도 정리 주기마다 recv가 반환되도록 수신 타임아웃 설정
+            socket.setsockopt(zmq.RCVTIMEO, max(int(self.sweep_interval * 1000), 1))
+        if outbox is not None:
+            # 연결 없는 목적지 / 가득 찬 큐로의 전송을 조용히 버리지 않고 에러로 받음 (송신은 블록하지 않음)
+            socket.setsockopt(zmq.ROUTER_MANDATORY, 1)
+            socket.setsockopt(zmq.SNDTIMEO, 0)
+        socket.bind(self.bind)
+        if self.metrics_port:
+            start_metrics_server(self.collect_metrics, self.metrics_port)
+
+        clients = self.clients
+        forwards = self.forwards
+        handlers = self.handlers
+        messages = self.messages
+        recv_message = self.recv_message
+        next_sweep = time.monotonic() + self.sweep_interval
+        while True:
+            try:
+                msg = recv_message()
+            except zmq.Again:
+                msg = None
+            now = time.monotonic()
+            if timed and now >= next_sweep:
+                self.sweep(now)
+                next_sweep = now + self.sweep_interval
+            if msg is None:
+                continue
+            last_active = now  # 메시지 수신 시각 갱신
+            if len(msg) < 3:
+                logger.warning("잘못된 프레임 수신: %r", [bytes(frame[:64]) for frame in msg])
                 continue
+            client_rid, _, cmd, *args = msg
 
-            logger.info(f"PING 요청: {sender_id} → {target_ids}")
+            try:
+                # 클라이언트 ID가 등록되어 있는지 확인 (REGISTER, GET_ADDR 명령은 제외)
+                sender = None
+                if cmd not in UNREGISTERED_COMMANDS:
+                    sender = clients.touch(client_rid, now)
+                    if sender is None:
+                        self.unregistered += 1
+                        logger.warning(f"미등록 클라이언트: {client_rid}")
+                        socket.send_multipart([client_rid, b"", b"ERROR", b"Registration required"])
+                        continue
+                    if outbox is not None and sender.client_id in outbox:
+                        # 재등록 없이 다시 연결된 경우에도 보관 메시지 전달
+                        self.flush_outbox(sender.client_id, client_rid, now)
 
-            # 각 목적지 ID에 대해 PING 전송
-            for target_id in target_ids:
-                # 목적지 ID가 유효한지 확인
-                if not id_pattern.match(target_id):
-                    logger.info(f"PING: 잘못된 목적지 ID: {target_id}")
-                    socket.send_multipart([client_rid, b"", b"ERROR", b"Bad target ID: " + target_id.encode()])
+                spec = forwards.get(cmd)
+                if spec is not None:
+                    messages[cmd] = messages.get(cmd, 0) + 1
+                    self.forward(client_rid, sender, cmd, args, spec, now)
                     continue
 
-                # 목적지 ID가 등록되어 있는지 확인
-                if target_id not in clients:
-                    logger.info(f"PING: 미등록 목적지: {target_id}")
-                    socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown target: " + target_id.encode()])
+                handler = handlers.get(cmd)
+                if handler is None:
+                    messages[b"OTHER"] = messages.get(b"OTHER", 0) + 1
+                    logger.warning(f"지원하지 않는 커맨드(무시): {cmd}")
                     continue
+                messages[cmd] = messages.get(cmd, 0) + 1
+                # 제어 명령은 작은 프레임뿐이므로 모두 bytes로 변환하여 처리
+                handler(client_rid, sender, [a if isinstance(a, bytes) else a.bytes for a in args])
+            except zmq.ZMQError as e:
+                # ROUTER_MANDATORY 모드에서 응답 대상이 이미 끊긴 경우 등
+                if e.errno not in (zmq.EHOSTUNREACH, zmq.EAGAIN):
+                    raise
+                self.count_failure(cmd if cmd in messages else b"OTHER", "unreachable")
+                logger.info(f"{cmd.decode(errors='replace')} 응답 전송 실패 (연결 끊김): {client_rid}")
 
-                target_rid = clients[target_id]
-                logger.info(f"PING 전달: {sender_id} → {target_id} (routing_id={target_rid})")
+    def recv_message(self) -> list:
+        """
+        메시지 수신
 
-                # 목적지에 PING 메시지 전송 (routing_id를 정확히 사용)
-                # 프레임: [routing_id, b'', b'PING', sender_id]
-                socket.send_multipart([
-                    target_rid, b"",
-                    b"PING", sender_id.encode()
-                ])
+        헤더 프레임(HEADER_FRAMES개)은 항상 bytes로 받고, payload 프레임은 해당 명령의
+        평균 payload 크기가 zero_copy_threshold 이상일 때만 zmq.Frame(copy=False)으로 받습니다.
+        """
+        socket = self.socket
+        if self.zero_copy_threshold <= 0:
+            return socket.recv_multipart()
+        msg = [socket.recv()]
+        while len(msg) < HEADER_FRAMES and socket.getsockopt(zmq.RCVMORE):
+            msg.append(socket.recv())
+        if not socket.getsockopt(zmq.RCVMORE):
+            return msg
 
-            # 목적지로부터 PONG 응답을 기다림 (비동기적으로 처리됨)
-            continue
+        cmd = msg[2] if len(msg) > 2 else b""
+        average = self.payload_sizes.get(cmd)
+        copy = average is None or average < self.zero_copy_threshold
+        size = 0
+        while socket.getsockopt(zmq.RCVMORE):
+            frame = socket.recv(copy=copy)
+            size += len(frame)
+            msg.append(frame)
+        if cmd in self.forwards:
+            self.payload_sizes[cmd] = size if average is None else average + (size - average) * 0.2
+        return msg
 
-        elif cmd == b"PONG":
-            # PONG 메시지 처리: [client_rid, b'', b'PONG', target_id]
-            if len(args) < 1:
-                logger.warning(f"잘못된 PONG 형식: {msg}")
-                continue
+    def sweep(self, now: float):
+        """client_ttl 동안 수신이 없는 클라이언트 제거 + 만료된 보관 메시지 정리"""
+        if self.client_ttl > 0:
+            for entry in self.clients.evict_expired(now, self.client_ttl):
+                self.evicted += 1
+                self.groups.leave(entry.client_id)
+                if self.outbox is not None:
+                    self.outbox.discard(entry.client_id)
+                logger.info(f"응답 없는 클라이언트 제거: {entry.client_id.decode()} "
+                            f"(마지막 수신 {now - entry.last_seen:.0f}초 전)")
+        if self.outbox is not None and self.outbox.expire(now):
+            logger.info(f"보관 메시지 만료: {self.outbox.get_stats()}")
+        if self.tracker is not None:
+            for dest_id in self.tracker.expire(now):
+                # 응답이 유실된 요청이 그룹 멤버의 outstanding을 계속 차지하지 않도록 정리
+                self.groups.complete(dest_id)
+        if self.snapshot_path and now >= self._next_snapshot and self.clients.version != self._snapshot_version:
+            self.save_snapshot()
+            self._next_snapshot = now + self.snapshot_interval
 
-            target_id = args[0].decode()  # PONG 응답을 받을 대상 ID
+    def save_snapshot(self):
+        version = self.clients.version
+        try:
+            self.clients.save_snapshot(self.snapshot_path)
+        except OSError as e:
+            logger.error(f"레지스트리 스냅샷 저장 실패 ({self.snapshot_path}): {e}")
+            return
+        self._snapshot_version = version
+        logger.debug(f"레지스트리 스냅샷 저장: {len(self.clients)}개 클라이언트")
 
-            # 응답 대상 ID가 유효한지 확인
-            if not id_pattern.match(target_id):
-                logger.info(f"PONG: 잘못된 목적지 ID: {target_id}")
-                continue
+    def try_send(self, frames: list) -> bool:
+        """전송 (ROUTER_MANDATORY 모드에서 목적지 연결이 없거나 큐가 가득 차면 False)"""
+        try:
+            self.socket.send_multipart(frames)
+            return True
+        except zmq.ZMQError as e:
+            if e.errno not in (zmq.EHOSTUNREACH, zmq.EAGAIN):
+                raise
+            return False
 
-            # 응답 대상 ID가 등록되어 있는지 확인
-            if target_id not in clients:
-                logger.info(f"PONG: 미등록 목적지: {target_id}")
-                continue
+    def flush_outbox(self, client_id: bytes, routing_id: bytes, now: float):
+        sent = self.outbox.flush(client_id, lambda frames: self.try_send([routing_id, *frames]), now)
+        if sent:
+            logger.info(f"보관 메시지 전달: {client_id.decode()} {sent}건")
 
-            from_id = next(k for k, v in clients.items() if v == client_rid)
-            target_rid = clients[target_id]
+    def get_stats(self) -> dict:
+        """레지스트리 / 보관 메시지 현황"""
+        stats = {"clients": len(self.clients), "tentative": self.clients.tentative_count(), "evicted": self.evicted}
+        if self.groups:
+            stats["groups"] = self.groups.get_stats()
+        if self.tracker is not None:
+            stats["requests"] = self.tracker.get_stats()
+        if self.outbox is not None:
+            stats["outbox"] = self.outbox.get_stats()
+        return stats
 
-            # 원래 발신자에게 PONG 응답 전달 (누구로부터 온 응답인지 포함)
-            ip, port = p2p_info.get(from_id, (b"", b""))
-            if not isinstance(ip, bytes):
-                ip = ip.encode()
-            if not isinstance(port, bytes):
-                port = port.encode()
+    def count_failure(self, cmd: bytes, reason: str):
+        key = (cmd, reason)
+        self.forward_failures[key] = self.forward_failures.get(key, 0) + 1
 
-            logger.info(f"PONG 전달: {from_id} {ip} {port} → {target_id}")
+    def collect_metrics(self) -> list:
+        """
+        Prometheus 메트릭 수집 (메트릭 HTTP 스레드에서 호출)
+
+        수신 루프 스레드가 dict를 갱신하는 도중 순회하면 RuntimeError가 날 수 있으므로
+        몇 번 다시 시도합니다. (값 자체는 수신 루프를 멈추지 않고 읽는 근사치)
+        """
+        for attempt in range(3):
+            try:
+                return self._collect_metrics()
+            except RuntimeError:
+                if attempt == 2:
+                    raise
 
-            socket.send_multipart([
-                target_rid, b"",
-                b"PONG", from_id.encode(), ip, port
+    def _collect_metrics(self) -> list:
+        families = [
+            ("broker_messages_total", "counter", "명령별 수신 메시지 수",
+             [("", {"command": cmd.decode()}, count) for cmd, count in list(self.messages.items())]),
+            ("broker_forward_failures_total", "counter", "전달 실패 수 (사유별)",
+             [("", {"command": cmd.decode(), "reason": reason}, count)
+              for (cmd, reason), count in list(self.forward_failures.items())]),
+            ("broker_unregistered_messages_total", "counter", "미등록 클라이언트 메시지 수",
+             [("", {}, self.unregistered)]),
+            ("broker_registered_clients", "gauge", "레지스트리에 등록된 클라이언트 수",
+             [("", {}, len(self.clients))]),
+            ("broker_tentative_clients", "gauge", "스냅샷에서 복원되어 아직 수신이 없는 클라이언트 수",
+             [("", {}, self.clients.tentative_count())]),
+            ("broker_evicted_clients_total", "counter", "응답이 없어 제거된 클라이언트 수",
+             [("", {}, self.evicted)]),
+        ]
+        if self.groups:
+            families.append(("broker_group_outstanding", "gauge", "서비스 그룹 멤버별 처리 중인 요청 수",
+                             [("", {"group": group, "member": member}, load)
+                              for group, members in self.groups.get_stats().items()
+                              for member, load in members.items()]))
+        if self.outbox is not None:
+            stats = self.outbox.get_stats()
+            families.extend([
+                ("broker_outbox_messages", "gauge", "보관 중인 메시지 수", [("", {}, stats["messages"])]),
+                ("broker_outbox_bytes", "gauge", "보관 중인 메시지 크기", [("", {}, stats["bytes"])]),
+                ("broker_outbox_flushed_total", "counter", "보관 후 전달된 메시지 수", [("", {}, stats["flushed"])]),
+                ("broker_outbox_dropped_total", "counter", "보관 중 폐기된 메시지 수",
+                 [("", {"reason": reason}, stats[f"dropped_{reason}"]) for reason in ("overflow", "expired", "evicted")]),
+            ])
+        tracker = self.tracker
+        if tracker is not None:
+            bounds = LatencyHistogram.BUCKETS + (float("inf"),)
+            families.extend([
+                ("broker_requests_outstanding", "gauge", "목적지(AI 에이전트)별 응답 대기 중인 요청 수",
+                 [("", {"destination": dest.decode()}, count)
+                  for dest, count in tracker.outstanding_by_destination().items()]),
+                ("broker_requests_total", "counter", "추적한 AI 요청 이벤트 수",
+                 [("", {"event": "started"}, tracker.started), ("", {"event": "completed"}, tracker.completed),
+                  ("", {"event": "retry"}, tracker.retries), ("", {"event": "dropped"}, tracker.dropped),
+                  ("", {"event": "unmatched_reply"}, tracker.unmatched)]),
+                ("broker_request_orphans_total", "counter", "시한 안에 응답이 없던 요청 수",
+                 [("", {"command": cmd.decode()}, count) for cmd, count in list(tracker.orphans.items())]),
             ])
-            continue
+            for name, label, histograms in (("broker_request_latency_seconds", "command", tracker.by_command),
+                                            ("broker_destination_latency_seconds", "destination",
+                                             tracker.by_destination)):
+                help_text = f"AI 요청 ~ 응답 지연 시간 ({'명령별' if label == 'command' else '목적지별'})"
+                samples = []
+                for key, histogram in list(histograms.items()):
+                    cumulative, running = [], 0
+                    for count in list(histogram.counts):
+                        running += count
+                        cumulative.append(running)
+                    samples.extend(histogram_samples({label: key.decode()}, bounds, cumulative,
+                                                     histogram.sum, histogram.count))
+                families.append((name, "histogram", help_text, samples))
+        return families
+
+    def resolve(self, client_id: bytes):
+        """client_id로 직접 등록된 클라이언트, 없으면 서비스 그룹 멤버 선택"""
+        entry = self.clients.get(client_id)
+        if entry is None and self.groups and client_id in self.groups:
+            entry = self.groups.pick(client_id, self.clients)
+        return entry
+
+    def agent_capabilities(self):
+        """AI 에이전트(또는 에이전트 그룹 공통) 기능, 미등록이면 None"""
+        agent = self.clients.get(AI_AGENT_ID)
+        if agent is not None:
+            return agent.capabilities
+        return self.groups.capabilities(AI_AGENT_ID, self.clients)
+
+    def agent_routing_ids(self) -> list:
+        agent = self.clients.get(AI_AGENT_ID)
+        if agent is not None:
+            return [agent.routing_id]
+        return [entry.routing_id for entry in map(self.clients.get, self.groups.members(AI_AGENT_ID))
+                if entry is not None]
+
+    # === 공통 전달 fast path ===
+
+    def forward(self, client_rid: bytes, sender: ClientEntry, cmd: bytes, args: list, spec: ForwardSpec,
+                now: float):
+        """[cmd, dest_id, *payload] → 목적지에 [cmd, from_id, *payload] 전달"""
+        if len(args) < spec.min_args:
+            self.count_failure(cmd, "bad_format")
+            logger.warning("%s: 잘못된 형식 (인자 %d개)", cmd.decode(), len(args))
+            if spec.format_error is not None:
+                self.socket.send_multipart([client_rid, b"", b"ERROR", spec.format_error])
+            return
+
+        dest = self.clients.get(args[0])
+        if dest is None and self.groups and args[0] in self.groups:
+            dest = self.pick_group_member(args[0], sender, args, spec)
+        if dest is None:
+            # 레지스트리에 없는 경우에만 ID 형식을 검사하여 에러 종류 구분
+            if not ID_PATTERN.match(args[0]):
+                logger.info("%s: 잘못된 목적지 ID: %r", cmd.decode(), args[0])
+                error = b"Bad destination ID"
+                self.count_failure(cmd, "bad_destination")
+            else:
+                logger.info("%s: 미등록 목적지: %s", cmd.decode(), args[0].decode())
+                error = b"Unknown destination"
+                self.count_failure(cmd, "unknown_destination")
+            if spec.reply_errors:
+                self.socket.send_multipart([client_rid, b"", b"ERROR", error])
+            return
 
+        if spec.hook is not None:
+            error = spec.hook(self, sender, args)
+            if error is not None:
+                self.count_failure(cmd, "rejected")
+                self.socket.send_multipart([client_rid, b"", b"ERROR", error])
+                return
+
+        from_id = sender.client_id
+        role = spec.role
+        new_request = True
+        if role is not None and self.tracker is not None:
+            # 요청: [dest_id, json, ...] (json 안의 transaction_id) / 응답: [dest_id, transaction_id, ...]
+            if role is ROLE_REQUEST:
+                new_request = self.tracker.start(cmd, sender.client_id, dest.client_id,
+                                                 peek_transaction_id(args[1]), now)
+            else:
+                self.tracker.finish(cmd, dest.client_id, bytes(args[1]), now)
+        if role is not None and self.groups:
+            # 재전송은 처음 요청과 함께 한 번만 집계 (orphan 정리도 요청당 한 번만 complete)
+            if role is ROLE_REQUEST and dest.group and new_request:
+                self.groups.begin(dest.client_id)
+            elif role is ROLE_REPLY and sender.group:
+                # 그룹 멤버의 응답은 그룹 ID로 보낸 것처럼 전달 (POS는 멤버 구성을 알 필요 없음)
+                self.groups.complete(sender.client_id)
+                from_id = sender.group
+        args[0] = from_id
+        outbox = self.outbox
+        if outbox is None:
+            # zmq.Frame payload는 copy 여부와 관계없이 참조만 넘기고, 작은 헤더 bytes만 복사됨
+            self.socket.send_multipart([dest.routing_id, b"", cmd, *args])
+        elif dest.client_id in outbox or not self.try_send([dest.routing_id, b"", cmd, *args]):
+            # 이미 보관 중인 메시지가 있으면 순서 유지를 위해 뒤에 추가
+            outbox.put(dest.client_id, [b"", cmd, *args], time.monotonic())
+            logger.info("%s 보관: %s → %s (연결 끊김)", cmd.decode(), sender.client_id.decode(), dest.client_id.decode())
+            return
+        if LOG_FORWARDS:
+            logger.debug("%s 전달: %s → %s (payload %d frames)",
+                         cmd.decode(), sender.client_id.decode(), dest.client_id.decode(), len(args) - 1)
+
+    def pick_group_member(self, group_id: bytes, sender: ClientEntry, args: list, spec: ForwardSpec):
+        """
+        그룹 ID로 온 메시지의 목적지 멤버 선택
+
+        응답 대기 중인 요청의 재전송(같은 요청 클라이언트 + transaction_id)은 처음 보낸 멤버에게
+        보내야 그 멤버의 결과 캐시가 LLM을 다시 호출하지 않고 응답합니다. 추적 기록이 없거나
+        그 멤버가 그룹을 떠났으면(등록 해제 포함) 부하가 가장 적은 멤버를 고릅니다.
+        """
+        if spec.role is ROLE_REQUEST and self.tracker is not None:
+            member_id = self.tracker.destination(sender.client_id, peek_transaction_id(args[1]))
+            if member_id is not None and self.groups.group_of(member_id) == group_id:
+                member = self.clients.get(member_id)
+                if member is not None:
+                    return member
+        return self.groups.pick(group_id, self.clients)
+
+    # === 개별 명령 처리 ===
+
+    def handle_register(self, client_rid: bytes, sender, args: list):
+        if not args:
+            logger.warning("REGISTER: ID 누락")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid ID"])
+            return
+        my_id = args[0]
+        my_ip = args[1] if len(args) > 1 else b""
+        my_port = args[2] if len(args) > 2 else b""
+        if not ID_PATTERN.match(my_id):
+            logger.info(f"잘못된 ID 등록 시도: {my_id.decode(errors='replace')}")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid ID"])
+            return
+
+        group = args[4] if len(args) > 4 else b""
+        if group and (not ID_PATTERN.match(group) or group == my_id):
+            logger.info(f"잘못된 서비스 그룹 등록 시도: {my_id.decode()} → {group.decode(errors='replace')}")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid group ID"])
+            return
+        if group:
+            self.groups.join(group, my_id)
+            logger.info(f"서비스 그룹 가입: {group.decode()} ← {my_id.decode()} "
+                        f"(멤버 {len(self.groups.members(group))}개)")
         else:
-            logger.warning(f"지원하지 않는 커맨드(무시): {cmd}")
-            continue
+            self.groups.leave(my_id)
+
+        if len(args) < 4:
+            # 기능 목록을 보내지 않는 기존 클라이언트는 v1.0 응답 유지
+            self.clients.register(my_id, client_rid, my_ip, my_port)  # routing_id는 메모리에서만 관리
+            logger.info(f"등록(갱신) 완료: {my_id.decode()}, ip={my_ip.decode()}, port={my_port.decode()}")
+            self.socket.send_multipart([client_rid, b"", b"OK"])
+            if self.outbox is not None:
+                self.flush_outbox(my_id, client_rid, time.monotonic())
+            return
+
+        # 에이전트 그룹 멤버끼리는 서로의 기능으로 제한하지 않음
+        agent_caps = None if group == AI_AGENT_ID else self.agent_capabilities()
+        negotiated = negotiate_capabilities(my_id, parse_capabilities(args[3]), agent_caps)
+        self.clients.register(my_id, client_rid, my_ip, my_port, negotiated, group)
+        caps_frame = encode_capabilities(negotiated)
+        logger.info(f"등록(갱신) 완료: {my_id.decode()}, ip={my_ip.decode()}, port={my_port.decode()}, "
+                    f"caps={caps_frame.decode()}")
+        self.socket.send_multipart([client_rid, b"", b"OK", caps_frame])
+        if self.outbox is not None:
+            self.flush_outbox(my_id, client_rid, time.monotonic())
+        # AI 에이전트가 피어별 기능을 바로 반영하도록 알림
+        if my_id != AI_AGENT_ID and group != AI_AGENT_ID:
+            for agent_rid in self.agent_routing_ids():
+                self.socket.send_multipart([agent_rid, b"", b"CAPS", my_id, caps_frame])
+
+    def handle_get_addr(self, client_rid: bytes, sender, args: list):
+        target = self.resolve(args[0]) if args else None
+        if target is None:
+            logger.info(f"GET_ADDR: {args[0].decode(errors='replace') if args else ''} 정보 없음")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown target"])
+            return
+        logger.info(f"GET_ADDR: {target.client_id.decode()} → ip={target.ip.decode()}, port={target.port.decode()}")
+        self.socket.send_multipart([client_rid, b"", b"ADDR", target.client_id, target.ip, target.port])
+
+    def handle_get_caps(self, client_rid: bytes, sender, args: list):
+        # [client_rid, b'', b'GET_CAPS', target_id]
+        if not args:
+            logger.warning("GET_CAPS: 대상 ID 누락")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid GET_CAPS format"])
+            return
+        target = self.clients.get(args[0])
+        if target is not None:
+            caps = target.capabilities
+        else:
+            # 서비스 그룹은 모든 멤버가 지원하는 기능으로 응답
+            caps = self.groups.capabilities(args[0], self.clients)
+        if caps is None:
+            logger.info(f"GET_CAPS: {args[0].decode(errors='replace')} 정보 없음")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown target"])
+            return
+        self.socket.send_multipart([
+            client_rid, b"",
+            b"CAPS", args[0], encode_capabilities(caps)
+        ])
+
+    def handle_ping(self, client_rid: bytes, sender, args: list):
+        # PING 메시지 처리: [client_rid, b'', b'PING', from_id, target_id1, target_id2, ...]
+        # 하트비트: [client_rid, b'', b'PING', from_id] → 브로커가 바로 PONG 응답
+        if not args:
+            logger.warning(f"잘못된 PING 형식: {args}")
+            self.socket.send_multipart([client_rid, b"", b"ERROR", b"Invalid PING format"])
+            return
+
+        sender_id = args[0]  # 원래 발신자 ID
+        target_ids = args[1:]  # 목적지 ID 목록
+
+        # target_ids가 비어있거나, from_id와 target_id[0]이 같으면 바로 PONG 응답
+        if not target_ids or sender_id == target_ids[0]:
+            from_rid = self.clients.routing_id(sender_id)
+            if from_rid is not None:
+                logger.debug(f"PING to BROKER: {sender_id.decode()}에게 PONG 응답")
+                self.socket.send_multipart([
+                    from_rid, b"",
+                    b"PONG", from_rid, b"", b""
+                ])
+            return
+
+        logger.info(f"PING 요청: {sender_id.decode(errors='replace')} → {[t.decode(errors='replace') for t in target_ids]}")
+
+        # 각 목적지 ID에 대해 PING 전송
+        for target_id in target_ids:
+            target = self.resolve(target_id)
+            if target is None:
+                # 목적지 ID가 유효한지 / 등록되어 있는지 구분하여 응답
+                if not ID_PATTERN.match(target_id):
+                    logger.info(f"PING: 잘못된 목적지 ID: {target_id}")
+                    self.socket.send_multipart([client_rid, b"", b"ERROR", b"Bad target ID: " + target_id])
+                else:
+                    logger.info(f"PING: 미등록 목적지: {target_id.decode()}")
+                    self.socket.send_multipart([client_rid, b"", b"ERROR", b"Unknown target: " + target_id])
+                continue
+
+            logger.info(f"PING 전달: {sender_id.decode(errors='replace')} → {target_id.decode()} "
+                        f"(routing_id={target.routing_id})")
+
+            # 목적지에 PING 메시지 전송 (routing_id를 정확히 사용)
+            # 프레임: [routing_id, b'', b'PING', sender_id]
+            self.socket.send_multipart([
+                target.routing_id, b"",
+                b"PING", sender_id
+            ])
+        # 목적지로부터 PONG 응답을 기다림 (비동기적으로 처리됨)
+
+    def handle_pong(self, client_rid: bytes, sender, args: list):
+        # PONG 메시지 처리: [client_rid, b'', b'PONG', target_id]
+        if len(args) < 1:
+            logger.warning(f"잘못된 PONG 형식: {args}")
+            return
+
+        target = self.resolve(args[0])  # PONG 응답을 받을 대상
+        if target is None:
+            logger.info(f"PONG: 미등록 또는 잘못된 목적지: {args[0]}")
+            return
+
+        # 원래 발신자에게 PONG 응답 전달 (누구로부터 온 응답인지 포함)
+        logger.info(f"PONG 전달: {sender.client_id.decode()} {sender.ip} {sender.port} → {target.client_id.decode()}")
+        self.socket.send_multipart([
+            target.routing_id, b"",
+            b"PONG", sender.client_id, sender.ip, sender.port
+        ])
+
+
+def start_metrics_server(collect, port: int, host: str = None):
+    """
+    Prometheus /metrics HTTP 서버를 데몬 스레드로 시작
+
+    collect: MetricFamily 목록을 반환하는 함수 (요청마다 호출)
+    """
+    if not HAS_METRICS:
+        logger.warning("aiagent.utils.metrics를 찾을 수 없어 BROKER_METRICS_PORT를 사용하지 않습니다")
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            try:
+                body = "".join(render_family(*family) for family in collect()).encode("utf-8")
+            except Exception as e:
+                logger.error(f"메트릭 수집 실패: {e}")
+                self.send_error(500)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", METRICS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug("metrics: " + format, *args)
+
+    server = ThreadingHTTPServer((host or METRICS_HOST, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="broker-metrics", daemon=True).start()
+    logger.info(f"메트릭 HTTP 서버 시작: http://{host or METRICS_HOST}:{port}/metrics")
+    return server
+
+
+def broker():
+    """브로커 실행 (BROKER_PORT 환경변수의 포트에 바인드)"""
+    Broker().run()
 
 def watchdog():
     """
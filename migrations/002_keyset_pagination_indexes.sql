@@ -0,0 +1,14 @@
+-- Keyset(커서) 페이지네이션용 인덱스 (기존 데이터베이스에 적용)
+-- 목록은 (created_at DESC, id DESC) 순서로 "(created_at, id) < (커서)" 조건을 사용하므로
+-- 필터 컬럼 + created_at + id 복합 인덱스로 페이지 깊이와 관계없이 limit + 1행만 읽습니다.
+-- CONCURRENTLY는 트랜잭션 밖에서 실행해야 합니다: psql -f migrations/002_keyset_pagination_indexes.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_errors_created_id ON parsing_errors(created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_errors_client_created_id ON parsing_errors(client_id, created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_errors_status_created_id ON parsing_errors(status, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_rules_created_id ON parsing_rules(created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_rules_client_created_id ON parsing_rules(client_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ml_training_data_created_id ON ml_training_data(created_at DESC, id DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ml_training_data_client_created_id ON ml_training_data(client_id, created_at DESC, id DESC);
@@ -0,0 +1,290 @@
+-- 통계 요약 테이블 (기존 데이터베이스에 적용, 여러 번 실행해도 안전)
+-- 관리자 통계 API가 원본 테이블 전체를 집계하지 않도록 클라이언트 / 상태 / 일자별 카운터를 유지합니다.
+--
+-- - 원본 테이블의 문장 단위(FOR EACH STATEMENT) AFTER 트리거가 변경된 행(transition table)을
+--   (client_id, 일자[, 상태])별로 묶어 요약 행에 증감분만 반영합니다.
+--   receipt_records 배치 저장(multi-row INSERT ... ON CONFLICT)도 문장당 그룹 수만큼만 갱신합니다.
+-- - 일자는 created_at 기준이며, 상태 변경은 같은 일자의 이전 상태 -1 / 새 상태 +1로 반영됩니다.
+-- - 트리거를 거치지 않는 변경(TRUNCATE, 트리거 비활성화 후 적재 등) 뒤에는 재계산이 필요합니다:
+--     python scripts/rebuild_statistics.py            (또는 SELECT * FROM rebuild_statistics_summaries();)
+--
+-- 실행: psql -f migrations/003_statistics_summary.sql (마지막에 기존 데이터로 요약을 한 번 재계산합니다)
+
+-- === 요약 테이블 ===
+
+CREATE TABLE IF NOT EXISTS parsing_error_daily_stats (
+    client_id VARCHAR(50) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    stat_date DATE NOT NULL,
+    error_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (client_id, status, stat_date)
+);
+
+CREATE TABLE IF NOT EXISTS receipt_record_daily_stats (
+    client_id VARCHAR(50) NOT NULL,
+    stat_date DATE NOT NULL,
+    success_count BIGINT NOT NULL DEFAULT 0,
+    error_count BIGINT NOT NULL DEFAULT 0,
+    processing_time_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (client_id, stat_date)
+);
+
+CREATE TABLE IF NOT EXISTS ml_training_data_daily_stats (
+    client_id VARCHAR(50) NOT NULL,
+    stat_date DATE NOT NULL,
+    data_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (client_id, stat_date)
+);
+
+-- 클라이언트 조건 없는 기간 조회용
+CREATE INDEX IF NOT EXISTS idx_parsing_error_daily_stats_date ON parsing_error_daily_stats(stat_date);
+CREATE INDEX IF NOT EXISTS idx_receipt_record_daily_stats_date ON receipt_record_daily_stats(stat_date);
+CREATE INDEX IF NOT EXISTS idx_ml_training_data_daily_stats_date ON ml_training_data_daily_stats(stat_date);
+
+-- === 증분 반영 트리거 함수 ===
+-- INSERT: new_rows +1, DELETE: old_rows -1, UPDATE: 집계 컬럼이 바뀐 행만 이전 값 -1 / 새 값 +1
+
+CREATE OR REPLACE FUNCTION parsing_error_stats_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO parsing_error_daily_stats AS s (client_id, status, stat_date, error_count)
+        SELECT client_id, status, COALESCE(created_at::date, CURRENT_DATE), count(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (client_id, status, stat_date)
+        DO UPDATE SET error_count = s.error_count + EXCLUDED.error_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO parsing_error_daily_stats AS s (client_id, status, stat_date, error_count)
+        SELECT client_id, status, COALESCE(created_at::date, CURRENT_DATE), -count(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3
+        ON CONFLICT (client_id, status, stat_date)
+        DO UPDATE SET error_count = s.error_count + EXCLUDED.error_count;
+    ELSE
+        INSERT INTO parsing_error_daily_stats AS s (client_id, status, stat_date, error_count)
+        SELECT client_id, status, stat_date, sum(delta)
+        FROM (
+            SELECT o.client_id, o.status, COALESCE(o.created_at::date, CURRENT_DATE) AS stat_date, -1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.status, o.created_at) IS DISTINCT FROM (n.client_id, n.status, n.created_at)
+            UNION ALL
+            SELECT n.client_id, n.status, COALESCE(n.created_at::date, CURRENT_DATE), 1
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.status, o.created_at) IS DISTINCT FROM (n.client_id, n.status, n.created_at)
+        ) changed
+        GROUP BY 1, 2, 3
+        HAVING sum(delta) <> 0
+        ON CONFLICT (client_id, status, stat_date)
+        DO UPDATE SET error_count = s.error_count + EXCLUDED.error_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION receipt_record_stats_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO receipt_record_daily_stats AS s (client_id, stat_date, success_count, error_count, processing_time_sum)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE),
+               count(*) FILTER (WHERE is_valid IS TRUE),
+               count(*) FILTER (WHERE is_valid IS NOT TRUE),
+               COALESCE(sum(processing_time), 0)
+        FROM new_rows
+        GROUP BY 1, 2
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET success_count = s.success_count + EXCLUDED.success_count,
+                      error_count = s.error_count + EXCLUDED.error_count,
+                      processing_time_sum = s.processing_time_sum + EXCLUDED.processing_time_sum;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO receipt_record_daily_stats AS s (client_id, stat_date, success_count, error_count, processing_time_sum)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE),
+               -count(*) FILTER (WHERE is_valid IS TRUE),
+               -count(*) FILTER (WHERE is_valid IS NOT TRUE),
+               -COALESCE(sum(processing_time), 0)
+        FROM old_rows
+        GROUP BY 1, 2
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET success_count = s.success_count + EXCLUDED.success_count,
+                      error_count = s.error_count + EXCLUDED.error_count,
+                      processing_time_sum = s.processing_time_sum + EXCLUDED.processing_time_sum;
+    ELSE
+        -- 재시도 요청의 ON CONFLICT (transaction_id) DO UPDATE로 결과가 바뀐 경우
+        INSERT INTO receipt_record_daily_stats AS s (client_id, stat_date, success_count, error_count, processing_time_sum)
+        SELECT client_id, stat_date,
+               COALESCE(sum(delta) FILTER (WHERE is_valid IS TRUE), 0),
+               COALESCE(sum(delta) FILTER (WHERE is_valid IS NOT TRUE), 0),
+               COALESCE(sum(delta * processing_time), 0)
+        FROM (
+            SELECT o.client_id, COALESCE(o.created_at::date, CURRENT_DATE) AS stat_date, o.is_valid, o.processing_time, -1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.created_at, o.is_valid, o.processing_time)
+                  IS DISTINCT FROM (n.client_id, n.created_at, n.is_valid, n.processing_time)
+            UNION ALL
+            SELECT n.client_id, COALESCE(n.created_at::date, CURRENT_DATE), n.is_valid, n.processing_time, 1
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.created_at, o.is_valid, o.processing_time)
+                  IS DISTINCT FROM (n.client_id, n.created_at, n.is_valid, n.processing_time)
+        ) changed
+        GROUP BY 1, 2
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET success_count = s.success_count + EXCLUDED.success_count,
+                      error_count = s.error_count + EXCLUDED.error_count,
+                      processing_time_sum = s.processing_time_sum + EXCLUDED.processing_time_sum;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ml_training_data_stats_apply()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO ml_training_data_daily_stats AS s (client_id, stat_date, data_count)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE), count(*)
+        FROM new_rows
+        GROUP BY 1, 2
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET data_count = s.data_count + EXCLUDED.data_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO ml_training_data_daily_stats AS s (client_id, stat_date, data_count)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE), -count(*)
+        FROM old_rows
+        GROUP BY 1, 2
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET data_count = s.data_count + EXCLUDED.data_count;
+    ELSE
+        INSERT INTO ml_training_data_daily_stats AS s (client_id, stat_date, data_count)
+        SELECT client_id, stat_date, sum(delta)
+        FROM (
+            SELECT o.client_id, COALESCE(o.created_at::date, CURRENT_DATE) AS stat_date, -1 AS delta
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.created_at) IS DISTINCT FROM (n.client_id, n.created_at)
+            UNION ALL
+            SELECT n.client_id, COALESCE(n.created_at::date, CURRENT_DATE), 1
+            FROM old_rows o JOIN new_rows n ON n.id = o.id
+            WHERE (o.client_id, o.created_at) IS DISTINCT FROM (n.client_id, n.created_at)
+        ) changed
+        GROUP BY 1, 2
+        HAVING sum(delta) <> 0
+        ON CONFLICT (client_id, stat_date)
+        DO UPDATE SET data_count = s.data_count + EXCLUDED.data_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- === 트리거 (transition table은 이벤트 하나당 트리거 하나만 허용) ===
+
+DROP TRIGGER IF EXISTS parsing_errors_stats_insert ON parsing_errors;
+CREATE TRIGGER parsing_errors_stats_insert
+    AFTER INSERT ON parsing_errors
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION parsing_error_stats_apply();
+
+DROP TRIGGER IF EXISTS parsing_errors_stats_update ON parsing_errors;
+CREATE TRIGGER parsing_errors_stats_update
+    AFTER UPDATE ON parsing_errors
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION parsing_error_stats_apply();
+
+DROP TRIGGER IF EXISTS parsing_errors_stats_delete ON parsing_errors;
+CREATE TRIGGER parsing_errors_stats_delete
+    AFTER DELETE ON parsing_errors
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION parsing_error_stats_apply();
+
+DROP TRIGGER IF EXISTS receipt_records_stats_insert ON receipt_records;
+CREATE TRIGGER receipt_records_stats_insert
+    AFTER INSERT ON receipt_records
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION receipt_record_stats_apply();
+
+DROP TRIGGER IF EXISTS receipt_records_stats_update ON receipt_records;
+CREATE TRIGGER receipt_records_stats_update
+    AFTER UPDATE ON receipt_records
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION receipt_record_stats_apply();
+
+DROP TRIGGER IF EXISTS receipt_records_stats_delete ON receipt_records;
+CREATE TRIGGER receipt_records_stats_delete
+    AFTER DELETE ON receipt_records
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION receipt_record_stats_apply();
+
+DROP TRIGGER IF EXISTS ml_training_data_stats_insert ON ml_training_data;
+CREATE TRIGGER ml_training_data_stats_insert
+    AFTER INSERT ON ml_training_data
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ml_training_data_stats_apply();
+
+DROP TRIGGER IF EXISTS ml_training_data_stats_update ON ml_training_data;
+CREATE TRIGGER ml_training_data_stats_update
+    AFTER UPDATE ON ml_training_data
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ml_training_data_stats_apply();
+
+DROP TRIGGER IF EXISTS ml_training_data_stats_delete ON ml_training_data;
+CREATE TRIGGER ml_training_data_stats_delete
+    AFTER DELETE ON ml_training_data
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION ml_training_data_stats_apply();
+
+-- === 재계산 ===
+-- target: 'parsing_errors' / 'receipt_records' / 'ml_training_data' (NULL이면 전체)
+-- 재계산하는 동안 원본 테이블을 SHARE 모드로 잠가 쓰기를 대기시킵니다 (조회는 가능).
+-- DELETE 후 다시 채우므로 커밋 전까지 다른 세션은 이전 요약을 그대로 읽습니다.
+
+CREATE OR REPLACE FUNCTION rebuild_statistics_summaries(target TEXT DEFAULT NULL)
+RETURNS TABLE (summary_table TEXT, row_count BIGINT) AS $$
+BEGIN
+    IF target IS NOT NULL AND target NOT IN ('parsing_errors', 'receipt_records', 'ml_training_data') THEN
+        RAISE EXCEPTION 'unknown statistics source table: %', target;
+    END IF;
+
+    IF target IS NULL OR target = 'parsing_errors' THEN
+        LOCK TABLE parsing_errors IN SHARE MODE;
+        DELETE FROM parsing_error_daily_stats;
+        INSERT INTO parsing_error_daily_stats (client_id, status, stat_date, error_count)
+        SELECT client_id, status, COALESCE(created_at::date, CURRENT_DATE), count(*)
+        FROM parsing_errors
+        GROUP BY 1, 2, 3;
+        RETURN QUERY SELECT 'parsing_error_daily_stats'::TEXT, count(*) FROM parsing_error_daily_stats;
+    END IF;
+
+    IF target IS NULL OR target = 'receipt_records' THEN
+        LOCK TABLE receipt_records IN SHARE MODE;
+        DELETE FROM receipt_record_daily_stats;
+        INSERT INTO receipt_record_daily_stats (client_id, stat_date, success_count, error_count, processing_time_sum)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE),
+               count(*) FILTER (WHERE is_valid IS TRUE),
+               count(*) FILTER (WHERE is_valid IS NOT TRUE),
+               COALESCE(sum(processing_time), 0)
+        FROM receipt_records
+        GROUP BY 1, 2;
+        RETURN QUERY SELECT 'receipt_record_daily_stats'::TEXT, count(*) FROM receipt_record_daily_stats;
+    END IF;
+
+    IF target IS NULL OR target = 'ml_training_data' THEN
+        LOCK TABLE ml_training_data IN SHARE MODE;
+        DELETE FROM ml_training_data_daily_stats;
+        INSERT INTO ml_training_data_daily_stats (client_id, stat_date, data_count)
+        SELECT client_id, COALESCE(created_at::date, CURRENT_DATE), count(*)
+        FROM ml_training_data
+        GROUP BY 1, 2;
+        RETURN QUERY SELECT 'ml_training_data_daily_stats'::TEXT, count(*) FROM ml_training_data_daily_stats;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT * FROM rebuild_statistics_summaries();
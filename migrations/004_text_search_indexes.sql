@@ -0,0 +1,15 @@
+-- 텍스트 검색용 pg_trgm GIN 인덱스 (기존 데이터베이스에 적용)
+-- 훈련 데이터 / 파싱 에러 검색의 ILIKE '%검색어%' 조건을 순차 스캔 대신 Bitmap Index Scan으로 처리합니다.
+-- 한국어 어절 안의 부분 문자열도 찾아야 하므로 tsvector 대신 trigram을 사용합니다
+-- (한글 trigram은 데이터베이스 LC_CTYPE이 UTF-8 로케일이어야 생성되며, C 로케일에서는 무시됩니다).
+-- JSONB 컬럼은 Repository 검색 조건과 같은 식(receipt_data::text)으로 인덱싱합니다.
+-- CONCURRENTLY는 트랜잭션 밖에서 실행해야 합니다: psql -f migrations/004_text_search_indexes.sql
+-- 인덱스 사용 확인: python test_text_search_explain.py
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ml_training_data_xml_result_trgm ON ml_training_data USING gin (xml_result gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_ml_training_data_receipt_data_trgm ON ml_training_data USING gin ((receipt_data::text) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_errors_error_message_trgm ON parsing_errors USING gin (error_message gin_trgm_ops);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_parsing_errors_receipt_data_trgm ON parsing_errors USING gin ((receipt_data::text) gin_trgm_ops);
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+관리자 API DB 접근 동시성 벤치마크 (동기 Session vs AsyncSession)
+
+async def 라우트에서 동기 AdminService를 호출하면 쿼리가 끝날 때까지 이벤트 루프 전체가 멈춥니다.
+이 스크립트는 같은 이벤트 루프에서 관리자 요청을 동시에 실행하면서, 10ms마다 깨어나는
+프로브 코루틴(헬스체크 역할)이 얼마나 늦게 실행되는지(이벤트 루프 지연)를 측정합니다.
+
+- sync : 기존 라우트와 같이 코루틴 안에서 AdminService(동기 Session) 호출
+- async: AsyncAdminService(AsyncSession + asyncpg) await
+
+DATABASE_URL의 PostgreSQL이 필요합니다. --operation sleep은 pg_sleep으로 느린 쿼리를 흉내내므로
+빈 데이터베이스에서도 차이를 확인할 수 있습니다.
+
+측정 예 (PostgreSQL 18, 1코어, parsing_errors 5만 행, --requests 200 --concurrency 10):
+    operation  | mode  |  req/s | req p50 ms | lag p99 ms | lag max ms
+    sleep 50ms | sync  |   19.3 |      51.74 |   10370.73 |   10370.73
+               | async |  175.5 |      54.13 |        4.4 |      10.07
+    list       | sync  |  283.6 |       3.45 |     694.12 |     694.12
+               | async |  246.9 |      36.39 |      18.24 |      18.24
+    statistics | sync  |  993.0 |       0.97 |     190.37 |     190.37
+               | async |  743.5 |      10.46 |       12.0 |       12.0
+    동기 호출은 요청이 모두 끝날 때까지 루프를 막아 프로브가 한 번만 실행됩니다 (lag = 전체 실행 시간).
+    빠른 쿼리는 코어 하나에서 동기 호출의 처리량이 더 높지만, 그동안 다른 요청 / 헬스체크가 모두 멈춥니다.
+
+사용 예:
+    python scripts/bench_admin_concurrency.py
+    python scripts/bench_admin_concurrency.py --operation list --requests 500 --concurrency 20
+    python scripts/bench_admin_concurrency.py --operation sleep --query-delay 0.05
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv(PROJECT_ROOT / ".env")
+
+from sqlalchemy import text  # noqa: E402
+
+from aiagent.database import SessionLocal, AsyncSessionLocal, async_engine, engine  # noqa: E402
+from aiagent.services.admin_service import AdminService, AsyncAdminService  # noqa: E402
+
+PROBE_INTERVAL = 0.01
+
+
+def percentile(values, ratio: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * ratio), len(ordered) - 1)]
+
+
+def run_sync(operation: str, delay: float):
+    with SessionLocal() as db:
+        if operation == "sleep":
+            db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+        elif operation == "statistics":
+            AdminService(db).get_error_statistics()
+        else:
+            AdminService(db).get_parsing_errors(page=1, limit=20)
+
+
+async def run_async(operation: str, delay: float):
+    async with AsyncSessionLocal() as db:
+        if operation == "sleep":
+            await db.execute(text("SELECT pg_sleep(:delay)"), {"delay": delay})
+        elif operation == "statistics":
+            await AsyncAdminService(db).get_error_statistics()
+        else:
+            await AsyncAdminService(db).get_parsing_errors(page=1, limit=20)
+
+
+async def probe(stop: asyncio.Event, lags: list):
+    """PROBE_INTERVAL마다 깨어나 예정 시각보다 늦어진 시간을 기록"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(max(loop.time() - expected, 0.0))
+
+
+async def run_mode(mode: str, args) -> dict:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one_request():
+        async with semaphore:
+            start = time.perf_counter()
+            if mode == "sync":
+                run_sync(args.operation, args.query_delay)
+            else:
+                await run_async(args.operation, args.query_delay)
+            latencies.append(time.perf_counter() - start)
+
+    # 연결 풀 준비 (첫 연결 비용 제외)
+    if mode == "sync":
+        run_sync(args.operation, 0)
+    else:
+        await run_async(args.operation, 0)
+
+    stop = asyncio.Event()
+    lags = []
+    probe_task = asyncio.create_task(probe(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    return {
+        "mode": mode,
+        "requests": args.requests,
+        "seconds": round(elapsed, 3),
+        "req_per_sec": round(args.requests / elapsed, 1) if elapsed else 0.0,
+        "request_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "loop_lag_p50_ms": round(percentile(lags, 0.5) * 1000, 2),
+        "loop_lag_p99_ms": round(percentile(lags, 0.99) * 1000, 2),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+        "probe_ticks": len(lags),
+    }
+
+
+async def main_async(args):
+    results = []
+    for mode in args.modes.split(","):
+        results.append(await run_mode(mode.strip(), args))
+    await async_engine.dispose()
+    engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="관리자 API 동기 / 비동기 DB 접근 동시성 비교")
+    parser.add_argument("--operation", choices=["list", "statistics", "sleep"], default="list",
+                        help="list: 에러 목록 1페이지, statistics: 에러 통계, sleep: pg_sleep(--query-delay)")
+    parser.add_argument("--query-delay", type=float, default=0.05, help="--operation sleep의 쿼리 시간 (초)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10, help="동시 요청 수 (비동기 풀 크기 이하 권장)")
+    parser.add_argument("--modes", default="sync,async")
+    args = parser.parse_args()
+
+    print(f"operation: {args.operation}, requests: {args.requests}, concurrency: {args.concurrency}, "
+          f"probe interval: {PROBE_INTERVAL * 1000:.0f}ms")
+    print(f"{'mode':>6} | {'req/s':>8} | {'req p50 ms':>10} | {'lag p50 ms':>10} | {'lag p99 ms':>10} | {'lag max ms':>10}")
+    for result in asyncio.run(main_async(args)):
+        print(f"{result['mode']:>6} | {result['req_per_sec']:>8} | {result['request_p50_ms']:>10} | "
+              f"{result['loop_lag_p50_ms']:>10} | {result['loop_lag_p99_ms']:>10} | {result['loop_lag_max_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+브로커 처리량 벤치마크
+
+brokerserver.py를 별도 프로세스로 띄우고(또는 --no-spawn으로 실행 중인 브로커 사용),
+여러 발신 클라이언트가 하나의 수신 클라이언트에게 메시지를 전달하는 동안
+브로커가 초당 몇 개의 메시지를 중계하는지 측정합니다.
+
+사용 예:
+    python scripts/bench_broker.py --senders 4 --messages 20000
+    python scripts/bench_broker.py --command AI_OK --size 2048
+    python scripts/bench_broker.py --no-spawn --port 5555
+    python scripts/bench_broker.py --compare-zero-copy --command AI_MERGE --sizes 1024,102400,524288
+
+명령을 섞은 트래픽의 지연 시간(p50/p99) / 브로커 CPU / JSON 결과 비교는 loadgen_broker.py를 사용하세요.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import zmq
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+SINK_ID = b"BNSINK"
+
+
+def sender_id(index: int) -> bytes:
+    """6자리 대문자 ID (브로커 ID 규칙)"""
+    letters = ""
+    for _ in range(2):
+        letters = chr(ord("A") + index % 26) + letters
+        index //= 26
+    return b"BNCH" + letters.encode()
+
+
+def connect(ctx: zmq.Context, endpoint: str, identity: bytes) -> zmq.Socket:
+    sock = ctx.socket(zmq.DEALER)
+    sock.setsockopt(zmq.IDENTITY, identity)
+    sock.setsockopt(zmq.LINGER, 0)
+    sock.setsockopt(zmq.SNDHWM, 0)
+    sock.setsockopt(zmq.RCVHWM, 0)
+    sock.connect(endpoint)
+    return sock
+
+
+def register(sock: zmq.Socket, identity: bytes, timeout_ms: int = 5000):
+    sock.send_multipart([b"", b"REGISTER", identity, b"127.0.0.1", b"0"])
+    if not sock.poll(timeout_ms):
+        raise RuntimeError(f"REGISTER 응답 없음: {identity.decode()}")
+    reply = sock.recv_multipart()
+    if len(reply) < 2 or reply[1] != b"OK":
+        raise RuntimeError(f"REGISTER 실패: {reply}")
+
+
+def build_frames(command: str, size: int):
+    payload = b"x" * size
+    if command == "AI_OK":
+        return [b"", b"AI_OK", SINK_ID, b"BENCH-TXID", payload]
+    if command in ("AI_GENERATE", "AI_MERGE"):
+        return [b"", command.encode(), SINK_ID, payload]
+    return [b"", b"BILL_SEND", SINK_ID, payload]
+
+
+def wait_for_broker(endpoint: str, timeout: float = 10.0):
+    """브로커가 REGISTER에 응답할 때까지 대기"""
+    ctx = zmq.Context.instance()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        probe = connect(ctx, endpoint, b"BNPROB")
+        try:
+            register(probe, b"BNPROB", timeout_ms=500)
+            return
+        except RuntimeError:
+            continue
+        finally:
+            probe.close()
+    raise RuntimeError(f"브로커가 {timeout}초 안에 응답하지 않습니다: {endpoint}")
+
+
+def spawn_broker(script: Path, port: int, extra_env=None):
+    """브로커를 별도 프로세스로 실행 (로그 파일은 임시 디렉터리에 생성)"""
+    workdir = tempfile.mkdtemp(prefix="bench_broker_")
+    env = dict(os.environ, BROKER_PORT=str(port), PYTHONPATH=str(PROJECT_ROOT))
+    env.update(extra_env or {})
+    proc = subprocess.Popen(
+        [sys.executable, str(script)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return proc
+
+
+def run(endpoint: str, senders: int, messages: int, command: str, size: int, window: int):
+    """
+    벤치마크 실행
+
+    Returns:
+        dict: 전달 메시지 수, 소요 시간, 초당 메시지 수, MB/s
+    """
+    ctx = zmq.Context()
+    sink = connect(ctx, endpoint, SINK_ID)
+    register(sink, SINK_ID)
+
+    sockets = []
+    for index in range(senders):
+        identity = sender_id(index)
+        sock = connect(ctx, endpoint, identity)
+        register(sock, identity)
+        sockets.append(sock)
+
+    total = senders * messages
+    frames = build_frames(command, size)
+    received = [0]
+    sent = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def sink_loop():
+        while received[0] < total:
+            if sink.poll(5000) == 0:
+                break
+            sink.recv_multipart(copy=False)
+            received[0] += 1
+        done.set()
+
+    def sender_loop(sock: zmq.Socket):
+        for _ in range(messages):
+            # 수신 측이 window 이상 밀리면 잠시 대기 (브로커 HWM 초과로 인한 유실 방지)
+            while sent[0] - received[0] > window:
+                time.sleep(0.0005)
+            sock.send_multipart(frames, copy=False)
+            with lock:
+                sent[0] += 1
+
+    sink_thread = threading.Thread(target=sink_loop, daemon=True)
+    sink_thread.start()
+    start = time.perf_counter()
+    threads = [threading.Thread(target=sender_loop, args=(sock,), daemon=True) for sock in sockets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.wait()
+    elapsed = time.perf_counter() - start
+
+    for sock in sockets + [sink]:
+        sock.close()
+    ctx.term()
+
+    return {
+        "command": command,
+        "senders": senders,
+        "payload_bytes": size,
+        "sent": sent[0],
+        "received": received[0],
+        "seconds": round(elapsed, 3),
+        "msgs_per_sec": round(received[0] / elapsed, 1) if elapsed else 0.0,
+        "mb_per_sec": round(received[0] * size / elapsed / 1e6, 2) if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="브로커 처리량 벤치마크")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15555)
+    parser.add_argument("--no-spawn", action="store_true", help="이미 실행 중인 브로커 사용")
+    parser.add_argument("--broker-script", default=str(PROJECT_ROOT / "brokerserver.py"))
+    parser.add_argument("--senders", type=int, default=4)
+    parser.add_argument("--messages", type=int, default=10000, help="발신 클라이언트당 메시지 수")
+    parser.add_argument("--command", choices=["BILL_SEND", "AI_OK", "AI_GENERATE", "AI_MERGE"], default="BILL_SEND")
+    parser.add_argument("--size", type=int, default=256, help="payload 크기 (bytes)")
+    parser.add_argument("--window", type=int, default=2000, help="최대 미수신 메시지 수")
+    parser.add_argument("--zero-copy-threshold", type=int, default=None,
+                        help="브로커 BROKER_ZERO_COPY_THRESHOLD (0: zero-copy 비활성화)")
+    parser.add_argument("--compare-zero-copy", action="store_true",
+                        help="--sizes 각각에 대해 zero-copy 비활성화/활성화 처리량 비교")
+    parser.add_argument("--sizes", default="1024,102400,524288", help="--compare-zero-copy용 payload 크기 목록")
+    args = parser.parse_args()
+
+    if args.compare_zero_copy:
+        compare_zero_copy(args)
+        return
+
+    env = {}
+    if args.zero_copy_threshold is not None:
+        env["BROKER_ZERO_COPY_THRESHOLD"] = str(args.zero_copy_threshold)
+    result = run_once(args, args.size, env)
+    for key, value in result.items():
+        print(f"{key:>14}: {value}")
+
+
+def run_once(args, size: int, env: dict):
+    """브로커를 (필요 시) 띄우고 한 번 측정"""
+    endpoint = f"tcp://{args.host}:{args.port}"
+    proc = None
+    if not args.no_spawn:
+        proc = spawn_broker(Path(args.broker_script), args.port, env)
+    try:
+        wait_for_broker(endpoint)
+        return run(endpoint, args.senders, args.messages, args.command, size, args.window)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=5)
+
+
+def compare_zero_copy(args):
+    """payload 크기별 복사 전달 / zero-copy 전달 처리량 비교표 출력"""
+    if args.no_spawn:
+        raise SystemExit("--compare-zero-copy는 브로커를 직접 띄워야 합니다 (--no-spawn 불가)")
+    threshold = args.zero_copy_threshold or 65536
+    print(f"{'payload':>10} | {'copy msgs/s':>12} | {'zero-copy msgs/s':>16} | {'copy MB/s':>10} | {'zero-copy MB/s':>14} | {'speedup':>7}")
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        copied = run_once(args, size, {"BROKER_ZERO_COPY_THRESHOLD": "0"})
+        zero_copy = run_once(args, size, {"BROKER_ZERO_COPY_THRESHOLD": str(threshold)})
+        speedup = zero_copy["msgs_per_sec"] / copied["msgs_per_sec"] if copied["msgs_per_sec"] else 0.0
+        print(f"{size:>10} | {copied['msgs_per_sec']:>12} | {zero_copy['msgs_per_sec']:>16} | "
+              f"{copied['mb_per_sec']:>10} | {zero_copy['mb_per_sec']:>14} | {speedup:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
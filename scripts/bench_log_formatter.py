@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+로그 포맷터 마이크로벤치마크
+
+기존 KSTFormatter(레코드마다 pytz 시간대로 datetime 생성 + strftime)와
+현재 KSTFormatter(초 단위 문자열 캐시 + 고정 UTC+9)의 레코드당 format() 비용을 비교합니다.
+
+- same-second: 모든 레코드가 같은 초에 생성 (DEBUG 로그가 몰리는 실제 상황, 캐시 적중)
+- per-second: 레코드마다 초가 바뀜 (캐시가 항상 빗나가는 최악의 경우)
+
+사용 예:
+    python scripts/bench_log_formatter.py
+    python scripts/bench_log_formatter.py --records 200000 --repeat 5
+"""
+
+import argparse
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from aiagent.utils.logger import KSTFormatter  # noqa: E402
+
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DATEFMT = "%Y-%m-%d %H:%M:%S"
+
+
+class LegacyKSTFormatter(logging.Formatter):
+    """변경 전 구현 (pytz 필요)"""
+
+    def formatTime(self, record, datefmt=None):
+        import pytz
+        dt = datetime.fromtimestamp(record.created, tz=pytz.timezone("Asia/Seoul"))
+        return dt.strftime(datefmt or "%Y-%m-%d %H:%M:%S")
+
+
+def make_records(count: int, same_second: bool):
+    base = int(time.time())
+    records = []
+    for index in range(count):
+        record = logging.LogRecord("aiagent.bench", logging.INFO, __file__, 0,
+                                   "영수증 처리 완료: %s", (index,), None)
+        record.created = base + 0.25 if same_second else base + index + 0.25
+        record.msecs = 250.0
+        records.append(record)
+    return records
+
+
+def measure(formatter: logging.Formatter, records, repeat: int) -> float:
+    """레코드당 format() 시간 (마이크로초, repeat 중 최솟값)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        best = min(best, time.perf_counter() - start)
+    return best / len(records) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KSTFormatter 레코드당 비용 비교")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = LegacyKSTFormatter(FORMAT, datefmt=DATEFMT)
+    current = KSTFormatter(FORMAT, datefmt=DATEFMT)
+
+    # 같은 레코드에 대해 출력이 같은지 먼저 확인
+    for record in make_records(3, same_second=False):
+        expected, actual = legacy.format(record), current.format(record)
+        if expected != actual:
+            raise SystemExit(f"출력 불일치:\n  legacy : {expected}\n  current: {actual}")
+
+    print(f"records: {args.records}, repeat: {args.repeat} (format() 레코드당 us, 최솟값)")
+    print(f"{'case':>12} | {'legacy':>8} | {'current':>8} | {'speedup':>7}")
+    for name, same_second in (("same-second", True), ("per-second", False)):
+        records = make_records(args.records, same_second)
+        before = measure(legacy, records, args.repeat)
+        after = measure(current, records, args.repeat)
+        print(f"{name:>12} | {before:>8.2f} | {after:>8.2f} | {before / after:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
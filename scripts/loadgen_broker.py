@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+브로커 부하 생성기 / 지연 시간 벤치마크
+
+시뮬레이션 POS 클라이언트(DEALER) N개와 AI 에이전트 1개를 띄우고 REGISTER / PING / BILL_SEND /
+AI_GENERATE / AI_MERGE를 지정한 비율로 섞어 보내면서 다음을 측정합니다.
+
+- 처리량: 초당 완료 메시지 수 (응답 또는 목적지 수신 기준)
+- 지연 시간 p50 / p99 / max (ms)
+  - BILL_SEND: POS → 브로커 → POS 단방향 전달 시간
+  - AI_GENERATE / AI_MERGE: POS → 브로커 → 에이전트(즉시 AI_OK) → 브로커 → POS 왕복 시간
+  - PING / REGISTER: POS → 브로커 → POS 왕복 시간
+- 브로커 CPU 사용률 (/proc/<pid>/stat 기준, Linux)
+
+--clients에 여러 값을 주면 클라이언트 수별로 브로커를 새로 띄워 측정하고, --idle-clients로
+등록만 하고 메시지를 보내지 않는 클라이언트를 추가해 레지스트리 크기에 따른 지연 변화를 볼 수 있습니다.
+결과는 --output JSON으로 저장하고, --baseline으로 이전 버전 결과와 비교합니다.
+
+사용 예:
+    python scripts/loadgen_broker.py --clients 10,100,500 --duration 10 --output bench.json
+    python scripts/loadgen_broker.py --mix BILL_SEND:60,AI_GENERATE:20,AI_MERGE:5,PING:10,REGISTER:5
+    python scripts/loadgen_broker.py --rate 2000 --idle-clients 5000 --baseline bench.json
+    python scripts/loadgen_broker.py --no-spawn --port 5555 --broker-pid 1234
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import struct
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+import zmq
+
+from bench_broker import PROJECT_ROOT, connect, register, spawn_broker, wait_for_broker
+
+AGENT_ID = b"AIAGNT"
+COMMANDS = ("BILL_SEND", "AI_GENERATE", "AI_MERGE", "PING", "REGISTER")
+DEFAULT_MIX = "BILL_SEND:70,AI_GENERATE:10,AI_MERGE:5,PING:10,REGISTER:5"
+TIMESTAMP = struct.Struct("<d")
+
+
+def client_id(prefix: str, index: int) -> bytes:
+    """prefix(2자) + 대문자 4자리 ID (브로커 ID 규칙: 영문 대문자 6자리)"""
+    letters = ""
+    for _ in range(4):
+        letters = chr(ord("A") + index % 26) + letters
+        index //= 26
+    return (prefix + letters).encode()
+
+
+def parse_mix(spec: str) -> dict:
+    """"BILL_SEND:70,PING:10" 형식의 트래픽 비율 파싱"""
+    mix = {}
+    for item in spec.split(","):
+        name, sep, weight = item.strip().partition(":")
+        if not name:
+            continue
+        name = name.strip().upper()
+        if name not in COMMANDS:
+            raise SystemExit(f"지원하지 않는 명령: {name} (가능: {', '.join(COMMANDS)})")
+        mix[name] = float(weight) if sep else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise SystemExit(f"트래픽 비율이 비어 있습니다: {spec}")
+    return mix
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(q * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_summary(values: list) -> dict:
+    values = sorted(values)
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def process_cpu_seconds(pid: int):
+    """프로세스 누적 CPU 시간 (user + system, 초) - /proc이 없으면 None"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # ')' 이후 필드 기준 utime=11, stime=12 (man proc: 14, 15번째 필드)
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class SimClient:
+    """시뮬레이션 POS 클라이언트 (응답 순서가 보장되는 PING / REGISTER는 FIFO로 지연 측정)"""
+    __slots__ = ("id", "sock", "pings", "registers")
+
+    def __init__(self, identity: bytes, sock: zmq.Socket):
+        self.id = identity
+        self.sock = sock
+        self.pings = deque()
+        self.registers = deque()
+
+
+class LoadGenerator:
+    """단일 스레드 poll 루프로 모든 시뮬레이션 클라이언트를 구동"""
+
+    def __init__(self, endpoint: str, clients: int, mix: dict, rate: float, window: int,
+                 bill_size: int, ai_size: int, seed: int):
+        self.endpoint = endpoint
+        self.client_count = max(clients, 1)
+        self.commands = list(mix)
+        self.weights = [mix[name] for name in self.commands]
+        self.rate = rate
+        self.window = max(window, 1)
+        self.bill_padding = b"x" * max(bill_size - TIMESTAMP.size, 0)
+        self.ai_padding = "x" * max(ai_size - 64, 0)
+        self.rng = random.Random(seed)
+        self.ctx = zmq.Context()
+        self.clients = []
+        self.by_socket = {}
+        self.agent = None
+        self.ai_sent = {}  # transaction_id -> (명령, 전송 시각)
+        self.latencies = {name: [] for name in COMMANDS}
+        self.sent = dict.fromkeys(COMMANDS, 0)
+        self.received = dict.fromkeys(COMMANDS, 0)
+        self.errors = {}
+        self.outstanding = 0
+        self.txid = 0
+        self.measure_from = 0.0  # 이 시각 이전에 보낸 메시지(워밍업)는 집계하지 않음
+
+    # === 준비 ===
+
+    def setup(self, idle_clients: int):
+        self.agent = connect(self.ctx, self.endpoint, AGENT_ID)
+        register(self.agent, AGENT_ID)
+        for index in range(idle_clients):
+            # 레지스트리 크기만 늘리는 클라이언트 (등록 후 소켓을 닫아도 TTL 전까지 레지스트리에 남음)
+            identity = client_id("LI", index)
+            sock = connect(self.ctx, self.endpoint, identity)
+            register(sock, identity)
+            sock.close()
+        for index in range(self.client_count):
+            identity = client_id("LG", index)
+            sock = connect(self.ctx, self.endpoint, identity)
+            register(sock, identity)
+            client = SimClient(identity, sock)
+            self.clients.append(client)
+            self.by_socket[sock] = client
+
+    def close(self):
+        for client in self.clients:
+            client.sock.close()
+        if self.agent is not None:
+            self.agent.close()
+        self.ctx.term()
+
+    # === 송신 ===
+
+    def send_one(self, index: int, now: float):
+        client = self.clients[index % self.client_count]
+        command = self.rng.choices(self.commands, self.weights)[0]
+        sock = client.sock
+        if command == "BILL_SEND":
+            peer = self.clients[(index + 1) % self.client_count]
+            sock.send_multipart([b"", b"BILL_SEND", peer.id, TIMESTAMP.pack(now) + self.bill_padding])
+        elif command == "PING":
+            client.pings.append(now)
+            sock.send_multipart([b"", b"PING", client.id])
+        elif command == "REGISTER":
+            client.registers.append(now)
+            sock.send_multipart([b"", b"REGISTER", client.id, b"127.0.0.1", b"0"])
+        else:
+            self.txid += 1
+            txid = f"LG-{self.txid}"
+            self.ai_sent[txid.encode()] = (command, now)
+            body = json.dumps({"transaction_id": txid, "client_id": client.id.decode(),
+                               "receipt_data": self.ai_padding})
+            sock.send_multipart([b"", command.encode(), AGENT_ID, body.encode()])
+        if now >= self.measure_from:
+            self.sent[command] += 1
+        self.outstanding += 1
+
+    # === 수신 ===
+
+    def complete(self, command: str, started: float, now: float):
+        self.outstanding -= 1
+        if started >= self.measure_from:
+            self.received[command] += 1
+            self.latencies[command].append(now - started)
+
+    def on_agent_message(self, msg: list):
+        # [b"", cmd, from_id, json] → 바로 AI_OK 응답
+        if len(msg) < 4 or msg[1] not in (b"AI_GENERATE", b"AI_MERGE"):
+            return
+        txid = json.loads(msg[3])["transaction_id"]
+        self.agent.send_multipart([b"", b"AI_OK", msg[2], txid.encode(), b'{"status":"success"}'])
+
+    def on_client_message(self, client: SimClient, msg: list, now: float):
+        cmd = msg[1] if len(msg) > 1 else b""
+        if cmd == b"BILL_SEND":
+            self.complete("BILL_SEND", TIMESTAMP.unpack_from(msg[3])[0], now)
+        elif cmd == b"AI_OK":
+            item = self.ai_sent.pop(msg[3], None)
+            if item is not None:
+                self.complete(item[0], item[1], now)
+        elif cmd == b"PONG" and client.pings:
+            self.complete("PING", client.pings.popleft(), now)
+        elif cmd == b"OK" and client.registers:
+            self.complete("REGISTER", client.registers.popleft(), now)
+        elif cmd == b"ERROR":
+            reason = msg[2].decode(errors="replace") if len(msg) > 2 else ""
+            self.errors[reason] = self.errors.get(reason, 0) + 1
+            self.outstanding -= 1
+
+    def drain(self, poller: zmq.Poller, timeout_ms: int):
+        now = None
+        for sock, _ in poller.poll(timeout_ms):
+            while True:
+                try:
+                    msg = sock.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                now = time.perf_counter()
+                if sock is self.agent:
+                    self.on_agent_message(msg)
+                else:
+                    self.on_client_message(self.by_socket[sock], msg, now)
+
+    # === 실행 ===
+
+    def run(self, duration: float, warmup: float, drain_timeout: float = 5.0) -> dict:
+        poller = zmq.Poller()
+        poller.register(self.agent, zmq.POLLIN)
+        for client in self.clients:
+            poller.register(client.sock, zmq.POLLIN)
+
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        index = 0
+        start = time.perf_counter()
+        self.measure_from = measure_from = start + warmup
+        end = measure_from + duration
+        next_send = start
+        while True:
+            now = time.perf_counter()
+            if now >= end:
+                break
+            burst = 0
+            while self.outstanding < self.window and burst < 64 and (interval == 0.0 or next_send <= now):
+                self.send_one(index, now)
+                index += 1
+                burst += 1
+                next_send += interval
+            if interval and next_send < now - 1.0:
+                next_send = now  # 목표 속도를 따라가지 못하면 밀린 전송을 한꺼번에 보내지 않음
+            wait_ms = 0 if burst else (max(int((next_send - now) * 1000), 0) if interval else 1)
+            self.drain(poller, min(wait_ms, 10))
+        elapsed = time.perf_counter() - measure_from
+
+        deadline = time.perf_counter() + drain_timeout
+        while self.outstanding > 0 and time.perf_counter() < deadline:
+            self.drain(poller, 50)
+        return self.summary(elapsed)
+
+    def summary(self, elapsed: float) -> dict:
+        received = sum(self.received.values())
+        every = [value for values in self.latencies.values() for value in values]
+        return {
+            "seconds": round(elapsed, 3),
+            "sent": sum(self.sent.values()),
+            "received": received,
+            "lost": max(self.outstanding, 0),
+            "msgs_per_sec": round(received / elapsed, 1) if elapsed > 0 else 0.0,
+            "latency": latency_summary(every),
+            "by_command": {
+                name: {"sent": self.sent[name], "received": self.received[name], **latency_summary(values)}
+                for name, values in self.latencies.items() if self.sent[name]
+            },
+            "errors": self.errors,
+        }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+
+def run_case(args, clients: int, mix: dict) -> dict:
+    """브로커를 (필요 시) 띄우고 클라이언트 수 하나에 대해 측정"""
+    endpoint = f"tcp://{args.host}:{args.port}"
+    proc = None
+    broker_pid = args.broker_pid
+    if not args.no_spawn:
+        env = {key: value for key, value in (item.split("=", 1) for item in args.broker_env)}
+        proc = spawn_broker(Path(args.broker_script), args.port, env)
+        broker_pid = proc.pid
+    generator = LoadGenerator(endpoint, clients, mix, args.rate, args.window,
+                              args.bill_size, args.ai_size, args.seed)
+    try:
+        wait_for_broker(endpoint)
+        generator.setup(args.idle_clients)
+        cpu_before = process_cpu_seconds(broker_pid) if broker_pid else None
+        wall_before = time.perf_counter()
+        result = generator.run(args.duration, args.warmup)
+        cpu_after = process_cpu_seconds(broker_pid) if broker_pid else None
+        wall = time.perf_counter() - wall_before
+    finally:
+        generator.close()
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=5)
+
+    broker_cpu = None
+    if cpu_before is not None and cpu_after is not None:
+        # 워밍업 + 측정 + 잔여 응답 수신 구간 전체 기준
+        broker_cpu = {"seconds": round(cpu_after - cpu_before, 3),
+                      "percent": round((cpu_after - cpu_before) / wall * 100, 1) if wall > 0 else 0.0}
+    return {"clients": clients, "idle_clients": args.idle_clients, **result, "broker_cpu": broker_cpu}
+
+
+def print_run(run: dict):
+    cpu = run["broker_cpu"]
+    cpu_text = f"{cpu['percent']:>5}%" if cpu else "    -"
+    latency = run["latency"]
+    print(f"{run['clients']:>7} | {run['idle_clients']:>6} | {run['msgs_per_sec']:>10} | "
+          f"{latency['p50_ms']:>8} | {latency['p99_ms']:>8} | {cpu_text} | {run['lost']:>5}")
+    for name, stats in run["by_command"].items():
+        print(f"{'':>7}   {name:<12} sent {stats['sent']:>7}  recv {stats['received']:>7}  "
+              f"p50 {stats['p50_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms")
+    if run["errors"]:
+        print(f"{'':>7}   errors: {run['errors']}")
+
+
+def compare_baseline(path: str, runs: list):
+    """이전 결과 파일과 클라이언트 수가 같은 측정끼리 처리량 / p99 변화율 출력"""
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(run["clients"], run["idle_clients"]): run for run in baseline.get("runs", [])}
+    print(f"\nbaseline: {path} (rev {baseline.get('meta', {}).get('git_revision') or '?'})")
+    print(f"{'clients':>7} | {'msgs/s':>18} | {'p99 ms':>20}")
+    for run in runs:
+        old = previous.get((run["clients"], run["idle_clients"]))
+        if old is None:
+            print(f"{run['clients']:>7} | (baseline에 없음)")
+            continue
+
+        def change(new_value, old_value):
+            return f"{(new_value - old_value) / old_value * 100:+.1f}%" if old_value else "  n/a"
+
+        print(f"{run['clients']:>7} | {old['msgs_per_sec']:>8} → {run['msgs_per_sec']:<8} "
+              f"{change(run['msgs_per_sec'], old['msgs_per_sec']):>7} | "
+              f"{old['latency']['p99_ms']:>7} → {run['latency']['p99_ms']:<7} "
+              f"{change(run['latency']['p99_ms'], old['latency']['p99_ms']):>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="브로커 부하 생성기 / 지연 시간 벤치마크")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=15556)
+    parser.add_argument("--no-spawn", action="store_true", help="이미 실행 중인 브로커 사용")
+    parser.add_argument("--broker-pid", type=int, default=None, help="--no-spawn일 때 CPU 측정할 브로커 PID")
+    parser.add_argument("--broker-script", default=str(PROJECT_ROOT / "brokerserver.py"))
+    parser.add_argument("--broker-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="브로커 환경변수 (여러 번 지정 가능, 예: BROKER_TRACK_REQUESTS=false)")
+    parser.add_argument("--clients", default="10", help="POS 클라이언트 수 목록 (예: 10,100,500)")
+    parser.add_argument("--idle-clients", type=int, default=0, help="등록만 하는 클라이언트 수 (레지스트리 크기)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="명령별 트래픽 비율")
+    parser.add_argument("--rate", type=float, default=0.0, help="목표 초당 전송 수 (0: 최대 속도)")
+    parser.add_argument("--window", type=int, default=500, help="최대 미완료 메시지 수")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간 (초)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="집계하지 않는 워밍업 시간 (초)")
+    parser.add_argument("--bill-size", type=int, default=256, help="BILL_SEND payload 크기 (bytes)")
+    parser.add_argument("--ai-size", type=int, default=2048, help="AI 요청 JSON 크기 (bytes)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON 파일")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    counts = [int(value) for value in args.clients.split(",") if value.strip()]
+    if args.no_spawn and len(counts) > 1:
+        print("WARNING: --no-spawn에서는 이전 측정의 클라이언트가 레지스트리에 남아 있습니다", file=sys.stderr)
+
+    meta = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "pyzmq": zmq.__version__,
+        "libzmq": zmq.zmq_version(),
+        "cpu_count": os.cpu_count(),
+        "platform": platform.platform(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "mix": mix,
+    }
+    print(f"rev {meta['git_revision'] or '?'}, CPU cores: {meta['cpu_count']}, mix: {args.mix}, "
+          f"rate: {args.rate or 'max'}, window: {args.window}, duration: {args.duration}s")
+    print(f"{'clients':>7} | {'idle':>6} | {'msgs/s':>10} | {'p50 ms':>8} | {'p99 ms':>8} | {'CPU':>6} | {'lost':>5}")
+    runs = []
+    for clients in counts:
+        run = run_case(args, clients, mix)
+        runs.append(run)
+        print_run(run)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "runs": runs}, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+    if args.baseline:
+        compare_baseline(args.baseline, runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+통계 요약 테이블 재계산
+
+parsing_error_daily_stats / receipt_record_daily_stats / ml_training_data_daily_stats를
+원본 테이블 전체 집계로 다시 채웁니다 (migrations/003_statistics_summary.sql의 rebuild_statistics_summaries()).
+평소에는 트리거가 증분으로 유지하므로, 마이그레이션 직후나 TRUNCATE / 트리거 없이 적재한 뒤에만 필요합니다.
+
+재계산하는 동안 해당 원본 테이블의 쓰기(영수증 기록 저장 등)가 대기하므로 트래픽이 적을 때 실행하세요.
+--check는 아무것도 바꾸지 않고 요약과 원본 집계가 다른 (클라이언트, 일자[, 상태]) 개수만 출력합니다.
+
+사용 예:
+    python scripts/rebuild_statistics.py
+    python scripts/rebuild_statistics.py --table receipt_records
+    python scripts/rebuild_statistics.py --check
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+
+load_dotenv(PROJECT_ROOT / ".env")
+
+from sqlalchemy import text  # noqa: E402
+
+from aiagent.database import SessionLocal, engine  # noqa: E402
+from aiagent.repositories.statistics_repository import SUMMARY_SOURCES, StatisticsSummaryRepository  # noqa: E402
+
+# 원본 집계와 요약 테이블에서 값이 다른 그룹 수 (0이 아닌 요약 행만 비교)
+CHECK_QUERIES = {
+    "parsing_errors": """
+        SELECT count(*) FROM (
+            SELECT client_id, status, COALESCE(created_at::date, CURRENT_DATE) AS stat_date, count(*) AS error_count
+            FROM parsing_errors GROUP BY 1, 2, 3
+        ) live
+        FULL JOIN (SELECT * FROM parsing_error_daily_stats WHERE error_count <> 0) summary
+            USING (client_id, status, stat_date)
+        WHERE live.error_count IS DISTINCT FROM summary.error_count
+    """,
+    "receipt_records": """
+        SELECT count(*) FROM (
+            SELECT client_id, COALESCE(created_at::date, CURRENT_DATE) AS stat_date,
+                   count(*) FILTER (WHERE is_valid IS TRUE) AS success_count,
+                   count(*) FILTER (WHERE is_valid IS NOT TRUE) AS error_count,
+                   COALESCE(sum(processing_time), 0) AS processing_time_sum
+            FROM receipt_records GROUP BY 1, 2
+        ) live
+        FULL JOIN (SELECT * FROM receipt_record_daily_stats WHERE success_count <> 0 OR error_count <> 0) summary
+            USING (client_id, stat_date)
+        WHERE (live.success_count, live.error_count) IS DISTINCT FROM (summary.success_count, summary.error_count)
+           OR abs(COALESCE(live.processing_time_sum, 0) - COALESCE(summary.processing_time_sum, 0)) > 0.001
+    """,
+    "ml_training_data": """
+        SELECT count(*) FROM (
+            SELECT client_id, COALESCE(created_at::date, CURRENT_DATE) AS stat_date, count(*) AS data_count
+            FROM ml_training_data GROUP BY 1, 2
+        ) live
+        FULL JOIN (SELECT * FROM ml_training_data_daily_stats WHERE data_count <> 0) summary
+            USING (client_id, stat_date)
+        WHERE live.data_count IS DISTINCT FROM summary.data_count
+    """,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="통계 요약 테이블 재계산")
+    parser.add_argument("--table", choices=SUMMARY_SOURCES, help="이 원본 테이블의 요약만 재계산 (기본: 전체)")
+    parser.add_argument("--check", action="store_true", help="재계산하지 않고 요약과 원본 집계 차이만 확인")
+    args = parser.parse_args()
+
+    sources = [args.table] if args.table else list(SUMMARY_SOURCES)
+    with SessionLocal() as db:
+        if args.check:
+            mismatched = 0
+            for source in sources:
+                count = db.execute(text(CHECK_QUERIES[source])).scalar()
+                mismatched += count
+                print(f"{source:>18} | 불일치 그룹 {count}개")
+            engine.dispose()
+            sys.exit(1 if mismatched else 0)
+
+        start = time.perf_counter()
+        result = StatisticsSummaryRepository(db).rebuild(args.table)
+        elapsed = time.perf_counter() - start
+        for summary_table, row_count in result.items():
+            print(f"{summary_table:>30} | {row_count}행")
+        print(f"재계산 완료: {elapsed:.2f}초")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+브로커 상태 관리 클래스 테스트 (brokerserver.py)
+- ClientRegistry: 등록 / 재등록 / 발신자 조회 / 생존 확인 만료 / 스냅샷 복원
+- Outbox: 목적지별 보관 / 순서대로 전달 / 상한 초과 / TTL 만료 / 폐기
+- RequestTracker: 요청-응답 지연 시간 / 재전송 / orphan 만료 / 처음 목적지 조회 / 추적 상한
+- Broker.forward: 서비스 그룹 재전송 시 멤버 outstanding 집계
+
+소켓을 만들지 않고 클래스만 사용하므로 실행 중인 브로커 / AI 에이전트가 필요 없습니다.
+
+사용 예:
+    python test_broker_tracking.py
+"""
+
+import os
+import sys
+import logging
+import tempfile
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# brokerserver는 import 시 현재 디렉터리에 broker.log를 만들므로 임시 디렉터리에서 import
+_cwd = os.getcwd()
+os.chdir(tempfile.gettempdir())
+try:
+    from brokerserver import (Broker, ClientRegistry, FORWARD_COMMANDS, Outbox, RequestTracker,
+                              peek_transaction_id)
+finally:
+    os.chdir(_cwd)
+
+def setup_logging():
+    """로깅 설정"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    return logging.getLogger('test_broker_tracking')
+
+def expect(condition: bool, message: str) -> bool:
+    """조건 확인 결과 로그 (실패 시 에러 로그)"""
+    if condition:
+        logger.info(f"  ✅ {message}")
+    else:
+        logger.error(f"  ❌ {message}")
+    return condition
+
+def test_registry_register():
+    """등록 / routing_id 변경 재등록 / 같은 연결의 ID 변경"""
+    clients = ClientRegistry()
+    clients.register(b"ABCDEF", b"rid-1", b"10.0.0.1", b"9000", frozenset({"binary"}))
+    first = clients.get(b"ABCDEF")
+
+    clients.register(b"ABCDEF", b"rid-2")  # 재연결 후 재등록
+    old_rid = clients.touch(b"rid-1", 0.0)
+    new_rid = clients.touch(b"rid-2", 123.0)
+
+    clients.register(b"GHIJKL", b"rid-2")  # 같은 연결이 다른 ID로 등록
+
+    return all([
+        expect(first.capabilities == frozenset({"binary"}) and first.ip == b"10.0.0.1", "등록 정보 보관"),
+        expect(old_rid is None, "이전 routing_id로는 발신자 조회 안 됨"),
+        expect(new_rid is not None and new_rid.client_id == b"ABCDEF" and new_rid.last_seen == 123.0,
+               "새 routing_id로 조회 + 마지막 수신 시각 갱신"),
+        expect(b"ABCDEF" not in clients and clients.routing_id(b"GHIJKL") == b"rid-2" and len(clients) == 1,
+               "같은 연결의 이전 ID 제거"),
+        expect(clients.version == 3, f"등록마다 version 증가: {clients.version}"),
+    ])
+
+def test_registry_eviction():
+    """마지막 수신 후 ttl이 지난 클라이언트만 제거"""
+    clients = ClientRegistry()
+    idle = clients.register(b"ABCDEF", b"rid-1")
+    active = clients.register(b"GHIJKL", b"rid-2")
+    now = max(idle.last_seen, active.last_seen)
+    clients.touch(b"rid-2", now + 50)
+    version = clients.version
+
+    evicted = clients.evict_expired(now + 60, ttl=30)
+    nothing = clients.evict_expired(now + 61, ttl=30)
+
+    return all([
+        expect([entry.client_id for entry in evicted] == [b"ABCDEF"], f"수신 없던 ABCDEF 제거: {evicted}"),
+        expect(clients.touch(b"rid-1", now + 60) is None, "제거된 클라이언트의 routing_id 매핑도 제거"),
+        expect(b"GHIJKL" in clients, "최근 수신한 GHIJKL 유지"),
+        expect(nothing == [] and clients.version == version + 1, "제거가 있을 때만 version 증가"),
+    ])
+
+def test_registry_snapshot():
+    """스냅샷 저장 / 복원 (복원 항목은 첫 수신 전까지 tentative)"""
+    clients = ClientRegistry()
+    clients.register(b"ABCDEF", b"\x00\x80rid", b"10.0.0.1", b"9000", frozenset({"zstd"}), group=b"AIGRP1")
+    clients.register(b"GHIJKL", b"rid-2")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "registry.json")
+        clients.save_snapshot(path)
+        restored = ClientRegistry()
+        loaded = restored.load_snapshot(path, now=10.0)
+        missing = ClientRegistry().load_snapshot(os.path.join(directory, "missing.json"), now=10.0)
+
+    entry = restored.get(b"ABCDEF")
+    tentative_before = restored.tentative_count()
+    restored.touch(b"\x00\x80rid", 11.0)
+
+    return all([
+        expect(loaded == 2 and missing == 0, f"2개 복원, 파일 없으면 0: {loaded}, {missing}"),
+        expect(entry.routing_id == b"\x00\x80rid" and entry.group == b"AIGRP1"
+               and entry.capabilities == frozenset({"zstd"}), "routing_id / 그룹 / 기능 복원"),
+        expect(tentative_before == 2 and restored.tentative_count() == 1, "첫 수신 시 tentative 해제"),
+    ])
+
+def test_outbox():
+    """목적지별 보관 후 순서대로 전달, 상한 초과 / 전송 실패 / 만료 / 폐기"""
+    outbox = Outbox(ttl=10.0, max_messages=2)
+    for i in range(3):
+        outbox.put(b"ABCDEF", [b"", b"AI_OK", b"AIAGNT", f"msg-{i}".encode()], now=float(i))
+    overflow = outbox.get_stats()["dropped_overflow"]
+
+    sent = []
+    first_try = outbox.flush(b"ABCDEF", lambda frames: False, now=3.0)  # 목적지가 아직 받을 수 없음
+    delivered = outbox.flush(b"ABCDEF", lambda frames: sent.append(frames[3]) or True, now=3.0)
+
+    outbox.put(b"GHIJKL", [b"", b"AI_OK", b"AIAGNT", b"old"], now=0.0)
+    outbox.put(b"GHIJKL", [b"", b"AI_OK", b"AIAGNT", b"new"], now=5.0)
+    expired = outbox.expire(now=10.0)
+    outbox.discard(b"GHIJKL")
+    stats = outbox.get_stats()
+
+    return all([
+        expect(overflow == 1, "상한(2개) 초과 시 가장 오래된 메시지 버림"),
+        expect(first_try == 0, "전송 실패 시 보관 유지"),
+        expect(delivered == 2 and sent == [b"msg-1", b"msg-2"], f"남은 메시지를 순서대로 전달: {sent}"),
+        expect(expired == 1 and stats["dropped_expired"] == 1, "TTL 지난 메시지 만료"),
+        expect(stats["dropped_evicted"] == 1 and b"GHIJKL" not in outbox, "등록 해제 목적지 메시지 폐기"),
+        expect(stats["messages"] == 0 and stats["bytes"] == 0, f"보관 메시지 / 바이트 0: {stats}"),
+    ])
+
+def test_outbox_flush_drops_expired():
+    """전달 시점에 만료된 메시지는 보내지 않고 만료로 집계"""
+    outbox = Outbox(ttl=5.0, max_messages=10)
+    outbox.put(b"ABCDEF", [b"", b"AI_OK", b"AIAGNT", b"stale"], now=0.0)
+    outbox.put(b"ABCDEF", [b"", b"AI_OK", b"AIAGNT", b"fresh"], now=4.0)
+    sent = []
+    delivered = outbox.flush(b"ABCDEF", lambda frames: sent.append(frames[3]) or True, now=6.0)
+
+    return all([
+        expect(delivered == 1 and sent == [b"fresh"], f"만료 안 된 메시지만 전달: {sent}"),
+        expect(outbox.get_stats()["dropped_expired"] == 1, "만료 메시지 집계"),
+    ])
+
+def test_tracker_latency():
+    """요청 → 응답 지연 시간 / 재전송 / 처음 목적지 조회"""
+    tracker = RequestTracker({b"AI_GENERATE": 30.0})
+    started = [
+        tracker.start(b"AI_GENERATE", b"ABCDEF", b"AIAGN1", b"tx-1", now=100.0),
+        tracker.start(b"AI_GENERATE", b"ABCDEF", b"AIAGN2", b"tx-1", now=101.0),  # 재전송
+        tracker.start(b"AI_GENERATE", b"ABCDEF", b"AIAGN1", b"", now=101.0),      # transaction_id 없음
+    ]
+    destination = tracker.destination(b"ABCDEF", b"tx-1")
+    other_client = tracker.destination(b"GHIJKL", b"tx-1")
+
+    latency = tracker.finish(b"AI_OK", b"ABCDEF", b"tx-1", now=102.5)
+    late = tracker.finish(b"AI_OK", b"ABCDEF", b"tx-1", now=103.0)
+    stats = tracker.get_stats()
+
+    return all([
+        expect(started == [True, False, True], f"재전송만 새 요청이 아님 (그룹 outstanding 중복 집계 방지): {started}"),
+        expect(destination == b"AIAGN1" and other_client is None, "재전송은 처음 목적지로 조회"),
+        expect(latency == 2.5, f"첫 요청 기준 지연 시간 2.5초: {latency}"),
+        expect(late is None and stats["unmatched_replies"] == 1, "추적 중이 아닌 응답은 unmatched"),
+        expect((stats["started"], stats["completed"], stats["retries"], stats["outstanding"]) == (1, 1, 1, 0),
+               f"started/completed/retries/outstanding = 1/1/1/0: {stats}"),
+        expect(stats["latency_by_destination"]["AIAGN1"]["count"] == 1, "목적지별 히스토그램 기록"),
+        expect(tracker.destination(b"ABCDEF", b"tx-1") is None, "응답 후에는 목적지 조회 안 됨"),
+    ])
+
+def test_tracker_expire_and_limit():
+    """응답 시한이 지난 요청은 orphan, 추적 상한을 넘으면 가장 오래된 요청 포기"""
+    tracker = RequestTracker({b"AI_GENERATE": 10.0}, max_outstanding=2, default_timeout=60.0)
+    tracker.start(b"AI_GENERATE", b"ABCDEF", b"AIAGN1", b"tx-1", now=0.0)
+    tracker.start(b"AI_MERGE", b"ABCDEF", b"AIAGN2", b"tx-2", now=0.0)      # 기본 시한 60초
+    orphans = tracker.expire(now=10.0)
+    by_destination = tracker.outstanding_by_destination()
+
+    tracker.start(b"AI_GENERATE", b"GHIJKL", b"AIAGN1", b"tx-3", now=11.0)
+    tracker.start(b"AI_GENERATE", b"GHIJKL", b"AIAGN1", b"tx-4", now=12.0)  # 상한 2 → tx-2 포기
+    stats = tracker.get_stats()
+
+    return all([
+        expect(orphans == [b"AIAGN1"] and stats["orphans"] == {"AI_GENERATE": 1}, f"tx-1 orphan: {orphans}"),
+        expect(by_destination == {b"AIAGN2": 1}, f"만료 후 AIAGN2 요청만 대기: {by_destination}"),
+        expect(stats["dropped"] == 1 and tracker.destination(b"ABCDEF", b"tx-2") is None,
+               "상한 초과 시 가장 오래된 요청 추적 포기"),
+        expect(stats["outstanding"] == 2, f"추적 중 2개: {stats['outstanding']}"),
+    ])
+
+class FakeSocket:
+    """Broker.forward가 보낸 메시지를 기록하는 테스트용 소켓"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_multipart(self, frames):
+        self.sent.append(frames)
+
+def test_group_retry_outstanding():
+    """그룹으로 보낸 요청의 재전송은 같은 멤버로 가고 outstanding은 한 번만 증가 (orphan 정리 후 0)"""
+    broker = Broker(client_ttl=0, outbox_ttl=0, snapshot_path="", metrics_port=0)
+    if broker.tracker is None:
+        logger.info("  BROKER_TRACK_REQUESTS=false: 건너뜀")
+        return True
+    broker.socket = FakeSocket()
+    for member_id in (b"AIAGN1", b"AIAGN2"):
+        broker.groups.join(b"AIGRP1", member_id)
+        broker.clients.register(member_id, b"rid-" + member_id, group=b"AIGRP1")
+    pos = broker.clients.register(b"ABCDEF", b"rid-pos")
+
+    request = b'{"transaction_id": "tx-1", "data": "..."}'
+    for now in (0.0, 1.0):  # 첫 요청 + POS 재전송
+        broker.forward(b"rid-pos", pos, b"AI_GENERATE", [b"AIGRP1", request],
+                       FORWARD_COMMANDS[b"AI_GENERATE"], now)
+    destinations = [frames[0] for frames in broker.socket.sent]
+    loads = broker.groups.get_stats()["AIGRP1"]
+
+    broker.sweep(now=1000.0)  # 응답 없이 시한 경과 → orphan
+    after_orphan = broker.groups.get_stats()["AIGRP1"]
+
+    return all([
+        expect(len(destinations) == 2 and destinations[0] == destinations[1], f"재전송은 같은 멤버로: {destinations}"),
+        expect(sorted(loads.values()) == [0, 1], f"outstanding은 한 번만 증가: {loads}"),
+        expect(set(after_orphan.values()) == {0}, f"orphan 정리 후 outstanding 0: {after_orphan}"),
+    ])
+
+def test_peek_transaction_id():
+    """요청 JSON에서 transaction_id만 추출"""
+    payload = b'{"client_id": "ABCDEF", "transaction_id" : "tx-42", "data": "..."}'
+    return all([
+        expect(peek_transaction_id(payload) == b"tx-42", "transaction_id 추출"),
+        expect(peek_transaction_id(b'{"data": 1}') == b"", "없으면 빈 bytes"),
+    ])
+
+def main():
+    """메인 테스트 실행"""
+    global logger
+    logger = setup_logging()
+
+    logger.info("🚀 브로커 상태 관리 테스트 시작!")
+    logger.info("=" * 60)
+
+    tests = [
+        ("레지스트리 등록", test_registry_register),
+        ("레지스트리 만료", test_registry_eviction),
+        ("레지스트리 스냅샷", test_registry_snapshot),
+        ("Outbox 보관 / 전달", test_outbox),
+        ("Outbox 전달 시 만료", test_outbox_flush_drops_expired),
+        ("요청 추적 지연 시간", test_tracker_latency),
+        ("요청 추적 만료 / 상한", test_tracker_expire_and_limit),
+        ("그룹 재전송 outstanding", test_group_retry_outstanding),
+        ("transaction_id 추출", test_peek_transaction_id),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        logger.info(f"\n📋 {test_name} 테스트 실행...")
+        try:
+            if test_func():
+                passed += 1
+                logger.info(f"✅ {test_name} 테스트 통과!")
+            else:
+                failed += 1
+                logger.error(f"❌ {test_name} 테스트 실패!")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test_name} 테스트 예외 발생: {e}")
+
+    logger.info("\n" + "=" * 60)
+    logger.info(f"📊 테스트 결과: {passed}개 통과, {failed}개 실패")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -15,6 +15,7 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from aiagent.utils.logger import get_logger
+from aiagent.core.protocol import MessageFormat
 
 logger = get_logger('test_parser')
 
@@ -40,6 +41,8 @@ transaction_id = str(uuid.uuid4())
 # 브로커 서버 설정
 BROKER_HOST = os.getenv("BROKER_HOST", "broker")  # Docker 서비스 이름 사용
 BROKER_PORT = os.getenv("BROKER_PORT", "5555")
+# 영수증 전송 방식: hex (v1.0 JSON) | binary | zstd (v1.1 바이너리 프레임)
+RECEIPT_ENCODING = os.getenv("RECEIPT_ENCODING", "hex")
 
 logger.info(f"🆔 클라이언트 ID: {client_id}")
 logger.info(f"🔁 트랜잭션 ID: {transaction_id}")
@@ -98,18 +101,29 @@ try:
             # 2. AI_GENERATE 테스트
             logger.info("\n=== 🤖 AI_GENERATE 테스트 시작 ===")
             destination_id = b"AIAGNT"
-            message_json = json.dumps(test_receipt, ensure_ascii=False)
-            encoded_message = message_json.encode("utf-8")
-
-            logger.debug(f"[전송 구조] [b'', b'AI_GENERATE', {destination_id}, {len(encoded_message)} bytes]")
-            logger.debug(f"[요청 본문]:\n{message_json}")
-
-            socket.send_multipart([
-                b"",
-                b"AI_GENERATE",
-                destination_id,
-                encoded_message
-            ])
+            if RECEIPT_ENCODING == "hex":
+                message_json = json.dumps(test_receipt, ensure_ascii=False)
+                encoded_message = message_json.encode("utf-8")
+
+                logger.debug(f"[전송 구조] [b'', b'AI_GENERATE', {destination_id}, {len(encoded_message)} bytes]")
+                logger.debug(f"[요청 본문]:\n{message_json}")
+
+                socket.send_multipart([
+                    b"",
+                    b"AI_GENERATE",
+                    destination_id,
+                    encoded_message
+                ])
+            else:
+                # v1.1: 영수증 원본 바이트를 별도 프레임으로 전송
+                frames = MessageFormat.create_ai_generate(
+                    destination_id.decode(),
+                    dict(test_receipt),
+                    receipt=bytes.fromhex(test_receipt["receipt_data"]),
+                    compress=RECEIPT_ENCODING == "zstd"
+                )
+                logger.debug(f"[전송 구조] {frames[:4]} + {len(frames[4])} bytes ({RECEIPT_ENCODING})")
+                socket.send_multipart(frames)
             logger.info("📤 AI_GENERATE 요청 전송 완료")
 
             # 응답 받기 (타임아웃 추가)
@@ -95,6 +95,7 @@ def test_processor_integration():
     
     try:
         from aiagent.services.processor import BillProcessor
+        from aiagent.core.protocol import AIRequest
         
         processor = BillProcessor()
         
@@ -110,7 +111,8 @@ def test_processor_integration():
         raw_data = json.dumps(test_data).encode('utf-8')
         
         logger.info("🔄 AI 생성 요청 처리 테스트...")
-        result = processor.process_ai_generate("TEST_CLIENT", raw_data)
+        request = AIRequest.from_frames([b"AI_GENERATE", b"TEST_CLIENT", raw_data])
+        result = processor.process_ai_generate(request)
         
         if result.get("status") == "ok":
             logger.info("✅ AI 생성 처리 성공!")
@@ -255,4 +257,4 @@ def main():
 
 if __name__ == "__main__":
     success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1) 
\ No newline at end of file
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+transaction_id 멱등성 결과 캐시 테스트 (aiagent/core/result_cache.py)
+- 처리 중인 요청에 합류한 재전송 요청(waiter)이 같은 결과를 받는지
+- 실패 결과는 캐시하지 않아 재시도가 다시 계산하는지
+- LRU 크기 제한 / TTL 만료
+- 동시에 들어온 같은 transaction_id 중 하나만 계산하는지
+
+ZMQ / PostgreSQL 없이 실행됩니다.
+
+사용 예:
+    python test_result_cache.py
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiagent.core.result_cache import TransactionResultCache, CacheState
+
+def setup_logging():
+    """로깅 설정"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    return logging.getLogger('test_result_cache')
+
+def expect(condition: bool, message: str) -> bool:
+    """조건 확인 결과 로그 (실패 시 에러 로그)"""
+    if condition:
+        logger.info(f"  ✅ {message}")
+    else:
+        logger.error(f"  ❌ {message}")
+    return condition
+
+def test_in_flight_waiters():
+    """처리 중 재전송 요청은 합류했다가 완료 시 같은 응답을 받음"""
+    cache = TransactionResultCache(max_size=10, ttl=60)
+
+    owner = cache.acquire("ABCDEF", "tx-1")
+    retry1 = cache.acquire("ABCDEF", "tx-1")
+    retry2 = cache.acquire("ABCDEF", "tx-1")
+    other_client = cache.acquire("GHIJKL", "tx-1")  # 다른 매장의 같은 transaction_id는 별도 요청
+    waiters = cache.complete("ABCDEF", "tx-1", "응답-1")
+    hit = cache.acquire("ABCDEF", "tx-1")
+    stats = cache.get_stats()
+
+    return all([
+        expect(owner == (CacheState.OWNER, None), f"첫 요청은 OWNER: {owner}"),
+        expect(retry1[0] == CacheState.ATTACHED and retry2[0] == CacheState.ATTACHED, "재전송 요청은 ATTACHED"),
+        expect(other_client[0] == CacheState.OWNER, "다른 client_id는 OWNER"),
+        expect(waiters == ["ABCDEF", "ABCDEF"], f"완료 시 합류한 요청 2개 반환: {waiters}"),
+        expect(hit == (CacheState.HIT, "응답-1"), f"완료 후 재전송은 캐시 응답: {hit}"),
+        expect(stats["in_flight"] == 1, f"GHIJKL 요청만 처리 중: {stats['in_flight']}"),
+        expect((stats["hits"], stats["misses"], stats["attached"]) == (1, 2, 2),
+               f"hits/misses/attached = 1/2/2: {stats}"),
+    ])
+
+def test_failure_not_cached():
+    """실패 응답(cacheable=False)은 합류한 요청에만 전달하고 저장하지 않음"""
+    cache = TransactionResultCache(max_size=10, ttl=60)
+
+    cache.acquire("ABCDEF", "tx-err")
+    cache.acquire("ABCDEF", "tx-err")
+    waiters = cache.complete("ABCDEF", "tx-err", "오류", cacheable=False)
+    retry = cache.acquire("ABCDEF", "tx-err")
+
+    return all([
+        expect(waiters == ["ABCDEF"], f"합류한 요청에는 실패 응답 전달: {waiters}"),
+        expect(retry[0] == CacheState.OWNER, f"다음 재시도는 다시 계산: {retry}"),
+        expect(cache.get_stats()["size"] == 0, "실패 응답은 저장되지 않음"),
+    ])
+
+def test_lru_eviction():
+    """크기 제한을 넘으면 가장 오래 사용하지 않은 결과부터 제거"""
+    cache = TransactionResultCache(max_size=2, ttl=60)
+    for txid in ("a", "b"):
+        cache.acquire("ABCDEF", txid)
+        cache.complete("ABCDEF", txid, txid.upper())
+
+    cache.acquire("ABCDEF", "a")  # a 사용 → b가 가장 오래됨
+    cache.acquire("ABCDEF", "c")
+    cache.complete("ABCDEF", "c", "C")
+
+    return all([
+        expect(cache.get_stats()["size"] == 2, "크기 2 유지"),
+        expect(cache.acquire("ABCDEF", "a") == (CacheState.HIT, "A"), "최근 사용한 a 유지"),
+        expect(cache.acquire("ABCDEF", "c") == (CacheState.HIT, "C"), "새로 저장한 c 유지"),
+        expect(cache.acquire("ABCDEF", "b")[0] == CacheState.OWNER, "가장 오래된 b 제거"),
+    ])
+
+def test_ttl_and_uncacheable():
+    """TTL이 지난 결과 / transaction_id가 없는 요청은 캐시하지 않음"""
+    cache = TransactionResultCache(max_size=10, ttl=0.05)
+    cache.acquire("ABCDEF", "tx-ttl")
+    cache.complete("ABCDEF", "tx-ttl", "응답")
+    fresh = cache.acquire("ABCDEF", "tx-ttl")
+    time.sleep(0.1)
+    expired = cache.acquire("ABCDEF", "tx-ttl")
+
+    cache.acquire("ABCDEF", "UNKNOWN")
+    unknown = cache.acquire("ABCDEF", "UNKNOWN")
+    empty = cache.acquire("ABCDEF", "")
+
+    disabled = TransactionResultCache(max_size=0, ttl=60)
+    disabled.acquire("ABCDEF", "tx-off")
+    disabled.complete("ABCDEF", "tx-off", "응답")
+
+    return all([
+        expect(fresh[0] == CacheState.HIT, "TTL 안에서는 HIT"),
+        expect(expired[0] == CacheState.OWNER, "TTL이 지나면 다시 계산"),
+        expect(unknown[0] == CacheState.OWNER and empty[0] == CacheState.OWNER,
+               "UNKNOWN / 빈 transaction_id는 합류하지 않음"),
+        expect(cache.complete("ABCDEF", "UNKNOWN", "응답") == [], "UNKNOWN 완료 시 합류한 요청 없음"),
+        expect(disabled.acquire("ABCDEF", "tx-off")[0] == CacheState.OWNER, "max_size=0이면 저장 안 함"),
+    ])
+
+def test_concurrent_acquire():
+    """동시에 도착한 같은 transaction_id 요청 중 하나만 OWNER"""
+    cache = TransactionResultCache(max_size=10, ttl=60)
+    start = threading.Barrier(16)
+    states = []
+    lock = threading.Lock()
+
+    def worker():
+        start.wait()
+        state, _ = cache.acquire("ABCDEF", "tx-race")
+        with lock:
+            states.append(state)
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    waiters = cache.complete("ABCDEF", "tx-race", "응답")
+
+    return all([
+        expect(states.count(CacheState.OWNER) == 1, f"OWNER 1개: {states.count(CacheState.OWNER)}"),
+        expect(len(waiters) == 15, f"나머지 15개는 합류: {len(waiters)}"),
+    ])
+
+def main():
+    """메인 테스트 실행"""
+    global logger
+    logger = setup_logging()
+
+    logger.info("🚀 transaction_id 결과 캐시 테스트 시작!")
+    logger.info("=" * 60)
+
+    tests = [
+        ("처리 중 요청 합류", test_in_flight_waiters),
+        ("실패 응답 미저장", test_failure_not_cached),
+        ("LRU 제거", test_lru_eviction),
+        ("TTL / 캐시 불가 transaction_id", test_ttl_and_uncacheable),
+        ("동시 요청", test_concurrent_acquire),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        logger.info(f"\n📋 {test_name} 테스트 실행...")
+        try:
+            if test_func():
+                passed += 1
+                logger.info(f"✅ {test_name} 테스트 통과!")
+            else:
+                failed += 1
+                logger.error(f"❌ {test_name} 테스트 실패!")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test_name} 테스트 예외 발생: {e}")
+
+    logger.info("\n" + "=" * 60)
+    logger.info(f"📊 테스트 결과: {passed}개 통과, {failed}개 실패")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AI 요청 스케줄러 테스트 (aiagent/core/scheduler.py)
+- 토큰 버킷 차감 / 보충 / 대기 시간 계산
+- 요청 클래스(GENERATE/MERGE) 가중치 stride 스케줄링 비율
+- 클래스 내부 클라이언트 가중치 라운드 로빈
+- 클라이언트 큐 상한 거절 / 속도 제한 / close()
+- 가중치 설정 문자열 파싱
+
+ZMQ / PostgreSQL 없이 실행됩니다.
+
+사용 예:
+    python test_scheduler.py
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiagent.core.scheduler import RequestClass, RequestScheduler, TokenBucket, parse_weights
+
+def setup_logging():
+    """로깅 설정"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    return logging.getLogger('test_scheduler')
+
+def expect(condition: bool, message: str) -> bool:
+    """조건 확인 결과 로그 (실패 시 에러 로그)"""
+    if condition:
+        logger.info(f"  ✅ {message}")
+    else:
+        logger.error(f"  ❌ {message}")
+    return condition
+
+def drain(scheduler: RequestScheduler, count: int) -> list:
+    """작업 count개를 꺼내 (클래스, 클라이언트) 순서 반환"""
+    order = []
+    for _ in range(count):
+        job = scheduler.get(timeout=1.0)
+        if job is None:
+            break
+        order.append((job.request_class, job.client_id))
+        scheduler.task_done(job)
+    return order
+
+def test_token_bucket():
+    """토큰 버킷: burst만큼 즉시 허용, 이후 rate로 보충"""
+    bucket = TokenBucket(rate=2.0, burst=2.0)
+    t0 = bucket.updated_at
+    burst = [bucket.try_consume(t0) for _ in range(3)]
+    wait = bucket.seconds_until(t0)
+    refilled = bucket.try_consume(t0 + 0.5)
+
+    unlimited = TokenBucket(rate=0.0, burst=1.0)
+
+    return all([
+        expect(burst == [True, True, False], f"burst 2개 허용 후 거절: {burst}"),
+        expect(abs(wait - 0.5) < 1e-9, f"토큰 1개까지 0.5초: {wait}"),
+        expect(refilled, "0.5초 뒤 토큰 보충"),
+        expect(not bucket.try_consume(t0 + 0.5), "보충된 토큰 소진"),
+        expect(all(unlimited.try_consume(t0) for _ in range(100)) and unlimited.seconds_until(t0) == 0.0,
+               "rate <= 0 이면 제한 없음"),
+    ])
+
+def test_class_weights():
+    """GENERATE:2 / MERGE:1 가중치면 두 클래스가 밀려 있을 때 2:1로 처리"""
+    scheduler = RequestScheduler(class_weights={RequestClass.GENERATE: 2, RequestClass.MERGE: 1})
+    for i in range(30):
+        scheduler.submit(RequestClass.GENERATE, f"G{i % 3}", lambda: None)
+        scheduler.submit(RequestClass.MERGE, f"M{i % 3}", lambda: None)
+
+    first = [request_class for request_class, _ in drain(scheduler, 30)]
+    generate = first.count(RequestClass.GENERATE)
+    stats = scheduler.get_stats()
+
+    return all([
+        expect(generate == 20, f"처음 30개 중 GENERATE 20개: {generate}"),
+        expect(stats["queue_depth"] == 30 and stats["in_progress"] == 0, f"남은 작업 30개: {stats['queue_depth']}"),
+        expect(stats["classes"][RequestClass.MERGE]["dispatched"] == 10, "MERGE 10개 처리"),
+    ])
+
+def test_idle_class_catch_up():
+    """유휴 클래스가 나중에 들어와도 밀린 몫을 한꺼번에 가져가지 않음"""
+    scheduler = RequestScheduler()
+    for _ in range(20):
+        scheduler.submit(RequestClass.GENERATE, "ABCDEF", lambda: None)
+    drain(scheduler, 10)
+    for _ in range(10):
+        scheduler.submit(RequestClass.MERGE, "GHIJKL", lambda: None)
+
+    order = [request_class for request_class, _ in drain(scheduler, 10)]
+    return expect(order.count(RequestClass.MERGE) == 5, f"이후 10개 중 MERGE 5개 (1:1): {order}")
+
+def test_client_round_robin():
+    """같은 클래스 안에서 클라이언트 가중치만큼 연속 처리 후 다음 클라이언트"""
+    scheduler = RequestScheduler(client_weights={"ABCDEF": 2})
+    for _ in range(6):
+        scheduler.submit(RequestClass.GENERATE, "ABCDEF", lambda: None)
+    for _ in range(3):
+        scheduler.submit(RequestClass.GENERATE, "GHIJKL", lambda: None)
+
+    order = [client_id for _, client_id in drain(scheduler, 9)]
+    expected = ["ABCDEF", "ABCDEF", "GHIJKL"] * 3
+    return expect(order == expected, f"ABCDEF 2개 / GHIJKL 1개씩 교대: {order}")
+
+def test_max_client_queue():
+    """클라이언트별 대기 작업 상한 (클래스 합산)"""
+    scheduler = RequestScheduler(max_client_queue=2)
+    results = [
+        scheduler.submit(RequestClass.GENERATE, "ABCDEF", lambda: None),
+        scheduler.submit(RequestClass.MERGE, "ABCDEF", lambda: None),
+        scheduler.submit(RequestClass.MERGE, "ABCDEF", lambda: None),
+        scheduler.submit(RequestClass.MERGE, "GHIJKL", lambda: None),
+    ]
+    drain(scheduler, 1)
+    after_dispatch = scheduler.submit(RequestClass.MERGE, "ABCDEF", lambda: None)
+
+    return all([
+        expect(results == [True, True, False, True], f"ABCDEF 세 번째 요청만 거절: {results}"),
+        expect(scheduler.get_stats()["classes"][RequestClass.MERGE]["rejected"] == 1, "거절 메트릭 1"),
+        expect(after_dispatch, "작업을 꺼낸 뒤 다시 등록 가능"),
+    ])
+
+def test_rate_limit():
+    """속도 제한에 걸린 클라이언트는 기다리고 다른 클라이언트가 먼저 처리됨"""
+    scheduler = RequestScheduler(client_rate=10.0, client_burst=1.0)
+    scheduler.submit(RequestClass.GENERATE, "ABCDEF", lambda: None)
+    scheduler.submit(RequestClass.GENERATE, "ABCDEF", lambda: None)
+    scheduler.submit(RequestClass.GENERATE, "GHIJKL", lambda: None)
+
+    start = time.monotonic()
+    order = []
+    times = []
+    for _ in range(3):
+        job = scheduler.get(timeout=1.0)
+        order.append(job.client_id)
+        times.append(time.monotonic() - start)
+        scheduler.task_done(job)
+
+    timed_out = scheduler.get(timeout=0.05)
+
+    return all([
+        expect(order == ["ABCDEF", "GHIJKL", "ABCDEF"], f"제한 중인 ABCDEF 대신 GHIJKL 먼저: {order}"),
+        expect(times[1] < 0.05, f"GHIJKL은 바로 처리: {times[1]:.3f}초"),
+        expect(0.08 <= times[2] < 0.5, f"ABCDEF 두 번째 요청은 토큰 보충(0.1초) 후 처리: {times[2]:.3f}초"),
+        expect(timed_out is None, "작업이 없으면 timeout 후 None"),
+    ])
+
+def test_close():
+    """close()는 대기 중인 워커를 깨워 None 반환"""
+    scheduler = RequestScheduler()
+    results = []
+    worker = threading.Thread(target=lambda: results.append(scheduler.get()))
+    worker.start()
+    time.sleep(0.05)
+    scheduler.close()
+    worker.join(timeout=1.0)
+
+    return all([
+        expect(not worker.is_alive(), "대기 중인 워커 종료"),
+        expect(results == [None], f"get() 결과 None: {results}"),
+    ])
+
+def test_parse_weights():
+    """가중치 설정 문자열 파싱 (잘못된 항목 무시, 최소 1)"""
+    weights = parse_weights(" ABCDEF:2, GHIJKL:0,bad,XYZ:abc,, MERGE : 3 ")
+    return all([
+        expect(weights == {"ABCDEF": 2, "GHIJKL": 1, "MERGE": 3}, f"파싱 결과: {weights}"),
+        expect(parse_weights("") == {} and parse_weights(None) == {}, "빈 설정은 빈 dict"),
+    ])
+
+def main():
+    """메인 테스트 실행"""
+    global logger
+    logger = setup_logging()
+
+    logger.info("🚀 AI 요청 스케줄러 테스트 시작!")
+    logger.info("=" * 60)
+
+    tests = [
+        ("토큰 버킷", test_token_bucket),
+        ("클래스 가중치", test_class_weights),
+        ("유휴 클래스 pass 보정", test_idle_class_catch_up),
+        ("클라이언트 라운드 로빈", test_client_round_robin),
+        ("클라이언트 큐 상한", test_max_client_queue),
+        ("클라이언트 속도 제한", test_rate_limit),
+        ("스케줄러 종료", test_close),
+        ("가중치 파싱", test_parse_weights),
+    ]
+
+    passed = 0
+    failed = 0
+
+    for test_name, test_func in tests:
+        logger.info(f"\n📋 {test_name} 테스트 실행...")
+        try:
+            if test_func():
+                passed += 1
+                logger.info(f"✅ {test_name} 테스트 통과!")
+            else:
+                failed += 1
+                logger.error(f"❌ {test_name} 테스트 실패!")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test_name} 테스트 예외 발생: {e}")
+
+    logger.info("\n" + "=" * 60)
+    logger.info(f"📊 테스트 결과: {passed}개 통과, {failed}개 실패")
+
+    return failed == 0
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)